@@ -0,0 +1,40 @@
+"""CLI startup budget: wall time of `--help` and `dq check` in fresh interpreters.
+
+    python benchmarks/cli_startup.py [--runs 5] [--help-budget 1.0] [--dq-budget 2.0]
+
+Prints the median of each command and exits 1 when one is over its budget (seconds).
+"""
+from __future__ import annotations
+import argparse, statistics, subprocess, sys, time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+SAMPLE = ROOT / "examples" / "data" / "sample_reservations.csv"
+
+def wall(args, runs: int) -> float:
+    times = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        subprocess.run([sys.executable, "-m", "hospops_forecast.cli", *args], cwd=ROOT, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        times.append(time.perf_counter() - t0)
+    return statistics.median(times)
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--help-budget", type=float, default=1.0)
+    ap.add_argument("--dq-budget", type=float, default=2.0)
+    a = ap.parse_args()
+    cases = [("--help", ["--help"], a.help_budget),
+             ("dq check", ["dq", "check", "--input", str(SAMPLE)], a.dq_budget)]
+    over = False
+    for name, args, budget in cases:
+        t = wall(args, a.runs)
+        ok = t <= budget
+        over |= not ok
+        print(f"{name:10s} {t:6.3f}s  budget {budget:.2f}s  {'ok' if ok else 'OVER'}")
+    return 1 if over else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
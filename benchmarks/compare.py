@@ -0,0 +1,39 @@
+"""Compare two benchmark JSON files from suite.py case by case.
+
+    python benchmarks/compare.py base.json new.json [--threshold 1.10]
+
+Prints median time and peak memory ratios (new / base) and exits 1 when any case got slower
+than the threshold.
+"""
+from __future__ import annotations
+import argparse, json, sys
+from pathlib import Path
+
+def _index(path: Path) -> dict:
+    report = json.loads(path.read_text(encoding="utf-8"))
+    return report["meta"], {(r["case"], r["rows"]): r for r in report["results"]}
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("base", type=Path)
+    ap.add_argument("new", type=Path)
+    ap.add_argument("--threshold", type=float, default=1.10, help="Slowdown ratio that fails the comparison")
+    a = ap.parse_args(argv)
+    base_meta, base = _index(a.base)
+    new_meta, new = _index(a.new)
+    print(f"base {base_meta.get('commit') or a.base}  new {new_meta.get('commit') or a.new}")
+    slower = 0
+    for key in sorted(base.keys() & new.keys(), key=lambda k: (k[1], k[0])):
+        b, n = base[key], new[key]
+        t = n["median_s"] / b["median_s"] if b["median_s"] > 0 else float("inf")
+        m = n["peak_mb"] / b["peak_mb"] if b["peak_mb"] > 0 else float("inf")
+        flag = "SLOWER" if t > a.threshold else ""
+        slower += bool(flag)
+        print(f"{key[0]:18s} {key[1]:>10,d}  {b['median_s']:9.4f}s -> {n['median_s']:9.4f}s  x{t:5.2f}  "
+              f"mem x{m:5.2f}  {flag}")
+    for key in sorted(base.keys() ^ new.keys()):
+        print(f"{key[0]:18s} {key[1]:>10,d}  only in {'base' if key in base else 'new'}")
+    return 1 if slower else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
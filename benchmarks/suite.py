@@ -0,0 +1,169 @@
+"""Time and memory-profile segmentation, every forecaster, calibration and learning on synthetic data.
+
+    python -m benchmarks.suite --sizes 1k,10k,100k --output bench.json
+    python -m benchmarks.suite --sizes 1M --cases segment,labor,pipeline --repeat 1
+    python benchmarks/compare.py base.json bench.json
+
+Each case is timed `--repeat` times (wall clock, median reported), then run once more under
+tracemalloc for the peak of Python and NumPy allocations. Inputs come from `hospops_forecast.synth`
+with a fixed seed, so results from different commits are comparable. Run it as a module from the
+repository root so the checkout's package is the one measured.
+"""
+from __future__ import annotations
+import argparse, gc, json, platform, statistics, subprocess, sys, time, tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+from hospops_forecast import __version__, synth
+from hospops_forecast.backtest import Backtester
+from hospops_forecast.calibration.labor_calibrator import LaborCalibrator
+from hospops_forecast.features import FeatureCache, expand_reservations_daily
+from hospops_forecast.models.airline import AirlineForecaster
+from hospops_forecast.models.departments import DepartmentForecaster
+from hospops_forecast.models.fnb import FNBConsumptionForecaster
+from hospops_forecast.models.labor import LaborForecaster
+from hospops_forecast.models.learning import HKLearner
+from hospops_forecast.models.service import ServiceLoadForecaster
+from hospops_forecast.models.staffing import required_staff
+from hospops_forecast.pipeline import ForecastPipeline
+from hospops_forecast.scenarios import ScenarioEngine, grid
+from hospops_forecast.segmentation.segmenter import Segmenter
+from hospops_forecast.simulation import MonteCarloForecaster
+
+ROOT = Path(__file__).resolve().parents[1]
+
+FLIGHTS_PER_RESERVATION = 0.05
+# the per-guest-night expansion is the old scaling cliff; skipped above this size unless asked for
+EXPAND_MAX_ROWS = 20_000
+
+def parse_size(text: str) -> int:
+    text = text.strip().lower()
+    mult = {"k": 1_000, "m": 1_000_000}.get(text[-1:], 1)
+    return int(float(text.rstrip("km")) * mult)
+
+def _inputs(n: int, seed: int, days: int) -> Dict[str, pd.DataFrame]:
+    raw = synth.generate_reservations(n, seed, days=days)
+    raw = raw[raw["status"] != "Cancelled"].drop(columns="status").reset_index(drop=True)
+    enriched = Segmenter().enrich(raw)
+    return {"raw": raw, "enriched": enriched,
+            "flights": synth.generate_flights(max(1, int(n * FLIGHTS_PER_RESERVATION)), seed, days=min(days, 90)),
+            "hk": synth.generate_hk_actuals(enriched, seed)}
+
+def _fitted_segmenter(d: Dict[str, pd.DataFrame]) -> Segmenter:
+    # fitted on first use: runs without segment_transform never pay for the KMeans fit
+    if "segmenter" not in d:
+        d["segmenter"] = Segmenter(model=Segmenter().fit(d["raw"]).model)
+    return d["segmenter"]
+
+# per-case preparation run before timing starts
+SETUP: Dict[str, Callable[[Dict[str, pd.DataFrame]], object]] = {"segment_transform": _fitted_segmenter}
+
+def cases(d: Dict[str, pd.DataFrame]) -> Dict[str, Callable[[], object]]:
+    en = d["enriched"]
+    # Erlang C solver on a year of 30-minute reception slots, independent of the book size
+    loads = np.random.default_rng(0).gamma(2.0, 10.0, 365 * 48)
+    # 100 what-if variants: utilization x SLA target x family HK multiplier
+    whatif = grid({"utilization": [0.75, 0.8, 0.85, 0.9, 0.95], "target_wait_min": [2, 5, 10, 15, 20],
+                   "housekeeping.archetype_multipliers.FamilyWithKids": [1.0, 1.2, 1.4, 1.6]})
+    return {
+        "segment": lambda: Segmenter().enrich(d["raw"]),
+        "segment_fit": lambda: Segmenter().fit(d["raw"]).model.counts,
+        "segment_transform": lambda: _fitted_segmenter(d).transform(d["raw"]),
+        "expand_daily": lambda: expand_reservations_daily(en),
+        "features": lambda: [FeatureCache(en).get(k) for k in ("inhouse", "arrivals", "checkouts")],
+        "labor": lambda: LaborForecaster().predict(en),
+        "fnb": lambda: FNBConsumptionForecaster().predict_all(en),
+        "service_reception": lambda: ServiceLoadForecaster().predict(en, area="reception"),
+        "service_breakfast": lambda: ServiceLoadForecaster().predict(en, area="breakfast"),
+        "departments": lambda: DepartmentForecaster().predict_all(en),
+        "airline": lambda: AirlineForecaster().predict_all(d["flights"]),
+        "erlang_staffing": lambda: required_staff(loads, 12.0, 5.0, 0.85),
+        "pipeline": lambda: ForecastPipeline().run(en, flights=d["flights"]),
+        "scenarios_100": lambda: ScenarioEngine().evaluate(en, whatif),
+        "simulate_1k": lambda: MonteCarloForecaster(draws=1000).simulate(en),
+        "calibrate": lambda: LaborCalibrator().fit_multipliers(en, d["hk"]),
+        "learn": lambda: HKLearner().fit(en, d["hk"]),
+        "backtest": lambda: Backtester(window=60, workers=1).run(en, d["hk"]).report,
+    }
+
+def _rows(out) -> int:
+    if isinstance(out, pd.DataFrame):
+        return len(out)
+    if isinstance(out, dict):
+        return sum(len(v) for v in out.values() if isinstance(v, pd.DataFrame))
+    if isinstance(out, (list, tuple)):
+        return sum(_rows(v) for v in out)
+    return int(np.size(out)) if isinstance(out, np.ndarray) else 0
+
+def measure(fn: Callable[[], object], repeat: int) -> dict:
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        t0 = time.perf_counter()
+        out = fn()
+        times.append(time.perf_counter() - t0)
+    rows = _rows(out)
+    del out
+    gc.collect()
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": times, "median_s": statistics.median(times), "min_s": min(times),
+            "peak_mb": peak / 2**20, "output_rows": rows}
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return ""
+
+def main(argv: List[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--sizes", default="1k,10k,100k", help="Reservation counts, e.g. 1k,100k,1M,10M")
+    ap.add_argument("--cases", default="", help="Comma-separated subset (default: all)")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--days", type=int, default=365, help="Arrival horizon of the synthetic book")
+    ap.add_argument("--output", type=Path, default=None, help="JSON results (default: print only)")
+    a = ap.parse_args(argv)
+    wanted = [c for c in a.cases.split(",") if c]
+    results = []
+    for n in [parse_size(s) for s in a.sizes.split(",") if s]:
+        d = _inputs(n, a.seed, a.days)
+        available = cases(d)
+        unknown = set(wanted) - set(available)
+        if unknown:
+            ap.error(f"unknown cases {sorted(unknown)}; available: {list(available)}")
+        for name, fn in available.items():
+            if wanted and name not in wanted:
+                continue
+            if name == "expand_daily" and not wanted and n > EXPAND_MAX_ROWS:
+                continue
+            if name in SETUP:
+                SETUP[name](d)
+            r = {"case": name, "rows": n, "input_rows": len(d["flights"] if name == "airline" else d["raw"]),
+                 **measure(fn, a.repeat)}
+            results.append(r)
+            print(f"{name:18s} {n:>10,d}  {r['median_s']:9.4f}s  peak {r['peak_mb']:9.1f} MB  -> {r['output_rows']:,d} rows",
+                  flush=True)
+        del d
+    report = {
+        "meta": {"commit": _git_commit(), "version": __version__, "seed": a.seed, "days": a.days, "repeat": a.repeat,
+                 "python": platform.python_version(), "numpy": np.__version__, "pandas": pd.__version__,
+                 "machine": platform.machine(), "platform": platform.platform(),
+                 "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds")},
+        "results": results,
+    }
+    if a.output is not None:
+        a.output.parent.mkdir(parents=True, exist_ok=True)
+        a.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"wrote {a.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,83 +1,238 @@
 from __future__ import annotations
-from fastapi import FastAPI, UploadFile, File, Query
+import json, os, time
+from contextlib import asynccontextmanager
+from typing import Optional
+from fastapi import Depends, FastAPI, UploadFile, File, Form, Query, HTTPException, Request
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, Response
 import pandas as pd
 from io import BytesIO
-from ..segmentation.segmenter import Segmenter
-from ..models.labor import LaborForecaster
-from ..models.fnb import FNBConsumptionForecaster
-from ..models.service import ServiceLoadForecaster
-from ..models.departments import DepartmentForecaster
-from ..models.airline import AirlineForecaster
-from ..calibration.labor_calibrator import LaborCalibrator
-from ..models.learning import HKLearner
+from ..models.base import default_config
+from ..config.compiled import compile_config
 from ..dq.validators import check_reservations_basic
+from ..profiling import StageTotals
+from . import tasks
+from .datasets import Dataset, DatasetStore
+from .jobs import JobManager, TooManyJobs
+from .metrics import CONTENT_TYPE, RequestMetrics, render_stages
+from .responses import OutputOptions, render
 
-app = FastAPI(title="HospOps-Forecast API", version="0.3.0")
+# uploads are segmented once and kept by content hash; forecasters share one parsed config
+datasets = DatasetStore()
+CONFIG = compile_config(default_config())
+# heavy work runs off the event loop: interactive calls on a thread pool, /jobs on their own pool
+jobs = JobManager.from_env()
+# request latency always; per-stage totals unless HOSPOPS_API_STAGE_METRICS=0 (jobs on a process pool aren't seen)
+request_metrics = RequestMetrics()
+stage_totals = StageTotals().install() if os.environ.get("HOSPOPS_API_STAGE_METRICS", "1") != "0" else None
 
-def _read_csv(upload: UploadFile) -> pd.DataFrame:
-    content = upload.file.read()
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    yield
+    jobs.shutdown()
+
+app = FastAPI(title="HospOps-Forecast API", version="0.3.0", lifespan=lifespan)
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
+@app.middleware("http")
+async def _observe(request: Request, call_next):
+    t0 = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # label by route template so ids in paths don't explode the series count
+        route = request.scope.get("route")
+        request_metrics.observe(request.method, getattr(route, "path", "<unmatched>"), status,
+                                time.perf_counter() - t0)
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return Response(request_metrics.render() + render_stages(stage_totals), media_type=CONTENT_TYPE)
+
+def _read_bytes(content: bytes) -> pd.DataFrame:
     return pd.read_csv(BytesIO(content))
 
+async def _read_csv(upload: UploadFile) -> pd.DataFrame:
+    return await jobs.run(_read_bytes, await upload.read())
+
+async def _dataset(file: Optional[UploadFile], dataset_id: Optional[str]) -> Dataset:
+    if dataset_id is not None:
+        try:
+            return datasets.get(dataset_id)
+        except KeyError:
+            raise HTTPException(status_code=404, detail=f"Unknown or expired dataset '{dataset_id}'")
+    if file is None:
+        raise HTTPException(status_code=422, detail="Upload a file or pass dataset_id")
+    ds, _ = await jobs.run(datasets.put, await file.read(), file.filename)
+    return ds
+
+async def _forecast(ds: Dataset, opts: OutputOptions, kind: str, **params):
+    try:
+        out = await jobs.run(tasks.forecast, ds.features, kind, params, CONFIG)
+    finally:
+        datasets.release(ds.id)
+    return await jobs.run(render, out, opts)
+
+@app.post("/datasets")
+async def create_dataset(file: UploadFile = File(...)):
+    ds, created = await jobs.run(datasets.put, await file.read(), file.filename)
+    return {**ds.info(), "created": created}
+
+@app.get("/datasets/{dataset_id}")
+async def get_dataset(dataset_id: str):
+    return (await _dataset(None, dataset_id)).info()
+
+@app.delete("/datasets/{dataset_id}")
+async def delete_dataset(dataset_id: str):
+    try:
+        datasets.delete(dataset_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown or expired dataset '{dataset_id}'")
+    return {"deleted": dataset_id}
+
 @app.post("/segment")
 async def segment(file: UploadFile = File(...)):
-    df = _read_csv(file)
-    seg = Segmenter()
-    out = seg.enrich(df)
-    return {"rows": len(out), "preview": out.head(50).to_dict(orient="records")}
+    ds = await _dataset(file, None)
+    out = ds.enriched
+    return {"rows": len(out), "dataset_id": ds.id, "preview": out.head(50).to_dict(orient="records")}
 
 @app.post("/forecast/labor")
-async def forecast_labor(file: UploadFile = File(...)):
-    df = _read_csv(file)
-    seg = Segmenter(); enriched = seg.enrich(df)
-    out = LaborForecaster().predict(enriched)
-    return out.to_dict(orient="records")
+async def forecast_labor(file: Optional[UploadFile] = File(None), dataset_id: Optional[str] = Query(None), opts: OutputOptions = Depends()):
+    return await _forecast(await _dataset(file, dataset_id), opts, "labor")
 
 @app.post("/forecast/fnb")
-async def forecast_fnb(meal: str = Query("breakfast"), file: UploadFile = File(...)):
-    df = _read_csv(file)
-    seg = Segmenter(); enriched = seg.enrich(df)
-    out = FNBConsumptionForecaster().predict(enriched, meal=meal)
-    return out.to_dict(orient="records")
+async def forecast_fnb(meal: str = Query("breakfast"), file: Optional[UploadFile] = File(None), dataset_id: Optional[str] = Query(None), opts: OutputOptions = Depends()):
+    return await _forecast(await _dataset(file, dataset_id), opts, "fnb", meal=meal)
 
 @app.post("/forecast/service")
-async def forecast_service(area: str = Query(...), target_wait_min: float = Query(5.0), file: UploadFile = File(...)):
-    df = _read_csv(file)
-    seg = Segmenter(); enriched = seg.enrich(df)
-    out = ServiceLoadForecaster().predict(enriched, area=area, target_wait_min=target_wait_min)
-    return out.to_dict(orient="records")
+async def forecast_service(area: str = Query(...), target_wait_min: float = Query(5.0), file: Optional[UploadFile] = File(None), dataset_id: Optional[str] = Query(None), opts: OutputOptions = Depends()):
+    return await _forecast(await _dataset(file, dataset_id), opts, "service", area=area, target_wait_min=target_wait_min)
 
 @app.post("/forecast/dept")
-async def forecast_dept(dept: str = Query(...), file: UploadFile = File(...)):
-    df = _read_csv(file)
-    seg = Segmenter(); enriched = seg.enrich(df)
-    out = DepartmentForecaster().predict(enriched, dept=dept)
-    return out.to_dict(orient="records")
+async def forecast_dept(dept: str = Query(...), file: Optional[UploadFile] = File(None), dataset_id: Optional[str] = Query(None), opts: OutputOptions = Depends()):
+    return await _forecast(await _dataset(file, dataset_id), opts, "dept", dept=dept)
 
 @app.post("/forecast/airline")
-async def forecast_airline(area: str = Query(...), flights: UploadFile = File(...)):
-    df = _read_csv(flights)
-    out = AirlineForecaster().predict(df, area=area)
-    return out.to_dict(orient="records")
+async def forecast_airline(area: str = Query(...), flights: UploadFile = File(...), opts: OutputOptions = Depends()):
+    df = await _read_csv(flights)
+    out = await jobs.run(tasks.airline, df, area, CONFIG)
+    return await jobs.run(render, out, opts)
+
+@app.post("/scenarios")
+async def scenarios(spec: str = Form(..., description='JSON: {"grid": {key: [values]}, "scenarios": [{"name": ..., key: value}]}'),
+                    output: str = Query("labor", description="labor|fnb|service_reception|service_breakfast|scenarios"),
+                    file: Optional[UploadFile] = File(None), dataset_id: Optional[str] = Query(None), opts: OutputOptions = Depends()):
+    try:
+        parsed = json.loads(spec)
+    except json.JSONDecodeError as e:
+        raise HTTPException(status_code=422, detail=f"spec is not valid JSON: {e}")
+    ds = await _dataset(file, dataset_id)
+    try:
+        out = await jobs.run(tasks.scenarios, ds.features, parsed, output, CONFIG)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    finally:
+        datasets.release(ds.id)
+    return await jobs.run(render, out, opts)
 
 @app.post("/calibrate/labor")
 async def calibrate_labor(enriched: UploadFile = File(...), actual: UploadFile = File(...)):
-    en = _read_csv(enriched)
-    ac = _read_csv(actual)
+    en = await _read_csv(enriched)
+    ac = await _read_csv(actual)
     from ..config.loader import load_config
-    cal = LaborCalibrator(load_config(None))
-    tuned = cal.fit_multipliers(en, ac)
-    return tuned
+    return await jobs.run(tasks.calibrate_labor, en, ac, load_config(None))
 
 @app.post("/learn/hk")
 async def learn_hk(enriched: UploadFile = File(...), actual: UploadFile = File(...)):
-    en = _read_csv(enriched)
-    ac = _read_csv(actual)
-    learner = HKLearner()
-    tuned = learner.fit(en, ac)
-    return tuned
+    en = await _read_csv(enriched)
+    ac = await _read_csv(actual)
+    return await jobs.run(tasks.learn_hk, en, ac)
 
 @app.post("/dq/check")
 async def dq_check(file: UploadFile = File(...)):
-    df = _read_csv(file)
-    res = check_reservations_basic(df)
-    return res
+    df = await _read_csv(file)
+    return await jobs.run(check_reservations_basic, df)
+
+# ---- jobs: submit, poll, fetch, cancel ---------------------------------------------------------
+def _submit(kind: str, fn, *args):
+    try:
+        job = jobs.submit(kind, fn, *args)
+    except TooManyJobs as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    return JSONResponse(job.info(), status_code=202)
+
+def _check_forecast_params(kind: str, meal: Optional[str], area: Optional[str], dept: Optional[str]) -> None:
+    # a bad parameter is the caller's mistake (422), not a failed job to discover by polling
+    cfg = CONFIG.raw
+    choices = {"service": ("area", area, list(cfg.get("service_load", {}))),
+               "dept": ("dept", dept, list(cfg.get("departments", {})) + ["all"]),
+               "fnb": ("meal", meal, list(cfg.get("fnb_meals", {})) + ["all"])}
+    if kind not in choices:
+        return
+    name, value, allowed = choices[kind]
+    if value is None and kind != "fnb":
+        raise HTTPException(status_code=422, detail=f"kind={kind} needs {name}, one of {allowed}")
+    if value is not None and value not in allowed:
+        raise HTTPException(status_code=422, detail=f"Unknown {name} '{value}'. Expected one of {allowed}")
+
+def _job(job_id: str):
+    try:
+        return jobs.get(job_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown job '{job_id}'")
+
+@app.post("/jobs/forecast")
+async def submit_forecast(kind: str = Query(..., description="labor|fnb|service|dept|all"), dataset_id: Optional[str] = Query(None),
+                          file: Optional[UploadFile] = File(None), meal: Optional[str] = Query(None), area: Optional[str] = Query(None),
+                          dept: Optional[str] = Query(None), target_wait_min: Optional[float] = Query(None)):
+    if kind not in tasks.FORECAST_KINDS:
+        raise HTTPException(status_code=422, detail=f"kind must be one of {list(tasks.FORECAST_KINDS)}")
+    _check_forecast_params(kind, meal, area, dept)
+    ds = await _dataset(file, dataset_id)
+    # threads share the dataset's intermediates; a process gets the enriched frame and rebuilds them
+    source = ds.enriched if jobs.uses_processes else ds.features
+    params = {"meal": meal, "area": area, "dept": dept, "target_wait_min": target_wait_min}
+    return _submit(f"forecast_{kind}", tasks.forecast, source, kind, params, CONFIG)
+
+@app.post("/jobs/calibrate/labor")
+async def submit_calibrate_labor(enriched: UploadFile = File(...), actual: UploadFile = File(...)):
+    en = await _read_csv(enriched)
+    ac = await _read_csv(actual)
+    from ..config.loader import load_config
+    return _submit("calibrate_labor", tasks.calibrate_labor, en, ac, load_config(None))
+
+@app.get("/jobs")
+async def list_jobs():
+    return [j.info() for j in jobs.list()]
+
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str):
+    return _job(job_id).info()
+
+@app.get("/jobs/{job_id}/result")
+async def job_result(job_id: str, name: Optional[str] = Query(None, description="kind=all: which forecast to return"),
+                     opts: OutputOptions = Depends()):
+    job = _job(job_id)
+    status = job.status
+    if status in ("queued", "running"):
+        return JSONResponse(job.info(), status_code=202)
+    if status != "done":
+        raise HTTPException(status_code=409, detail=job.info())
+    result = job.result()
+    if isinstance(result, dict) and name is not None:
+        if name not in result or not isinstance(result[name], pd.DataFrame):
+            raise HTTPException(status_code=404, detail=f"Job has no forecast '{name}'")
+        result = result[name]
+    if isinstance(result, pd.DataFrame):
+        return await jobs.run(render, result, opts)
+    if isinstance(result, dict) and all(isinstance(v, pd.DataFrame) for v in result.values()):
+        return {k: v.to_dict(orient="records") for k, v in result.items()}
+    return result
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    _job(job_id)
+    return jobs.cancel(job_id).info()
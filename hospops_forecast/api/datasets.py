@@ -0,0 +1,126 @@
+from __future__ import annotations
+import hashlib, threading, time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from io import BytesIO
+from typing import Callable, Dict, Optional, Tuple
+import pandas as pd
+from ..features import FeatureCache
+from ..segmentation.segmenter import Segmenter
+
+def read_upload(content: bytes, filename: Optional[str] = None) -> pd.DataFrame:
+    name = (filename or "").lower()
+    if name.endswith((".parquet", ".pq")):
+        return pd.read_parquet(BytesIO(content))
+    if name.endswith((".feather", ".arrow", ".ipc")):
+        return pd.read_feather(BytesIO(content))
+    return pd.read_csv(BytesIO(content))
+
+def _frame_bytes(obj) -> int:
+    return int(obj.memory_usage(deep=True).sum()) if isinstance(obj, pd.DataFrame) else 0
+
+@dataclass
+class Dataset:
+    """One ingested upload: the enriched reservations plus the intermediates forecasts have built."""
+    id: str
+    features: FeatureCache
+    rows: int
+    created_at: float
+    last_used: float
+    base_bytes: int = 0
+    hits: int = field(default=0)
+
+    @property
+    def enriched(self) -> pd.DataFrame:
+        return self.features.enriched
+
+    def nbytes(self) -> int:
+        # the enriched frame is sized once at ingest; intermediates are (date x archetype) and cheap to size
+        return self.base_bytes + sum(_frame_bytes(self.features.get(k)) for k in self.features.computed())
+
+    def info(self) -> dict:
+        return {"dataset_id": self.id, "rows": self.rows, "bytes": self.nbytes(),
+                "intermediates": self.features.computed(), "hits": self.hits}
+
+class DatasetStore:
+    """Content-addressed in-memory datasets with LRU order, TTL and a memory budget.
+
+    The id is the sha256 of the uploaded bytes, so re-uploading a file reuses the parsed, segmented
+    dataset and every intermediate already computed for it.
+    """
+
+    def __init__(self, max_items: int = 32, ttl_seconds: Optional[float] = 3600.0,
+                 max_bytes: Optional[int] = 1 << 30, clock: Callable[[], float] = time.monotonic):
+        self.max_items, self.ttl_seconds, self.max_bytes = max_items, ttl_seconds, max_bytes
+        self._clock = clock
+        self._items: "OrderedDict[str, Dataset]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, dataset_id: str) -> bool:
+        with self._lock:
+            self._expire()
+            return dataset_id in self._items
+
+    def put(self, content: bytes, filename: Optional[str] = None) -> Tuple[Dataset, bool]:
+        """Ingest and segment ``content`` unless the same bytes are already stored; returns (dataset, created)."""
+        dataset_id = hashlib.sha256(content).hexdigest()
+        try:
+            return self.get(dataset_id), False
+        except KeyError:
+            pass
+        enriched = Segmenter().enrich(read_upload(content, filename))
+        now = self._clock()
+        ds = Dataset(dataset_id, FeatureCache(enriched), len(enriched), now, now, _frame_bytes(enriched))
+        with self._lock:
+            ds = self._items.setdefault(dataset_id, ds)  # a concurrent upload of the same bytes wins
+            self._items.move_to_end(dataset_id)
+            self._evict(keep=dataset_id)
+        return ds, True
+
+    def get(self, dataset_id: str) -> Dataset:
+        with self._lock:
+            self._expire()
+            ds = self._items.get(dataset_id)
+            if ds is None:
+                raise KeyError(dataset_id)
+            self._items.move_to_end(dataset_id)
+            ds.last_used = self._clock()
+            ds.hits += 1
+            return ds
+
+    def delete(self, dataset_id: str) -> None:
+        with self._lock:
+            if self._items.pop(dataset_id, None) is None:
+                raise KeyError(dataset_id)
+
+    def release(self, dataset_id: str) -> None:
+        # after a forecast: intermediates may have grown the dataset, so re-check the budget
+        with self._lock:
+            self._evict(keep=dataset_id)
+
+    def total_bytes(self) -> int:
+        return sum(ds.nbytes() for ds in list(self._items.values()))
+
+    def _expire(self) -> None:
+        if self.ttl_seconds is None:
+            return
+        cutoff = self._clock() - self.ttl_seconds
+        for k in [k for k, ds in self._items.items() if ds.last_used < cutoff]:
+            del self._items[k]
+
+    def _evict(self, keep: Optional[str] = None) -> None:
+        self._expire()
+        sizes: Dict[str, int] = {k: ds.nbytes() for k, ds in self._items.items()}
+        total = sum(sizes.values())
+        for k in list(self._items):  # least recently used first
+            over_count = len(self._items) > self.max_items
+            over_bytes = self.max_bytes is not None and total > self.max_bytes
+            if not (over_count or over_bytes):
+                break
+            if k == keep:
+                continue
+            del self._items[k]
+            total -= sizes[k]
@@ -0,0 +1,132 @@
+from __future__ import annotations
+import asyncio, functools, multiprocessing, os, threading, time, uuid
+from collections import OrderedDict
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+class TooManyJobs(RuntimeError):
+    pass
+
+def _timed(fn: Callable, args: tuple, kwargs: dict) -> Tuple[Any, float, float]:
+    # wall-clock start/end measured inside the worker, so queue time and run time separate cleanly
+    started = time.time()
+    result = fn(*args, **kwargs)
+    return result, started, time.time()
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    submitted_at: float
+    future: Future = field(repr=False)
+    cancel_requested: bool = False
+
+    @property
+    def status(self) -> str:
+        if self.cancel_requested or self.future.cancelled():
+            return "cancelled"
+        if self.future.done():
+            return "failed" if self.future.exception() is not None else "done"
+        return "running" if self.future.running() else "queued"
+
+    def info(self) -> dict:
+        out: Dict[str, Any] = {"job_id": self.id, "kind": self.kind, "status": self.status, "submitted_at": self.submitted_at}
+        if self.status == "done":
+            _, started, finished = self.future.result()
+            out.update(started_at=started, finished_at=finished,
+                       queue_seconds=max(started - self.submitted_at, 0.0), run_seconds=finished - started)
+        elif self.status == "failed":
+            err = self.future.exception()
+            out["error"] = f"{type(err).__name__}: {err}"
+        return out
+
+    def result(self) -> Any:
+        return self.future.result()[0]
+
+class JobManager:
+    """Runs CPU-bound API work off the event loop.
+
+    Interactive requests go to a small thread pool (``run``); long jobs go to a separate thread or
+    process pool (``submit``) with at most ``max_pending`` queued+running jobs, so a large
+    calibration never sits in front of an interactive forecast. Cancelling a queued job removes
+    it; a running job is marked cancelled and its result discarded when it finishes.
+    """
+
+    def __init__(self, executor: str = "thread", max_workers: int = 2, max_pending: int = 16,
+                 interactive_workers: int = 4, keep_finished: int = 256):
+        if executor not in ("thread", "process"):
+            raise ValueError("executor must be 'thread' or 'process'")
+        self.executor_kind, self.max_workers, self.max_pending = executor, max_workers, max_pending
+        self.keep_finished, self.interactive_workers = keep_finished, interactive_workers
+        self._interactive: Optional[ThreadPoolExecutor] = None
+        self._background: Optional[Executor] = None
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "JobManager":
+        env = os.environ.get
+        return cls(executor=env("HOSPOPS_API_EXECUTOR", "thread"),
+                   max_workers=int(env("HOSPOPS_API_WORKERS", "2")),
+                   max_pending=int(env("HOSPOPS_API_MAX_JOBS", "16")),
+                   interactive_workers=int(env("HOSPOPS_API_INTERACTIVE_WORKERS", "4")))
+
+    @property
+    def uses_processes(self) -> bool:
+        return self.executor_kind == "process"
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        if self._interactive is None:
+            self._interactive = ThreadPoolExecutor(max_workers=self.interactive_workers, thread_name_prefix="hospops-api")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._interactive, functools.partial(fn, *args, **kwargs))
+
+    def _pool(self) -> Executor:
+        if self._background is None:
+            if self.uses_processes:
+                # spawn: forking a server process that already runs threads is not safe
+                self._background = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn"))
+            else:
+                self._background = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="hospops-job")
+        return self._background
+
+    def submit(self, kind: str, fn: Callable, *args, **kwargs) -> Job:
+        with self._lock:
+            pending = sum(not j.future.done() for j in self._jobs.values())
+            if pending >= self.max_pending:
+                raise TooManyJobs(f"{pending} jobs pending (limit {self.max_pending})")
+            job = Job(uuid.uuid4().hex, kind, time.time(), self._pool().submit(_timed, fn, args, kwargs))
+            self._jobs[job.id] = job
+            self._trim()
+        return job
+
+    def get(self, job_id: str) -> Job:
+        with self._lock:
+            return self._jobs[job_id]
+
+    def list(self) -> List[Job]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def cancel(self, job_id: str) -> Job:
+        job = self.get(job_id)
+        if not job.future.done():
+            job.cancel_requested = True
+            job.future.cancel()
+        return job
+
+    def _trim(self) -> None:
+        # forget the oldest finished jobs beyond keep_finished
+        finished = [k for k, j in self._jobs.items() if j.future.done()]
+        for k in finished[:max(len(finished) - self.keep_finished, 0)]:
+            del self._jobs[k]
+
+    def shutdown(self) -> None:
+        # pools are recreated on next use
+        if self._interactive is not None:
+            self._interactive.shutdown(wait=False, cancel_futures=True)
+            self._interactive = None
+        if self._background is not None:
+            self._background.shutdown(wait=False, cancel_futures=True)
+            self._background = None
@@ -0,0 +1,74 @@
+from __future__ import annotations
+import bisect, threading
+from typing import Dict, Optional, Sequence, Tuple
+from ..profiling import StageTotals
+
+# Prometheus text exposition (format 0.0.4) without a client library: request latency histograms
+# per endpoint plus the stage totals recorded by hospops_forecast.profiling.
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+def _labels(**kv: str) -> str:
+    esc = {k: str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for k, v in kv.items()}
+    return "{" + ",".join(f'{k}="{v}"' for k, v in esc.items()) + "}"
+
+def _num(v: float) -> str:
+    return repr(float(v)) if v != int(v) else str(int(v))
+
+class RequestMetrics:
+    """Latency histogram per (method, route) and a request counter per (method, route, status)."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._hist: Dict[Tuple[str, str], list] = {}  # -> [bucket counts..., sum, count]
+        self._status: Dict[Tuple[str, str, str], int] = {}
+
+    def observe(self, method: str, path: str, status: int, seconds: float) -> None:
+        i = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            h = self._hist.get((method, path))
+            if h is None:
+                h = self._hist[(method, path)] = [0] * len(self.buckets) + [0.0, 0]
+            if i < len(self.buckets):
+                h[i] += 1
+            h[-2] += seconds
+            h[-1] += 1
+            key = (method, path, str(status))
+            self._status[key] = self._status.get(key, 0) + 1
+
+    def render(self) -> str:
+        with self._lock:
+            hist = {k: list(v) for k, v in self._hist.items()}
+            status = dict(self._status)
+        out = ["# HELP hospops_http_request_duration_seconds Time to response start per endpoint.",
+               "# TYPE hospops_http_request_duration_seconds histogram"]
+        for (method, path), h in sorted(hist.items()):
+            cum = 0
+            for le, n in zip(self.buckets, h):
+                cum += n
+                out.append(f"hospops_http_request_duration_seconds_bucket{_labels(method=method, path=path, le=_num(le))} {cum}")
+            out.append(f"hospops_http_request_duration_seconds_bucket{_labels(method=method, path=path, le='+Inf')} {h[-1]}")
+            out.append(f"hospops_http_request_duration_seconds_sum{_labels(method=method, path=path)} {h[-2]!r}")
+            out.append(f"hospops_http_request_duration_seconds_count{_labels(method=method, path=path)} {h[-1]}")
+        out += ["# HELP hospops_http_requests_total Requests per endpoint and status code.",
+                "# TYPE hospops_http_requests_total counter"]
+        for (method, path, code), n in sorted(status.items()):
+            out.append(f"hospops_http_requests_total{_labels(method=method, path=path, status=code)} {n}")
+        return "\n".join(out) + "\n"
+
+def render_stages(totals: Optional[StageTotals]) -> str:
+    if totals is None:
+        return ""
+    snap = totals.snapshot()
+    out = []
+    for metric, field, kind, help_ in (
+        ("hospops_stage_calls_total", "count", "counter", "Calls per pipeline stage."),
+        ("hospops_stage_seconds_total", "seconds", "counter", "Wall time spent per pipeline stage."),
+        ("hospops_stage_rows_in_total", "rows_in", "counter", "Input rows seen per pipeline stage."),
+        ("hospops_stage_rows_out_total", "rows_out", "counter", "Output rows produced per pipeline stage."),
+    ):
+        out += [f"# HELP {metric} {help_}", f"# TYPE {metric} {kind}"]
+        out += [f"{metric}{_labels(stage=name)} {_num(t[field])}" for name, t in sorted(snap.items())]
+    return "\n".join(out) + "\n"
@@ -0,0 +1,116 @@
+from __future__ import annotations
+import datetime as dt, json
+from io import BytesIO
+from typing import Iterator, Optional
+import numpy as np
+import pandas as pd
+from fastapi import Header, HTTPException, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from ..io import clip_dates
+
+# format name -> media type; `?format=` wins over the Accept header
+MEDIA_TYPES = {
+    "json": "application/json",
+    "ndjson": "application/x-ndjson",
+    "columnar": "application/vnd.hospops.columnar+json",
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+}
+_BY_MEDIA = {v: k for k, v in MEDIA_TYPES.items()}
+_BY_MEDIA["application/x-parquet"] = "parquet"
+NDJSON_CHUNK_ROWS = 10_000
+
+class OutputOptions:
+    """Query/header dependency shared by every endpoint that returns a forecast frame."""
+
+    def __init__(self,
+                 format: Optional[str] = Query(None, description="json|ndjson|columnar|arrow|parquet (default: Accept header, else json)"),
+                 offset: int = Query(0, ge=0, description="Rows to skip"),
+                 limit: Optional[int] = Query(None, ge=1, description="Max rows to return"),
+                 start: Optional[str] = Query(None, description="First date to return"),
+                 end: Optional[str] = Query(None, description="Last date to return"),
+                 accept: Optional[str] = Header(None)):
+        self.format = self._negotiate(format, accept)
+        self.offset, self.limit, self.start, self.end = offset, limit, start, end
+
+    @staticmethod
+    def _negotiate(fmt: Optional[str], accept: Optional[str]) -> str:
+        if fmt is not None:
+            if fmt not in MEDIA_TYPES:
+                raise HTTPException(status_code=422, detail=f"format must be one of {list(MEDIA_TYPES)}")
+            return fmt
+        for part in (accept or "").split(","):
+            media = part.split(";")[0].strip().lower()
+            if media in _BY_MEDIA:
+                return _BY_MEDIA[media]
+        return "json"
+
+    def page(self, df: pd.DataFrame) -> pd.DataFrame:
+        if not self.offset and self.limit is None:
+            return df
+        stop = None if self.limit is None else self.offset + self.limit
+        return df.iloc[self.offset:stop].reset_index(drop=True)
+
+def _json_ready(df: pd.DataFrame) -> pd.DataFrame:
+    # dates/datetimes as the same ISO strings FastAPI's encoder produced for records
+    out = df.copy()
+    for c in out.columns:
+        s = out[c]
+        if pd.api.types.is_datetime64_any_dtype(s):
+            text = np.datetime_as_string(s.to_numpy(dtype="datetime64[s]"), unit="s").astype(object)
+            text[s.isna().to_numpy()] = None
+            out[c] = text
+        elif s.dtype == object:
+            first = s.dropna().iloc[0] if s.notna().any() else None
+            if isinstance(first, dt.date) and not isinstance(first, dt.datetime):
+                out[c] = s.map(lambda v: v.isoformat() if isinstance(v, dt.date) else None)
+    return out
+
+def _to_json(df: pd.DataFrame, **kw) -> str:
+    return df.to_json(date_format="iso", double_precision=15, force_ascii=False, **kw)
+
+def _ndjson(df: pd.DataFrame) -> Iterator[bytes]:
+    for i in range(0, len(df), NDJSON_CHUNK_ROWS):
+        text = _to_json(_json_ready(df.iloc[i:i + NDJSON_CHUNK_ROWS]), orient="records", lines=True)
+        yield (text if text.endswith("\n") else text + "\n").encode()
+
+def _columnar(df: pd.DataFrame) -> str:
+    ready = _json_ready(df)
+    # one JSON array per column, encoded by pandas; only the column names go through json.dumps
+    data = ",".join(f"{json.dumps(str(c))}:{_to_json(ready[c], orient='values')}" for c in ready.columns)
+    return f'{{"columns":{json.dumps([str(c) for c in ready.columns])},"rows":{len(ready)},"data":{{{data}}}}}'
+
+def _arrow_table(df: pd.DataFrame):
+    try:
+        import pyarrow as pa
+    except Exception:
+        raise HTTPException(status_code=406, detail="Arrow/Parquet responses need pyarrow on the server")
+    return pa, pa.Table.from_pandas(df, preserve_index=False)
+
+def render(df: pd.DataFrame, opts: OutputOptions) -> Response:
+    """Serialize a forecast frame in the negotiated format after date slicing and pagination.
+
+    ``X-Total-Count`` carries the row count before pagination. Compression is left to the gzip
+    middleware, so every format is gzipped when the client sends ``Accept-Encoding: gzip``.
+    """
+    sliced = clip_dates(df, opts.start, opts.end)
+    total = len(sliced)
+    page = opts.page(sliced)
+    headers = {"X-Total-Count": str(total)}
+    media = MEDIA_TYPES[opts.format]
+    if opts.format == "ndjson":
+        return StreamingResponse(_ndjson(page), media_type=media, headers=headers)
+    if opts.format == "json":  # unchanged records encoding, exact floats
+        return JSONResponse(jsonable_encoder(page.to_dict(orient="records")), headers=headers)
+    if opts.format == "columnar":
+        return Response(_columnar(page), media_type=media, headers=headers)
+    pa, table = _arrow_table(page)
+    buf = BytesIO()
+    if opts.format == "arrow":
+        with pa.ipc.new_stream(buf, table.schema) as writer:
+            writer.write_table(table)
+    else:
+        import pyarrow.parquet as pq
+        pq.write_table(table, buf)
+    return Response(buf.getvalue(), media_type=media, headers=headers)
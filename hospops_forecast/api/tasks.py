@@ -0,0 +1,54 @@
+from __future__ import annotations
+from typing import Any, Dict, Optional, Union
+import pandas as pd
+from ..config.compiled import CompiledConfig
+from ..features import FeatureCache
+from ..models.labor import LaborForecaster
+from ..models.fnb import FNBConsumptionForecaster
+from ..models.service import ServiceLoadForecaster
+from ..models.departments import DepartmentForecaster
+from ..models.airline import AirlineForecaster
+from ..pipeline import ForecastPipeline
+from ..calibration.labor_calibrator import LaborCalibrator
+from ..models.learning import HKLearner
+
+# CPU-bound API work as plain module-level functions: they run on the interactive thread pool or,
+# for jobs, on a thread/process pool, so arguments and results must pickle. Forecasts return
+# frames; the endpoint serializes them in the negotiated format (api.responses)
+
+FORECAST_KINDS = ("labor", "fnb", "service", "dept", "all")
+
+def forecast(source: Union[FeatureCache, pd.DataFrame], kind: str, params: Dict[str, Any], config: CompiledConfig) -> Union[pd.DataFrame, Dict[str, pd.DataFrame]]:
+    feats = source if isinstance(source, FeatureCache) else FeatureCache(source)
+    if kind == "labor":
+        out = LaborForecaster.from_compiled(config).predict(None, features=feats)
+    elif kind == "fnb":
+        fnb = FNBConsumptionForecaster.from_compiled(config)
+        meal = params.get("meal") or "breakfast"
+        out = fnb.predict_all(None, features=feats) if meal == "all" else fnb.predict(None, meal=meal, features=feats)
+    elif kind == "service":
+        out = ServiceLoadForecaster.from_compiled(config).predict(None, area=params["area"], target_wait_min=params.get("target_wait_min"), features=feats)
+    elif kind == "dept":
+        dfc = DepartmentForecaster.from_compiled(config)
+        dept = params["dept"]
+        out = dfc.predict_all(None, features=feats) if dept == "all" else dfc.predict(None, dept=dept, features=feats)
+    elif kind == "all":
+        return ForecastPipeline.from_compiled(config, target_wait_min=params.get("target_wait_min")).run(feats)
+    else:
+        raise ValueError(f"Unknown forecast '{kind}'. Expected one of {list(FORECAST_KINDS)}")
+    return out
+
+def scenarios(source: Union[FeatureCache, pd.DataFrame], spec: Dict[str, Any], output: str, config: CompiledConfig) -> pd.DataFrame:
+    from ..scenarios import ScenarioEngine, scenarios_from_spec
+    outputs = [] if output == "scenarios" else [output]
+    return ScenarioEngine.from_compiled(config).evaluate(source, scenarios_from_spec(spec), outputs=outputs)[output]
+
+def airline(flights: pd.DataFrame, area: str, config: CompiledConfig) -> pd.DataFrame:
+    af = AirlineForecaster.from_compiled(config)
+    return af.predict_all(flights) if area == "all" else af.predict(flights, area=area)
+
+def calibrate_labor(enriched: pd.DataFrame, actual: pd.DataFrame, config: dict) -> dict:
+    return LaborCalibrator(config).fit_multipliers(enriched, actual)
+
+def learn_hk(enriched: pd.DataFrame, actual: pd.DataFrame, config: Optional[dict] = None) -> dict:
+    return HKLearner(config).fit(enriched, actual)
@@ -0,0 +1,213 @@
+from __future__ import annotations
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+import numpy as np
+import pandas as pd
+from .calibration.labor_calibrator import RIDGE, LaborCalibrator
+from .models.base import BaseForecaster
+from .models.learning import HKLearner
+from .profiling import stage
+
+# Rolling-origin backtest of the daily HK man-hours forecast. At each origin the multipliers are fitted
+# on the training window and LaborForecaster's arithmetic (unit hours per archetype x multiplier) is
+# scored on the next `horizon` days. The enriched schema has no booking dates, so every fold sees the
+# final book: errors measure calibration, not pickup.
+
+MODELS = ("baseline", "calibrated", "learned")
+MODES = ("rolling", "expanding")
+REPORT_COLUMNS = ["model", "horizon", "archetype", "n", "mae", "mape", "bias"]
+
+@dataclass
+class DailyCube:
+    """Per-day features of the whole book, built once and sliced by every fold.
+
+    Rows are consecutive calendar days from ``start``; days without in-house stays or without
+    actuals are masked out by ``valid``.
+    """
+    start: date
+    archetypes: List[str]
+    unit_hours: np.ndarray       # (days, archetypes) HK hours at multiplier 1, as LaborCalibrator's design
+    learner_columns: List[str]
+    learner_X: np.ndarray        # (days, features) HKLearner's design
+    actual: np.ndarray           # (days,) HK man-hours, NaN where missing
+    valid: np.ndarray            # (days,) bool
+    default_mults: np.ndarray    # (archetypes,) configured multipliers
+
+    @property
+    def days(self) -> int:
+        return len(self.actual)
+
+    @property
+    def dominant(self) -> np.ndarray:
+        # archetype label per day: the one with the most unit HK hours
+        return np.asarray(self.archetypes, dtype=object)[self.unit_hours.argmax(axis=1)] if self.archetypes else np.full(self.days, "", dtype=object)
+
+@stage("backtest.cube")
+def build_cube(enriched: pd.DataFrame, actuals: pd.DataFrame, config: Optional[dict] = None) -> DailyCube:
+    cal = LaborCalibrator(config)
+    unit = cal._design(enriched)
+    learner = HKLearner(cal.config)._design(enriched)
+    y = cal._daily_actuals(actuals)
+    if unit.empty:
+        raise ValueError("No in-house days in the enriched reservations.")
+    start, end = min(unit.index), max(unit.index)
+    days = pd.date_range(start, end, freq="D").date
+    unit = unit.reindex(days)
+    actual = y.reindex(days).to_numpy(dtype=float)
+    valid = unit.notna().all(axis=1).to_numpy() & ~np.isnan(actual)
+    archetypes = [str(c) for c in unit.columns]
+    mults = (cal.config or {}).get("housekeeping", {}).get("archetype_multipliers", {})
+    return DailyCube(
+        start=start, archetypes=archetypes,
+        unit_hours=unit.fillna(0.0).to_numpy(dtype=float),
+        learner_columns=learner.columns.tolist(),
+        learner_X=learner.reindex(days).fillna(0.0).to_numpy(dtype=float),
+        actual=actual, valid=valid,
+        default_mults=np.array([float(mults.get(a, 1.0)) for a in archetypes]),
+    )
+
+# per-process state: the cube is shipped once per worker, not once per fold
+_WORKER: Dict[str, Any] = {}
+
+def _init_worker(cube: DailyCube, options: dict) -> None:
+    _WORKER.update(cube=cube, options=options)
+
+def _fit(model: str, cube: DailyCube, rows: np.ndarray, opts: dict) -> np.ndarray:
+    if model == "baseline":
+        return cube.default_mults
+    y = cube.actual[rows]
+    if model == "calibrated":  # LaborCalibrator.fit_multipliers on the training days
+        A = cube.unit_hours[rows]
+        m = np.linalg.solve(A.T @ A + RIDGE * np.eye(A.shape[1]), A.T @ y)
+        return np.clip(m, opts["min_mult"], opts["max_mult"])
+    from sklearn.linear_model import LinearRegression  # HKLearner.fit on the training days
+    coef = LinearRegression().fit(cube.learner_X[rows], y).coef_
+    learned = HKLearner._multipliers(cube.learner_columns, coef)
+    return np.array([learned.get(a, d) for a, d in zip(cube.archetypes, cube.default_mults)])
+
+def _run_folds(origins: Sequence[int]) -> List[Tuple[np.ndarray, ...]]:
+    cube: DailyCube = _WORKER["cube"]
+    opts = _WORKER["options"]
+    out: List[Tuple[np.ndarray, ...]] = []
+    for t in origins:
+        lo = 0 if opts["mode"] == "expanding" else max(t - opts["window"] + 1, 0)
+        train = lo + np.flatnonzero(cube.valid[lo:t + 1])
+        test = t + 1 + np.flatnonzero(cube.valid[t + 1:t + 1 + opts["horizon"]])
+        if len(train) == 0 or len(test) == 0:
+            continue
+        for k, model in enumerate(opts["models"]):
+            m = _fit(model, cube, train, opts)
+            out.append((np.full(len(test), t), test, np.full(len(test), k), cube.unit_hours[test] @ m))
+    return out
+
+@dataclass
+class BacktestResult:
+    predictions: pd.DataFrame  # origin, date, horizon, model, archetype, forecast, actual, error
+    report: pd.DataFrame       # REPORT_COLUMNS
+
+@dataclass
+class Backtester(BaseForecaster):
+    """Rolling-origin backtest of the HK man-hours forecast over a daily feature cube.
+
+    ``mode="rolling"`` trains on the last ``window`` days up to each origin, ``"expanding"`` on all
+    days up to it (origins start once ``window`` days are available in both modes). Origins advance
+    by ``step`` days; folds run in batches on ``workers`` processes (default: all cores).
+    """
+    mode: str = "rolling"
+    window: int = 90
+    horizon: int = 14
+    step: int = 1
+    models: Sequence[str] = MODELS
+    min_mult: float = 0.5
+    max_mult: float = 3.0
+    workers: Optional[int] = None
+    cube: Optional[DailyCube] = field(default=None, init=False, repr=False)
+
+    def __post_init__(self):
+        super().__post_init__()
+        if self.mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}")
+        unknown = set(self.models) - set(MODELS)
+        if unknown:
+            raise ValueError(f"Unknown models {sorted(unknown)}; available: {list(MODELS)}")
+        if min(self.window, self.horizon, self.step) < 1:
+            raise ValueError("window, horizon and step must be >= 1")
+
+    def origins(self, cube: DailyCube, start: Union[date, str, None] = None, end: Union[date, str, None] = None) -> List[int]:
+        have = np.flatnonzero(cube.valid)
+        if len(have) == 0:
+            raise ValueError("No overlapping dates.")
+        first = have[0] + self.window - 1
+        last = have[-1] - 1
+        if start is not None:
+            first = max(first, (pd.Timestamp(start).date() - cube.start).days)
+        if end is not None:
+            last = min(last, (pd.Timestamp(end).date() - cube.start).days)
+        return list(range(int(first), int(last) + 1, self.step))
+
+    @stage("backtest.run")
+    def run(self, enriched: pd.DataFrame, actuals: pd.DataFrame,
+            start: Union[date, str, None] = None, end: Union[date, str, None] = None) -> BacktestResult:
+        """Backtest origins between ``start`` and ``end`` (inclusive; default: every eligible day)."""
+        self.cube = cube = build_cube(enriched, actuals, self.config)
+        origins = self.origins(cube, start, end)
+        if not origins:
+            raise ValueError(f"No origins: need {self.window} days of actuals before the first one.")
+        options = {"mode": self.mode, "window": self.window, "horizon": self.horizon, "models": list(self.models),
+                   "min_mult": self.min_mult, "max_mult": self.max_mult}
+        workers = min(self.workers or os.cpu_count() or 1, len(origins))
+        if workers <= 1:
+            _init_worker(cube, options)
+            parts = _run_folds(origins)
+        else:
+            # a few batches per worker: folds take milliseconds, so one task each would be all overhead
+            batches = [origins[i::workers * 4] for i in range(workers * 4)]
+            parts = []
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(cube, options)) as pool:
+                for res in pool.map(_run_folds, [b for b in batches if b]):
+                    parts.extend(res)
+        predictions = self._predictions(cube, parts)
+        return BacktestResult(predictions, self.report(predictions))
+
+    def _predictions(self, cube: DailyCube, parts: List[Tuple[np.ndarray, ...]]) -> pd.DataFrame:
+        cols = ["origin", "date", "horizon", "model", "archetype", "forecast", "actual", "error"]
+        if not parts:
+            return pd.DataFrame(columns=cols)
+        origin, day, model, forecast = (np.concatenate(p) for p in zip(*parts))
+        actual = cube.actual[day]
+        start = pd.Timestamp(cube.start)
+        out = pd.DataFrame({
+            "origin": (start + pd.to_timedelta(origin, unit="D")).date,
+            "date": (start + pd.to_timedelta(day, unit="D")).date,
+            "horizon": (day - origin).astype(np.int64),
+            "model": np.asarray(self.models, dtype=object)[model],
+            "archetype": cube.dominant[day],
+            "forecast": forecast,
+            "actual": actual,
+            "error": forecast - actual,
+        })
+        return out.sort_values(["model", "origin", "date"], kind="stable").reset_index(drop=True)
+
+    @staticmethod
+    def report(predictions: pd.DataFrame) -> pd.DataFrame:
+        """MAE, MAPE (%, over days with non-zero actuals) and bias (forecast - actual) per model and
+        horizon, overall (archetype ``ALL``) and by the day's dominant archetype."""
+        if predictions.empty:
+            return pd.DataFrame(columns=REPORT_COLUMNS)
+        p = predictions.assign(abs_err=predictions["error"].abs())
+        p["ape"] = (p["abs_err"] / p["actual"].abs()).where(p["actual"] != 0) * 100.0
+
+        def agg(keys):
+            g = p.groupby(keys, sort=True)
+            return pd.DataFrame({"n": g.size(), "mae": g["abs_err"].mean(), "mape": g["ape"].mean(),
+                                 "bias": g["error"].mean()}).reset_index()
+
+        overall = agg(["model", "horizon"]).assign(archetype="ALL")
+        out = pd.concat([overall, agg(["model", "horizon", "archetype"])], ignore_index=True)
+        order = {m: i for i, m in enumerate(MODELS)}
+        out = out.sort_values(["model", "horizon", "archetype"], key=lambda s: s.map(order) if s.name == "model" else s,
+                              kind="stable")
+        return out[REPORT_COLUMNS].reset_index(drop=True)
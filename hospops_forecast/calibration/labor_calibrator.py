@@ -1,47 +1,63 @@
 from __future__ import annotations
+import copy
 from dataclasses import dataclass
 import numpy as np
 import pandas as pd
-from ..features import expand_reservations_daily
+from ..features import inhouse_by_day_and_archetype, checkouts_by_day_and_archetype
 from ..segmentation.archetypes import Archetype
 from ..models.base import BaseForecaster
+from ..profiling import stage
+
+RIDGE = 1e-3
 
 @dataclass
 class LaborCalibrator(BaseForecaster):
     def _daily_decomposition(self, enriched: pd.DataFrame) -> pd.DataFrame:
         df = self._ensure_dates(enriched)
-        daily = expand_reservations_daily(df)
-        dep = df.copy(); dep["date"] = dep["departure_date"].dt.date
-        checkouts = dep.groupby(["date","archetype"]).reservation_id.count().rename("checkouts").reset_index()
-        inhouse = daily.groupby(["date","archetype"]).reservation_id.nunique().rename("rooms").reset_index()
+        checkouts = checkouts_by_day_and_archetype(df)
+        inhouse = inhouse_by_day_and_archetype(df)[["date","archetype","rooms"]]
         base = inhouse.merge(checkouts, on=["date","archetype"], how="left").fillna({"checkouts":0})
         base["stayovers"] = (base["rooms"] - base["checkouts"]).clip(lower=0)
         return base
 
-    def fit_multipliers(self, enriched_reservations: pd.DataFrame, actuals: pd.DataFrame, min_mult: float = 0.5, max_mult: float = 3.0):
+    def _minutes(self):
         cfg = self.config.get("housekeeping", {})
-        min_checkout = float(cfg.get("minutes_per_checkout", 45))
-        min_stay = float(cfg.get("minutes_per_stayover", 20))
+        return float(cfg.get("minutes_per_checkout", 45)), float(cfg.get("minutes_per_stayover", 20))
 
-        base = self._daily_decomposition(enriched_reservations)
+    def _design(self, enriched: pd.DataFrame) -> pd.DataFrame:
+        # (date x archetype) unit-multiplier HK hours: the columns the multipliers scale
+        min_checkout, min_stay = self._minutes()
+        base = self._daily_decomposition(enriched)
         base["coeff"] = (base["checkouts"] * min_checkout + base["stayovers"] * min_stay) / 60.0
-        Xw = base.pivot_table(index="date", columns="archetype", values="coeff", aggfunc="sum").fillna(0.0)
-        y = actuals.copy(); y["date"] = pd.to_datetime(y["date"]).dt.date
-        y = y.groupby("date").hk_man_hours.sum()
-        X, y_vec = Xw.align(y, join="inner")
-        if len(X) == 0: raise ValueError("No overlapping dates.")
+        return base.pivot_table(index="date", columns="archetype", values="coeff", aggfunc="sum").fillna(0.0)
 
-        A = X.to_numpy(); b = y_vec.to_numpy()
-        lam = 1e-3
-        ATA = A.T @ A + lam * np.eye(A.shape[1]); ATb = A.T @ b
-        m = np.linalg.solve(ATA, ATb)
-        m = np.clip(m, min_mult, max_mult)
+    @staticmethod
+    def _daily_actuals(actuals: pd.DataFrame) -> pd.Series:
+        y = actuals.copy(); y["date"] = pd.to_datetime(y["date"]).dt.date
+        return y.groupby("date").hk_man_hours.sum()
 
-        out = self.config.copy()
-        mults = {col: float(val) for col, val in zip(X.columns.tolist(), m)}
+    def _tuned(self, mults: dict) -> dict:
+        # a copy of the config with `mults` applied; archetypes without data keep their configured value
+        out = copy.deepcopy(self.config or {})
+        cfg = out.get("housekeeping", {})
+        mults = dict(mults)
         for a in [a.value for a in Archetype]:
             mults.setdefault(a, float(cfg.get("archetype_multipliers", {}).get(a, 1.0)))
         out.setdefault("housekeeping", {})
         out["housekeeping"].setdefault("archetype_multipliers", {})
         out["housekeeping"]["archetype_multipliers"].update(mults)
         return out
+
+    @stage("calibrate.labor")
+    def fit_multipliers(self, enriched_reservations: pd.DataFrame, actuals: pd.DataFrame, min_mult: float = 0.5, max_mult: float = 3.0):
+        Xw = self._design(enriched_reservations)
+        y = self._daily_actuals(actuals)
+        X, y_vec = Xw.align(y, join="inner", axis=0)
+        if len(X) == 0: raise ValueError("No overlapping dates.")
+
+        A = X.to_numpy(); b = y_vec.to_numpy()
+        lam = RIDGE
+        ATA = A.T @ A + lam * np.eye(A.shape[1]); ATb = A.T @ b
+        m = np.linalg.solve(ATA, ATb)
+        m = np.clip(m, min_mult, max_mult)
+        return self._tuned({col: float(val) for col, val in zip(X.columns.tolist(), m)})
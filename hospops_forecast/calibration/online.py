@@ -0,0 +1,149 @@
+from __future__ import annotations
+import json
+from dataclasses import dataclass, field
+from datetime import date
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+import numpy as np
+import pandas as pd
+from ..features import ensure_datetime
+from ..models.base import BaseForecaster
+from ..profiling import stage
+from ..segmentation.archetypes import Archetype
+from .labor_calibrator import RIDGE, LaborCalibrator
+
+STATE_VERSION = 1
+
+@dataclass
+class OnlineLaborCalibrator(BaseForecaster):
+    """Recursive least squares for the HK archetype multipliers of one property.
+
+    Keeps AᵀA, Aᵀb and the folded dates, where A holds the unit-multiplier HK hours per
+    (day, archetype) and b the actual man-hours. ``update`` folds in new days from only the stays
+    that touch them, so a nightly update costs O(stays on those days + archetypes²) regardless of
+    history. With ``forgetting=1`` the multipliers equal ``LaborCalibrator.fit_multipliers`` on the
+    same days; ``forgetting < 1`` discounts each older day by that factor per newer day (days must
+    then arrive in date order).
+    """
+    forgetting: float = 1.0
+    ridge: float = RIDGE
+    archetypes: List[str] = field(default_factory=lambda: [a.value for a in Archetype], init=False)
+    ata: np.ndarray = field(init=False, repr=False)  # zeros, set in __post_init__
+    atb: np.ndarray = field(init=False, repr=False)
+    seen: np.ndarray = field(init=False, repr=False)  # folded days each archetype had a column in
+    dates: List[date] = field(default_factory=list, init=False, repr=False)
+
+    def __post_init__(self):
+        super().__post_init__()
+        if not 0.0 < self.forgetting <= 1.0:
+            raise ValueError("forgetting must be in (0, 1]")
+        k = len(self.archetypes)
+        self.ata, self.atb, self.seen = np.zeros((k, k)), np.zeros(k), np.zeros(k, dtype=np.int64)
+        self._calibrator = LaborCalibrator(self.config)
+        self._minutes = self._calibrator._minutes()
+
+    @property
+    def n_days(self) -> int:
+        return len(self.dates)
+
+    def _index(self, labels) -> np.ndarray:
+        for a in labels:
+            if a not in self.archetypes:  # grow the statistics for a label outside the Archetype enum
+                self.archetypes.append(a)
+                self.ata = np.pad(self.ata, ((0, 1), (0, 1)))
+                self.atb = np.pad(self.atb, (0, 1))
+                self.seen = np.pad(self.seen, (0, 1))
+        pos = {a: i for i, a in enumerate(self.archetypes)}
+        return np.array([pos[a] for a in labels], dtype=np.int64)
+
+    @stage("calibrate.labor_online")
+    def update(self, enriched_reservations: pd.DataFrame, actuals: pd.DataFrame, skip_seen: bool = False) -> "OnlineLaborCalibrator":
+        """Fold in the days of ``actuals`` (date, hk_man_hours).
+
+        ``enriched_reservations`` may be the whole book; only stays overlapping the new days are
+        decomposed. Days already folded raise unless ``skip_seen``, which drops them (e.g. when
+        re-sending a cumulative actuals file).
+        """
+        y = self._calibrator._daily_actuals(actuals)
+        folded = set(self.dates)
+        repeat = [d for d in y.index if d in folded]
+        if repeat and not skip_seen:
+            raise ValueError(f"{len(repeat)} day(s) already folded in, first {repeat[0]}; pass skip_seen=True to drop them")
+        y = y.drop(index=repeat).sort_index()
+        if y.empty:
+            return self
+        if self.forgetting < 1.0 and self.dates and y.index[0] <= max(self.dates):
+            raise ValueError(f"With forgetting < 1 days must arrive in order; {y.index[0]} is not after {max(self.dates)}")
+
+        en = enriched_reservations
+        lo, hi = pd.Timestamp(y.index[0]), pd.Timestamp(y.index[-1])
+        window = en[(ensure_datetime(en["arrival_date"]) <= hi) & (ensure_datetime(en["departure_date"]) >= lo)]
+        X, y_vec = self._calibrator._design(window).align(y, join="inner", axis=0)
+        if len(X) == 0:
+            return self
+        cols = self._index([str(c) for c in X.columns])
+        A = np.zeros((len(X), len(self.archetypes)))
+        A[:, cols] = X.to_numpy()
+        b = y_vec.to_numpy(dtype=float)
+        # each older day loses one factor of `forgetting` per newer day
+        w = self.forgetting ** np.arange(len(A) - 1, -1, -1, dtype=float)
+        decay = self.forgetting ** len(A)
+        self.ata = decay * self.ata + (A * w[:, None]).T @ A
+        self.atb = decay * self.atb + (A * w[:, None]).T @ b
+        self.seen[cols] += len(A)
+        self.dates.extend(X.index.tolist())
+        return self
+
+    def multipliers(self, min_mult: float = 0.5, max_mult: float = 3.0) -> Dict[str, float]:
+        """Clipped ridge solution for the archetypes seen so far."""
+        idx = np.flatnonzero(self.seen > 0)
+        if len(idx) == 0:
+            raise ValueError("No overlapping dates.")
+        m = np.linalg.solve(self.ata[np.ix_(idx, idx)] + self.ridge * np.eye(len(idx)), self.atb[idx])
+        m = np.clip(m, min_mult, max_mult)
+        return {self.archetypes[i]: float(v) for i, v in zip(idx, m)}
+
+    def tuned_config(self, min_mult: float = 0.5, max_mult: float = 3.0) -> dict:
+        """Config with the current multipliers, shaped like ``LaborCalibrator.fit_multipliers`` output."""
+        return self._calibrator._tuned(self.multipliers(min_mult, max_mult))
+
+    # ---- persistence ---------------------------------------------------------------------------
+    def state(self) -> dict:
+        # floats go through repr, so a save/load round trip is exact
+        return {
+            "version": STATE_VERSION,
+            "forgetting": self.forgetting,
+            "ridge": self.ridge,
+            "minutes": list(self._minutes),
+            "archetypes": list(self.archetypes),
+            "ata": self.ata.tolist(),
+            "atb": self.atb.tolist(),
+            "seen": self.seen.tolist(),
+            "dates": [d.isoformat() for d in self.dates],
+        }
+
+    def save(self, path: Union[str, Path]) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(json.dumps(self.state()), encoding="utf-8")
+        tmp.replace(path)  # a crash mid-write leaves the previous state intact
+        return path
+
+    @classmethod
+    def from_state(cls, state: dict, config: Optional[dict] = None) -> "OnlineLaborCalibrator":
+        if state.get("version") != STATE_VERSION:
+            raise ValueError(f"Calibration state version {state.get('version')}, expected {STATE_VERSION}")
+        cal = cls(config, forgetting=float(state["forgetting"]), ridge=float(state["ridge"]))
+        if list(cal._minutes) != [float(v) for v in state["minutes"]]:
+            raise ValueError(f"State was built with HK minutes {state['minutes']}, config has {list(cal._minutes)}")
+        cal.archetypes = list(state["archetypes"])
+        cal.ata = np.asarray(state["ata"], dtype=float).reshape(len(cal.archetypes), len(cal.archetypes))
+        cal.atb = np.asarray(state["atb"], dtype=float)
+        cal.seen = np.asarray(state["seen"], dtype=np.int64)
+        cal.dates = [date.fromisoformat(d) for d in state["dates"]]
+        return cal
+
+    @classmethod
+    def load(cls, path: Union[str, Path], config: Optional[dict] = None) -> "OnlineLaborCalibrator":
+        return cls.from_state(json.loads(Path(path).read_text(encoding="utf-8")), config)
@@ -1,102 +1,374 @@
 from __future__ import annotations
 from pathlib import Path
-from typing import Optional
-import pandas as pd
-import typer, yaml
+from typing import TYPE_CHECKING, Optional, cast
+import typer
 from rich import print
-from .segmentation.segmenter import Segmenter
-from .models.labor import LaborForecaster
-from .models.fnb import FNBConsumptionForecaster
-from .models.service import ServiceLoadForecaster
-from .models.departments import DepartmentForecaster
-from .models.airline import AirlineForecaster
-from .models.learning import HKLearner
-from .calibration.labor_calibrator import LaborCalibrator
-from .dq.validators import check_reservations_basic
-from .config.loader import load_config
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Commands import what they use: pandas, sklearn, pydantic and pyarrow together take seconds to
+# load, and `--help`, `dq` or a typo shouldn't pay for a forecaster they never run.
 
 app = typer.Typer(add_completion=False, help="HospOps-Forecast CLI")
 
+@app.callback()
+def main(
+    ctx: typer.Context,
+    profile: bool = typer.Option(False, "--profile", help="Print time, rows and peak memory per stage to stderr"),
+    profile_json: Optional[Path] = typer.Option(None, "--profile-json", help="Write the stage profile as JSON"),
+    profile_memory: bool = typer.Option(True, "--profile-memory/--no-profile-memory", help="Trace allocations while profiling (slower)"),
+):
+    if not (profile or profile_json):
+        return
+    from .profiling import Profile
+    prof = Profile(memory=profile_memory).__enter__()
+
+    def report():
+        prof.__exit__(None, None, None)
+        if profile:
+            typer.echo(prof.format_table(), err=True)
+        if profile_json is not None:
+            prof.write_json(profile_json)
+    ctx.call_on_close(report)
+
 def _load_config(path: Optional[Path]) -> dict:
+    from .config.loader import load_config
     return load_config(path)
 
-@app.command()
-def segment(input: Path = typer.Option(..., "--input"), output: Path = typer.Option(..., "--output"), use_unsupervised: bool = False):
-    df = pd.read_csv(input)
-    seg = Segmenter(use_unsupervised=use_unsupervised)
-    enriched = seg.enrich(df)
+def _write_yaml(data: dict, output: Path) -> None:
+    import yaml
     output.parent.mkdir(parents=True, exist_ok=True)
-    enriched.to_csv(output, index=False)
+    with open(output, "w", encoding="utf-8") as f:
+        yaml.safe_dump(data, f, sort_keys=False, allow_unicode=True)
+
+@app.command()
+def segment(
+    input: Path = typer.Option(..., "--input"),
+    output: Path = typer.Option(..., "--output"),
+    use_unsupervised: bool = False,
+    chunk_rows: Optional[int] = typer.Option(None, "--chunk-rows", help="Stream the input in chunks of this many rows"),
+    max_memory: Optional[str] = typer.Option(None, "--max-memory", help="Stream with chunks sized to this budget, e.g. 512MB"),
+    partition_by_month: bool = typer.Option(False, "--partition-by-month", help="Parquet dataset with one directory per arrival month"),
+    model: Optional[Path] = typer.Option(None, "--model", help="Apply a saved segment model (no refitting)"),
+    fit_model: Optional[Path] = typer.Option(None, "--fit-model", help="Fit a segment model on the input, save it here and apply it"),
+    minibatch: bool = typer.Option(False, "--minibatch", help="--fit-model with MiniBatchKMeans (chunked inputs always fit in mini-batches)"),
+    batch_size: int = typer.Option(1024, "--batch-size"),
+    n_clusters: int = typer.Option(4, "--n-clusters"),
+):
+    from .segmentation.model import SegmentModel
+    from .segmentation.segmenter import Segmenter
+    from .segmentation.streaming import fit_segment_model_chunked, segment_csv_chunked
+    from .io import read_table, write_enriched
+    if model is not None and fit_model is not None:
+        raise typer.BadParameter("Pass either --model or --fit-model")
+    chunked = chunk_rows is not None or max_memory is not None
+    seg = Segmenter(use_unsupervised=use_unsupervised, n_clusters=n_clusters, batch_size=batch_size,
+                    algorithm="minibatch" if minibatch or chunked else "kmeans",
+                    model=SegmentModel.load(model) if model is not None else None)
+    if chunked:
+        if use_unsupervised and seg.model is None and fit_model is None:
+            raise typer.BadParameter("--chunk-rows/--max-memory need --model or --fit-model for clustering")
+        try:
+            if fit_model is not None:
+                fit_segment_model_chunked(input, chunk_rows=chunk_rows, max_memory=max_memory, segmenter=seg).save(fit_model)
+                print(f"[bold green]Saved segment model ->[/] {fit_model}")
+            n = segment_csv_chunked(input, output, chunk_rows=chunk_rows, max_memory=max_memory, segmenter=seg,
+                                    partition_by_month=partition_by_month)
+        except ValueError as e:
+            raise typer.BadParameter(str(e))
+        print(f"[bold green]Wrote enriched ({n} rows, chunked) ->[/] {output}")
+        return
+    df = read_table(input)
+    if fit_model is not None:
+        try:
+            cast(SegmentModel, seg.fit(df).model).save(fit_model)  # fit raises rather than leave it unset
+        except ValueError as e:
+            raise typer.BadParameter(str(e))
+        print(f"[bold green]Saved segment model ->[/] {fit_model}")
+    enriched = seg.transform(df) if seg.model is not None else seg.enrich(df)
+    try:
+        write_enriched(enriched, output, partition_by_month=partition_by_month)
+    except ValueError as e:
+        raise typer.BadParameter(str(e))
     print(f"[bold green]Wrote enriched ->[/] {output}")
 
 @app.command()
 def forecast(
-    sub: str = typer.Argument(..., help="'labor' | 'fnb' | 'service' | 'dept' | 'airline'"),
-    enriched: Optional[Path] = typer.Option(None, "--enriched", help="Enriched CSV for hotel domains"),
-    output: Path = typer.Option(..., "--output"),
+    sub: str = typer.Argument(..., help="'labor' | 'fnb' | 'service' | 'dept' | 'airline' | 'all'"),
+    enriched: Optional[Path] = typer.Option(None, "--enriched", help="Enriched CSV/Parquet/Feather for hotel domains"),
+    output: Optional[Path] = typer.Option(None, "--output"),
+    output_dir: Optional[Path] = typer.Option(None, "--output-dir", help="all: directory for one file per forecast"),
+    output_format: str = typer.Option("csv", "--format", help="all: csv|parquet|feather"),
     config: Optional[Path] = typer.Option(None, "--config"),
-    area: Optional[str] = typer.Option(None, "--area", help="service: reception|breakfast; airline: gate|boarding|lounge"),
-    meal: Optional[str] = typer.Option("breakfast", "--meal", help="fnb: breakfast|lunch|dinner"),
-    dept: Optional[str] = typer.Option(None, "--dept", help="dept: spa|concierge|valet|engineering"),
+    area: Optional[str] = typer.Option(None, "--area", help="service: reception|breakfast; airline: gate|boarding|lounge|all"),
+    meal: Optional[str] = typer.Option("breakfast", "--meal", help="fnb: breakfast|lunch|dinner|all"),
+    dept: Optional[str] = typer.Option(None, "--dept", help="dept: spa|concierge|valet|engineering|all"),
     flights: Optional[Path] = typer.Option(None, "--flights", help="Airline flights CSV"),
     utilization: float = 0.85,
     target_wait_min: Optional[float] = typer.Option(None, "--target-wait-min", help="SLA target wait (minutes)"),
+    cache_tables: bool = typer.Option(False, "--cache-tables", help="Persist staffing lookup tables next to --config"),
+    start: Optional[str] = typer.Option(None, "--start", help="First forecast date; only stays overlapping the window are read"),
+    end: Optional[str] = typer.Option(None, "--end", help="Last forecast date"),
 ):
-    cfg = _load_config(config)
+    from .config.compiled import load_compiled
+    from .features import FORECAST_COLUMNS
+    from .io import clip_dates, read_enriched, read_table, write_table
+    from .models.staffing import set_table_cache_dir, table_cache_dir_for
+    cfg = load_compiled(config)
+    if cache_tables:
+        if config is None: raise typer.BadParameter("--cache-tables requires --config")
+        set_table_cache_dir(table_cache_dir_for(config))
+    if sub == "all":
+        if enriched is None or output_dir is None: raise typer.BadParameter("--enriched and --output-dir required")
+        df = read_enriched(enriched, columns=FORECAST_COLUMNS, start=start, end=end)
+        from .pipeline import ForecastPipeline
+        fl = read_table(flights) if flights is not None else None
+        outputs = ForecastPipeline.from_compiled(cfg, utilization=utilization, target_wait_min=target_wait_min).run(df, flights=fl)
+        outputs = {name: clip_dates(out, start, end) for name, out in outputs.items()}
+        for p in ForecastPipeline.write(outputs, output_dir, fmt=output_format):
+            print(f"[bold green]Wrote forecast ->[/] {p}")
+        return
+    if output is None: raise typer.BadParameter("--output required")
+
+    def reservations() -> pd.DataFrame:
+        if enriched is None: raise typer.BadParameter("--enriched required")
+        return read_enriched(enriched, columns=FORECAST_COLUMNS, start=start, end=end)
+
     if sub == "labor":
-        df = pd.read_csv(enriched, parse_dates=["arrival_date","departure_date"])
-        out = LaborForecaster(cfg).predict(df, utilization=utilization)
+        from .models.labor import LaborForecaster
+        df = reservations()
+        out = LaborForecaster.from_compiled(cfg).predict(df, utilization=utilization)
     elif sub == "fnb":
-        df = pd.read_csv(enriched, parse_dates=["arrival_date","departure_date"])
-        out = FNBConsumptionForecaster(cfg).predict(df, meal=meal)
+        from .models.fnb import FNBConsumptionForecaster
+        df = reservations()
+        fnb = FNBConsumptionForecaster.from_compiled(cfg)
+        out = fnb.predict_all(df) if meal == "all" else fnb.predict(df, meal=meal)
     elif sub == "service":
         if area is None: raise typer.BadParameter("--area reception|breakfast required")
-        df = pd.read_csv(enriched, parse_dates=["arrival_date","departure_date"])
-        out = ServiceLoadForecaster(cfg).predict(df, area=area, utilization=utilization, target_wait_min=target_wait_min)
+        from .models.service import ServiceLoadForecaster
+        df = reservations()
+        out = ServiceLoadForecaster.from_compiled(cfg).predict(df, area=area, utilization=utilization, target_wait_min=target_wait_min)
     elif sub == "dept":
         if dept is None: raise typer.BadParameter("--dept required")
-        df = pd.read_csv(enriched, parse_dates=["arrival_date","departure_date"])
-        out = DepartmentForecaster(cfg).predict(df, dept=dept)
+        from .models.departments import DepartmentForecaster
+        df = reservations()
+        dfc = DepartmentForecaster.from_compiled(cfg)
+        out = dfc.predict_all(df) if dept == "all" else dfc.predict(df, dept=dept)
     elif sub == "airline":
         if flights is None: raise typer.BadParameter("--flights CSV required")
-        df = pd.read_csv(flights)
-        out = AirlineForecaster(cfg).predict(df, area=area or "boarding")
+        from .models.airline import AirlineForecaster
+        df = read_table(flights)
+        af = AirlineForecaster.from_compiled(cfg)
+        out = af.predict_all(df) if area == "all" else af.predict(df, area=area or "boarding")
     else:
         raise typer.BadParameter("Unknown subcommand.")
-    output.parent.mkdir(parents=True, exist_ok=True)
-    out.to_csv(output, index=False)
+    write_table(clip_dates(out, start, end), output)
     print(f"[bold green]Wrote forecast ->[/] {output}")
 
 @app.command()
-def calibrate(sub: str = typer.Argument(..., help="'labor'"), enriched: Path = typer.Option(..., "--enriched"), actual: Path = typer.Option(..., "--actual"), output: Path = typer.Option(..., "--output"), config: Optional[Path] = None, min_mult: float = 0.5, max_mult: float = 3.0):
+def scenarios(
+    enriched: Path = typer.Option(..., "--enriched"),
+    spec: Path = typer.Option(..., "--spec", help="YAML/JSON with a 'grid' of override values and/or a 'scenarios' list"),
+    output_dir: Path = typer.Option(..., "--output-dir", help="One file per output, each with a leading scenario column"),
+    outputs: str = typer.Option("labor,fnb,service_reception,service_breakfast", "--outputs"),
+    output_format: str = typer.Option("csv", "--format", help="csv|parquet|feather"),
+    config: Optional[Path] = typer.Option(None, "--config"),
+    utilization: float = typer.Option(0.85, "--utilization", help="Default for scenarios that do not set it"),
+    target_wait_min: Optional[float] = typer.Option(None, "--target-wait-min", help="Default SLA target wait (minutes)"),
+    start: Optional[str] = typer.Option(None, "--start"),
+    end: Optional[str] = typer.Option(None, "--end"),
+):
+    from .config.compiled import load_compiled
+    from .features import FORECAST_COLUMNS
+    from .io import clip_dates, read_enriched
+    from .pipeline import ForecastPipeline
+    from .scenarios import ScenarioEngine, load_scenarios
+    try:
+        items = load_scenarios(spec)
+        df = read_enriched(enriched, columns=FORECAST_COLUMNS, start=start, end=end)
+        out = ScenarioEngine.from_compiled(load_compiled(config), utilization=utilization, target_wait_min=target_wait_min).evaluate(
+            df, items, outputs=[o for o in outputs.split(",") if o])
+    except ValueError as e:
+        raise typer.BadParameter(str(e))
+    out = {name: frame if name == "scenarios" else clip_dates(frame, start, end) for name, frame in out.items()}
+    ForecastPipeline.write(out, output_dir, fmt=output_format)
+    print(f"[bold green]Evaluated {len(items)} scenarios ->[/] {output_dir}")
+
+@app.command()
+def simulate(
+    enriched: Path = typer.Option(..., "--enriched"),
+    output_dir: Path = typer.Option(..., "--output-dir", help="labor, service_reception, service_breakfast quantile files"),
+    draws: int = typer.Option(10_000, "--draws"),
+    chunk_size: int = typer.Option(500, "--chunk-size", help="Draws simulated together; bounds memory"),
+    seed: int = typer.Option(0, "--seed"),
+    quantiles: str = typer.Option("0.5,0.9,0.95", "--quantiles"),
+    areas: str = typer.Option("reception,breakfast", "--areas"),
+    output_format: str = typer.Option("csv", "--format", help="csv|parquet|feather"),
+    config: Optional[Path] = typer.Option(None, "--config", help="Rates from its 'simulation' section"),
+    utilization: float = 0.85,
+    target_wait_min: Optional[float] = typer.Option(None, "--target-wait-min", help="SLA target wait (minutes)"),
+    start: Optional[str] = typer.Option(None, "--start"),
+    end: Optional[str] = typer.Option(None, "--end"),
+):
+    from .config.compiled import load_compiled
+    from .features import FORECAST_COLUMNS
+    from .io import clip_dates, read_enriched
+    from .pipeline import ForecastPipeline
+    from .simulation import MonteCarloForecaster
+    try:
+        mc = MonteCarloForecaster.from_compiled(load_compiled(config), draws=draws, chunk_size=chunk_size, seed=seed,
+                                  quantiles=[float(q) for q in quantiles.split(",") if q],
+                                  utilization=utilization, target_wait_min=target_wait_min,
+                                  areas=[a for a in areas.split(",") if a])
+        out = mc.simulate(read_enriched(enriched, columns=FORECAST_COLUMNS, start=start, end=end))
+    except ValueError as e:
+        raise typer.BadParameter(str(e))
+    out = {name: clip_dates(frame, start, end) for name, frame in out.items()}
+    ForecastPipeline.write(out, output_dir, fmt=output_format)
+    print(f"[bold green]Simulated {draws} draws ->[/] {output_dir}")
+
+@app.command()
+def portfolio(
+    sub: str = typer.Argument(..., help="'run'"),
+    input: Path = typer.Option(..., "--input", help="Directory of per-property reservation files, or a CSV/YAML manifest"),
+    output_dir: Path = typer.Option(..., "--output-dir"),
+    config: Optional[Path] = typer.Option(None, "--config", help="Portfolio base config; per-property YAML overrides merge onto it"),
+    workers: Optional[int] = typer.Option(None, "--workers", help="Worker processes (default: CPU count)"),
+    output_format: str = typer.Option("csv", "--format", help="csv|parquet|feather"),
+    utilization: float = 0.85,
+    target_wait_min: Optional[float] = typer.Option(None, "--target-wait-min", help="SLA target wait (minutes)"),
+):
+    if sub != "run":
+        raise typer.BadParameter("Only 'run' is supported.")
+    from .portfolio import PortfolioRunner, discover
+    jobs = discover(input)
+    if not jobs:
+        raise typer.BadParameter(f"No property files found in {input}")
+    runner = PortfolioRunner(_load_config(config), workers=workers, utilization=utilization,
+                             target_wait_min=target_wait_min, fmt=output_format)
+    summary = runner.run(jobs, output_dir)
+    failed = summary[summary["status"] != "ok"]
+    for _, r in failed.iterrows():
+        print(f"[bold red]{r['property_id']} failed:[/] {r['error']}")
+    print(f"[bold green]Portfolio: {len(summary) - len(failed)}/{len(summary)} properties ->[/] {output_dir}")
+    if len(failed):
+        raise typer.Exit(code=1)
+
+@app.command()
+def calibrate(
+    sub: str = typer.Argument(..., help="'labor'"),
+    enriched: Path = typer.Option(..., "--enriched"),
+    actual: Path = typer.Option(..., "--actual"),
+    output: Path = typer.Option(..., "--output"),
+    config: Optional[Path] = None,
+    min_mult: float = 0.5,
+    max_mult: float = 3.0,
+    state: Optional[Path] = typer.Option(None, "--state", help="Online mode: per-property statistics file; only days not yet in it are folded in"),
+    forgetting: float = typer.Option(1.0, "--forgetting", help="Online mode: per-day discount of older days (new state only)"),
+):
     if sub != "labor":
         raise typer.BadParameter("Only 'labor' is supported.")
+    from .io import read_enriched, read_table
     base_cfg = _load_config(config)
-    en = pd.read_csv(enriched, parse_dates=["arrival_date","departure_date"])
-    ac = pd.read_csv(actual, parse_dates=["date"])
-    tuned = LaborCalibrator(base_cfg).fit_multipliers(en, ac, min_mult=min_mult, max_mult=max_mult)
-    output.parent.mkdir(parents=True, exist_ok=True)
-    with open(output, "w", encoding="utf-8") as f:
-        yaml.safe_dump(tuned, f, sort_keys=False, allow_unicode=True)
+    en = read_enriched(enriched)
+    ac = read_table(actual, parse_dates=["date"])
+    if state is not None:
+        from .calibration.online import OnlineLaborCalibrator
+        try:
+            cal = OnlineLaborCalibrator.load(state, base_cfg) if state.exists() else OnlineLaborCalibrator(base_cfg, forgetting=forgetting)
+            before = cal.n_days
+            cal.update(en, ac, skip_seen=True)
+            tuned = cal.tuned_config(min_mult=min_mult, max_mult=max_mult)
+        except ValueError as e:
+            raise typer.BadParameter(str(e))
+        cal.save(state)
+        print(f"[bold green]Folded {cal.n_days - before} new day(s), {cal.n_days} total ->[/] {state}")
+    else:
+        from .calibration.labor_calibrator import LaborCalibrator
+        tuned = LaborCalibrator(base_cfg).fit_multipliers(en, ac, min_mult=min_mult, max_mult=max_mult)
+    _write_yaml(tuned, output)
     print(f"[bold green]Wrote tuned config ->[/] {output}")
 
+@app.command()
+def backtest(
+    sub: str = typer.Argument(..., help="'hk'"),
+    enriched: Path = typer.Option(..., "--enriched"),
+    actual: Path = typer.Option(..., "--actual"),
+    output: Path = typer.Option(..., "--output", help="Report: MAE/MAPE/bias per model, horizon and archetype"),
+    predictions: Optional[Path] = typer.Option(None, "--predictions", help="Also write every fold's daily forecasts"),
+    config: Optional[Path] = None,
+    mode: str = typer.Option("rolling", "--mode", help="'rolling' | 'expanding' training window"),
+    window: int = typer.Option(90, "--window", help="Training days (rolling) or minimum training days (expanding)"),
+    horizon: int = typer.Option(14, "--horizon"),
+    step: int = typer.Option(1, "--step", help="Days between origins"),
+    start: Optional[str] = typer.Option(None, "--start", help="First origin date"),
+    end: Optional[str] = typer.Option(None, "--end", help="Last origin date"),
+    models: str = typer.Option("baseline,calibrated,learned", "--models"),
+    workers: Optional[int] = typer.Option(None, "--workers", help="Processes (default: CPU count)"),
+):
+    if sub != "hk":
+        raise typer.BadParameter("Only 'hk' backtest implemented.")
+    from .backtest import Backtester
+    from .io import read_enriched, read_table, write_table
+    try:
+        bt = Backtester(_load_config(config), mode=mode, window=window, horizon=horizon, step=step,
+                        models=[m for m in models.split(",") if m], workers=workers)
+        result = bt.run(read_enriched(enriched), read_table(actual, parse_dates=["date"]), start=start, end=end)
+    except ValueError as e:
+        raise typer.BadParameter(str(e))
+    write_table(result.report, output)
+    if predictions is not None:
+        write_table(result.predictions, predictions)
+    folds = result.predictions[["origin"]].drop_duplicates().shape[0]
+    print(f"[bold green]Backtested {folds} origins x {len(bt.models)} models ->[/] {output}")
+
 @app.command()
 def learn(sub: str = typer.Argument(..., help="'hk'"), enriched: Path = typer.Option(..., "--enriched"), actual: Path = typer.Option(..., "--actual"), output: Path = typer.Option(..., "--output")):
     if sub != "hk":
         raise typer.BadParameter("Only 'hk' learner implemented.")
-    en = pd.read_csv(enriched, parse_dates=["arrival_date","departure_date"])
-    ac = pd.read_csv(actual, parse_dates=["date"])
+    from .models.learning import HKLearner
+    from .io import read_enriched, read_table
+    en = read_enriched(enriched)
+    ac = read_table(actual, parse_dates=["date"])
     tuned = HKLearner().fit(en, ac)
-    output.parent.mkdir(parents=True, exist_ok=True)
-    with open(output, "w", encoding="utf-8") as f:
-        yaml.safe_dump(tuned, f, sort_keys=False, allow_unicode=True)
+    _write_yaml(tuned, output)
     print(f"[bold green]Wrote learned config ->[/] {output}")
 
+@app.command()
+def synth(
+    sub: str = typer.Argument(..., help="'reservations' | 'flights' | 'hk'"),
+    output: Path = typer.Option(..., "--output"),
+    rows: int = typer.Option(1000, "--rows", help="reservations/flights: rows to generate"),
+    seed: int = typer.Option(0, "--seed"),
+    start: str = typer.Option("2025-01-01", "--start"),
+    days: int = typer.Option(365, "--days", help="Arrival/flight dates spread over this many days"),
+    cancel_rate: float = typer.Option(0.08, "--cancel-rate"),
+    enriched: Optional[Path] = typer.Option(None, "--enriched", help="hk: enriched reservations to derive actuals from"),
+    noise: float = typer.Option(0.05, "--noise", help="hk: lognormal sigma on daily man-hours"),
+):
+    from . import synth as gen
+    from .io import read_enriched, write_table
+    if sub == "reservations":
+        n = gen.write_reservations(output, rows, seed, start=start, days=days, cancel_rate=cancel_rate)
+    elif sub == "flights":
+        out = gen.generate_flights(rows, seed, start=start, days=days)
+        write_table(out, output); n = len(out)
+    elif sub == "hk":
+        if enriched is None: raise typer.BadParameter("--enriched required")
+        out = gen.generate_hk_actuals(read_enriched(enriched), seed, noise=noise)
+        write_table(out, output); n = len(out)
+    else:
+        raise typer.BadParameter("Unknown subcommand.")
+    print(f"[bold green]Wrote {n} synthetic {sub} rows ->[/] {output}")
+
 @app.command()
 def dq(sub: str = typer.Argument(..., help="'check'"), input: Path = typer.Option(..., "--input")):
     if sub != "check":
         raise typer.BadParameter("Only 'check' supported for now.")
-    df = pd.read_csv(input)
+    from .dq.validators import check_reservations_basic
+    from .io import read_table
+    df = read_table(input)
     res = check_reservations_basic(df)
     print(res)
 
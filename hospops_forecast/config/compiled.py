@@ -0,0 +1,168 @@
+from __future__ import annotations
+import copy, hashlib, json, os
+from collections import OrderedDict
+from functools import cached_property
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+import numpy as np
+from ..segmentation.archetypes import Archetype
+
+ARCHETYPES: Tuple[str, ...] = tuple(a.value for a in Archetype)
+Labels = Union[Sequence[str], np.ndarray]  # archetype labels, often straight from pd.factorize
+COMPILED_CACHE_SIZE = 32
+
+def fingerprint(cfg: Dict[str, Any]) -> str:
+    return hashlib.sha256(json.dumps(cfg, sort_keys=True, default=str).encode()).hexdigest()
+
+class CompiledConfig:
+    """A config dict plus its numeric arrays, built once per fingerprint and shared by forecasters.
+
+    Arrays have one row per archetype in ``self.archetypes`` (``Archetype`` order, then any extra
+    labels the config names). Sections compile on first use, so partial configs work; forecasters
+    fetch rows for the labels in their data through the ``*_for`` methods, which apply the same
+    defaults the dict lookups did for labels the config does not know. ``raw`` is shared: treat it
+    as read-only.
+    """
+
+    def __init__(self, raw: Dict[str, Any], fp: Optional[str] = None):
+        self.raw = raw
+        self.fingerprint = fp or fingerprint(raw)
+        extra = set()
+        for meal in raw.get("fnb_meals", {}).values():
+            extra.update(meal.get("multipliers", {}))
+        for area in raw.get("service_load", {}).values():
+            extra.update(area.get("distributions", {}) if isinstance(area, dict) else {})
+        for dept in raw.get("departments", {}).values():
+            for v in dept.values():
+                if isinstance(v, dict): extra.update(v)
+        extra.update(raw.get("housekeeping", {}).get("archetype_multipliers", {}) or {})
+        self.archetypes: Tuple[str, ...] = ARCHETYPES + tuple(sorted(extra - set(ARCHETYPES)))
+        self._index = {a: i for i, a in enumerate(self.archetypes)}
+
+    def __repr__(self) -> str:
+        return f"CompiledConfig({self.fingerprint[:12]})"
+
+    def _rows(self, labels: Labels) -> Tuple[np.ndarray, np.ndarray]:
+        # row per label (0 for unknown labels) and a mask of the known ones
+        idx = np.array([self._index.get(str(a), -1) for a in labels], dtype=np.int64)
+        return np.maximum(idx, 0), idx >= 0
+
+    # ---- housekeeping --------------------------------------------------------------------------
+    @cached_property
+    def housekeeping(self) -> Dict[str, Any]:
+        cfg = self.raw.get("housekeeping", {})
+        mults = cfg.get("archetype_multipliers", {}) or {}
+        return {
+            "minutes_per_checkout": float(cfg.get("minutes_per_checkout", 45)),
+            "minutes_per_stayover": float(cfg.get("minutes_per_stayover", 20)),
+            "target_utilization": float(cfg.get("target_utilization", 0.85)),
+            "multipliers": np.array([float(mults.get(a, 1.0)) for a in self.archetypes]),
+        }
+
+    def hk_multipliers_for(self, labels: Labels) -> np.ndarray:
+        rows, known = self._rows(labels)
+        return np.where(known, self.housekeeping["multipliers"][rows], 1.0)
+
+    # ---- F&B -----------------------------------------------------------------------------------
+    @cached_property
+    def meals(self) -> Dict[str, Tuple[List[Tuple[str, str]], np.ndarray, np.ndarray]]:
+        from ..models.fnb import compile_meals
+        cfg = self.raw.get("fnb_meals", {})
+        return {m: compile_meals(cfg, [m], self.archetypes) for m in cfg}
+
+    def meals_for(self, meals: Sequence[str], labels: Labels) -> Tuple[List[Tuple[str, str]], np.ndarray, np.ndarray]:
+        """``compile_meals(fnb_meals, meals, labels)`` from the precompiled matrices."""
+        rows, known = self._rows(labels)
+        keys: List[Tuple[str, str]] = []
+        bases, mults = [], []
+        for m in meals:
+            k, base, mult = self.meals[m]
+            keys += k; bases.append(base)
+            mults.append(np.where(known[:, None], mult[rows], 1.0))
+        return (keys, np.concatenate(bases) if bases else np.zeros((0, 2)),
+                np.concatenate(mults, axis=1) if mults else np.zeros((len(labels), 0)))
+
+    # ---- service load --------------------------------------------------------------------------
+    @cached_property
+    def service(self) -> Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        from ..models.service import compile_distributions
+        return {area: compile_distributions(cfg["distributions"], self.archetypes)
+                for area, cfg in self.raw.get("service_load", {}).items()}
+
+    def distributions_for(self, area: str, labels: Labels) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """``compile_distributions`` for ``labels``; unknown labels use the ``Other`` row."""
+        slots, weights, support = self.service[area]
+        rows, known = self._rows(labels)
+        rows = np.where(known, rows, self._index["Other"])
+        return slots, weights[rows], support[rows]
+
+    # ---- departments ---------------------------------------------------------------------------
+    @cached_property
+    def departments(self) -> Dict[str, Tuple[np.ndarray, float, float, bool]]:
+        from ..models.departments import DEPT_SPECS, compile_departments
+        cfg = self.raw.get("departments", {})
+        out = {}
+        for dept in cfg:
+            if dept in DEPT_SPECS:
+                rates, minutes, util, by_rooms = compile_departments(cfg, [dept], self.archetypes)
+                out[dept] = (rates[0], float(minutes[0]), float(util[0]), bool(by_rooms[0]))
+        return out
+
+    def departments_for(self, depts: Sequence[str], labels: Labels):
+        """``compile_departments(departments, depts, labels)`` from the precompiled rates."""
+        from ..models.departments import DEPT_SPECS
+        rows, known = self._rows(labels)
+        rates = np.zeros((len(depts), len(labels)))
+        minutes = np.zeros(len(depts)); util = np.zeros(len(depts)); by_rooms = np.zeros(len(depts), dtype=bool)
+        for i, dept in enumerate(depts):
+            r, minutes[i], util[i], by_rooms[i] = self.departments[dept]
+            default = DEPT_SPECS[dept][2]
+            rates[i] = np.where(known, r[rows], r[0] if default is None else default)
+        return rates, minutes, util, by_rooms
+
+    # ---- airline -------------------------------------------------------------------------------
+    @cached_property
+    def airline(self) -> Dict[str, Tuple[np.ndarray, np.ndarray, float, float]]:
+        from ..models.airline import compile_offsets
+        return {area: compile_offsets(cfg["distributions"]) + (float(cfg["pax_per_agent_per_hour"]), float(cfg["sla_target_wait_min"]))
+                for area, cfg in self.raw.get("airline", {}).items()}
+
+# ---- caches --------------------------------------------------------------------------------------
+_BY_FINGERPRINT: "OrderedDict[str, CompiledConfig]" = OrderedDict()
+_BY_PATH: Dict[str, Tuple[int, int, str, CompiledConfig]] = {}
+
+def compile_config(cfg: Dict[str, Any]) -> CompiledConfig:
+    """Compiled view of ``cfg``, shared by every dict with the same content."""
+    fp = fingerprint(cfg)
+    hit = _BY_FINGERPRINT.get(fp)
+    if hit is not None:
+        _BY_FINGERPRINT.move_to_end(fp)
+        return hit
+    # own a copy so later edits to the caller's dict cannot desync the arrays
+    compiled = CompiledConfig(copy.deepcopy(cfg), fp)
+    _BY_FINGERPRINT[fp] = compiled
+    while len(_BY_FINGERPRINT) > COMPILED_CACHE_SIZE:
+        _BY_FINGERPRINT.popitem(last=False)
+    return compiled
+
+def load_compiled(path: Optional[Path] = None) -> CompiledConfig:
+    """Validated, compiled config for a YAML file, cached by path, mtime and content hash.
+
+    An unchanged file costs one ``stat``; a touched file with the same bytes costs a hash; only new
+    content is parsed and validated.
+    """
+    from .loader import DEFAULT_CONFIG_PATH, _parse_and_validate
+    p = Path(path) if path is not None else DEFAULT_CONFIG_PATH
+    key = str(p.resolve())
+    st = os.stat(p)
+    hit = _BY_PATH.get(key)
+    if hit is not None and hit[:2] == (st.st_mtime_ns, st.st_size):
+        return hit[3]
+    content = p.read_bytes()
+    digest = hashlib.sha256(content).hexdigest()
+    if hit is not None and hit[2] == digest:
+        compiled = hit[3]
+    else:
+        compiled = compile_config(_parse_and_validate(content))
+    _BY_PATH[key] = (st.st_mtime_ns, st.st_size, digest, compiled)
+    return compiled
@@ -1,15 +1,29 @@
 from __future__ import annotations
+import copy
 from pathlib import Path
 from typing import Optional, Dict, Any
-import yaml
-from .schema import AppConfig
 
-def load_config(path: Optional[Path]) -> Dict[str, Any]:
-    if path is None:
-        p = Path(__file__).parent / "base.yaml"
-    else:
-        p = Path(path)
-    with open(p, "r", encoding="utf-8") as f:
-        data = yaml.safe_load(f)
+DEFAULT_CONFIG_PATH = Path(__file__).parent / "base.yaml"
+
+def _parse_and_validate(content: bytes) -> Dict[str, Any]:
+    import yaml
+    from .schema import AppConfig
+    data = yaml.safe_load(content)
     cfg = AppConfig(**data)  # validate
     return cfg.model_dump()
+
+def load_config(path: Optional[Path]) -> Dict[str, Any]:
+    # parsed and validated once per file content (see config.compiled.load_compiled); callers get a copy
+    from .compiled import load_compiled
+    return copy.deepcopy(load_compiled(path).raw)
+
+def _deep_merge(base: Dict[str, Any], override: Dict[str, Any]) -> Dict[str, Any]:
+    # nested dicts merge key by key, anything else in `override` replaces the base value
+    out = dict(base)
+    for k, v in override.items():
+        out[k] = _deep_merge(out[k], v) if isinstance(v, dict) and isinstance(out.get(k), dict) else v
+    return out
+
+def merge_config(base: Dict[str, Any], override: Dict[str, Any]) -> Dict[str, Any]:
+    from .schema import AppConfig
+    return AppConfig(**_deep_merge(base, override)).model_dump()
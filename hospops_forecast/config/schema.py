@@ -1,6 +1,8 @@
 from __future__ import annotations
-from typing import Dict, Optional
-from pydantic import BaseModel, Field, PositiveFloat
+from typing import Annotated, Dict, Optional
+from pydantic import BaseModel, Field, NonNegativeFloat, PositiveFloat, PositiveInt
+
+Rate = Annotated[float, Field(ge=0.0, le=1.0)]
 
 class HKMultipliers(BaseModel):
     SoloBusiness: float = 1.0
@@ -85,6 +87,13 @@ class AirlineConfig(BaseModel):
     gate: AirlineArea
     lounge: AirlineArea
 
+class SimulationConfig(BaseModel):
+    # per archetype; archetypes not listed use "Other"
+    cancellation_rate: Dict[str, Rate] = {"SoloBusiness": 0.08, "LeisureCouple": 0.10, "FamilyWithKids": 0.07, "TourGroup": 0.03, "Other": 0.10}
+    no_show_rate: Dict[str, Rate] = {"SoloBusiness": 0.03, "LeisureCouple": 0.02, "FamilyWithKids": 0.02, "TourGroup": 0.01, "Other": 0.03}
+    walk_ins_per_day: Dict[str, NonNegativeFloat] = {"SoloBusiness": 0.5, "LeisureCouple": 0.3, "FamilyWithKids": 0.1, "TourGroup": 0.0, "Other": 0.3}
+    walk_in_nights: PositiveInt = 1
+
 class AppConfig(BaseModel):
     housekeeping: HousekeepingConfig
     fnb_meals: FNBMeals
@@ -92,3 +101,4 @@ class AppConfig(BaseModel):
     service_sla: ServiceSLA
     departments: Departments
     airline: AirlineConfig
+    simulation: SimulationConfig = SimulationConfig()
@@ -1,13 +1,25 @@
 from __future__ import annotations
 from datetime import timedelta
+from typing import Any, Callable, Dict, Optional, Tuple
 import numpy as np
 import pandas as pd
+from .profiling import stage
+
+# enriched columns the intermediates below read; enough for every hotel forecaster
+FORECAST_COLUMNS = ["reservation_id","arrival_date","departure_date","adults","children","archetype"]
 
 def ensure_datetime(s: pd.Series) -> pd.Series:
     if not np.issubdtype(s.dtype, np.datetime64):
         return pd.to_datetime(s, errors="coerce")
     return s
 
+def plain_labels(s: pd.Series) -> pd.Series:
+    # categorical columns (Parquet/Feather) group and merge like the plain labels they hold
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        return s.astype(s.cat.categories.dtype)
+    return s
+
+@stage("features.expand_daily")
 def expand_reservations_daily(df: pd.DataFrame) -> pd.DataFrame:
     df = df.copy()
     df["arrival_date"] = ensure_datetime(df["arrival_date"]).dt.date
@@ -42,12 +54,155 @@ def count_inhouse_by_day_and_archetype(daily: pd.DataFrame) -> pd.DataFrame:
     ).reset_index()
     return grp.merge(totals, on="date", how="left")
 
+def _to_days(s: pd.Series) -> np.ndarray:
+    return ensure_datetime(s).to_numpy(dtype="datetime64[ns]").astype("datetime64[D]")
+
+def _sweep(start: np.ndarray, end: np.ndarray, codes: np.ndarray, weights, n_days: int, k: int) -> np.ndarray:
+    # difference array over (day, archetype): +w on the first night, -w on the departure day
+    size = (n_days + 1) * k
+    delta = np.bincount(start * k + codes, weights=weights, minlength=size)
+    delta -= np.bincount(end * k + codes, weights=weights, minlength=size)
+    return delta.reshape(n_days + 1, k).cumsum(axis=0)[:-1]
+
+def _merge_stays(ids: pd.Series, codes: np.ndarray, start: np.ndarray, end: np.ndarray, k: int):
+    # union overlapping stays that share (reservation_id, archetype) so each room is counted once per night
+    key = pd.factorize(ids)[0].astype(np.int64) * k + codes
+    iv = pd.DataFrame({"k": key, "a": start, "d": end}).sort_values(["k", "a"], kind="mergesort")
+    reach = iv.groupby("k")["d"].cummax()
+    prev = reach.groupby(iv["k"]).shift()
+    run = (prev.isna() | (iv["a"] > prev)).cumsum()
+    merged = iv.groupby(run.to_numpy()).agg(k=("k", "first"), a=("a", "first"), d=("d", "max"))
+    return (merged["k"] % k).to_numpy(), merged["a"].to_numpy(), merged["d"].to_numpy()
+
+INHOUSE_COLUMNS = ["date","archetype","rooms","adults","children","guest_nights",
+                   "rooms_total","adults_total","children_total","guest_nights_total"]
+
+@stage("features.inhouse")
+def inhouse_by_day_and_archetype(df: pd.DataFrame) -> pd.DataFrame:
+    """Same frame as ``count_inhouse_by_day_and_archetype(expand_reservations_daily(df))``,
+    computed with prefix sums over day ordinals instead of one row per guest-night."""
+    arr = _to_days(df["arrival_date"])
+    dep = _to_days(df["departure_date"])
+    arche = plain_labels(df["archetype"])
+    ok = ~(np.isnat(arr) | np.isnat(dep)) & (dep > arr) & arche.notna().to_numpy()
+    if not ok.any():
+        return pd.DataFrame(columns=INHOUSE_COLUMNS)
+    a = arr[ok].astype(np.int64)
+    d = dep[ok].astype(np.int64)
+    codes, labels = pd.factorize(arche[ok], sort=True)
+    origin = a.min()
+    a -= origin; d -= origin
+    n_days, k = int(d.max()), len(labels)
+
+    ids = df["reservation_id"][ok]
+    has_id = ids.notna().to_numpy()
+    stays = _sweep(a, d, codes, None, n_days, k)
+    guest_nights = stays if has_id.all() else _sweep(a, d, codes, has_id.astype(float), n_days, k)
+    if ids.duplicated().any() or not has_id.all():
+        mc, ma, md = _merge_stays(ids[has_id], codes[has_id], a[has_id], d[has_id], k)
+        rooms = _sweep(ma, md, mc, None, n_days, k)
+    else:
+        rooms = stays
+
+    def pax(col: str) -> np.ndarray:
+        v = df[col][ok]
+        out = _sweep(a, d, codes, v.fillna(0).to_numpy(dtype=float), n_days, k)
+        return np.rint(out).astype(np.int64) if pd.api.types.is_integer_dtype(v.dtype) else out
+
+    adults, children = pax("adults"), pax("children")
+    rooms = np.rint(rooms).astype(np.int64)
+    guest_nights = np.rint(guest_nights).astype(np.int64)
+
+    day, code = np.nonzero(stays > 0)
+    dates = (day + origin).astype("datetime64[D]").astype(object)
+    out = pd.DataFrame({
+        "date": dates,
+        "archetype": labels.take(code),
+        "rooms": rooms[day, code],
+        "adults": adults[day, code],
+        "children": children[day, code],
+        "guest_nights": guest_nights[day, code],
+        "rooms_total": rooms.sum(axis=1)[day],
+        "adults_total": adults.sum(axis=1)[day],
+        "children_total": children.sum(axis=1)[day],
+        "guest_nights_total": guest_nights.sum(axis=1)[day],
+    })
+    return out
+
+@stage("features.checkouts")
+def checkouts_by_day_and_archetype(df: pd.DataFrame) -> pd.DataFrame:
+    dep = ensure_datetime(df["departure_date"]).dt.normalize()
+    grp = df.groupby([dep.rename("date"), plain_labels(df["archetype"])]).reservation_id.count().rename("checkouts").reset_index()
+    grp["date"] = grp["date"].dt.date
+    return grp
+
+@stage("features.arrivals")
 def arrivals_by_day_and_archetype(df: pd.DataFrame) -> pd.DataFrame:
     df = df.copy()
     df["arrival_date"] = pd.to_datetime(df["arrival_date"]).dt.date
+    df["archetype"] = plain_labels(df["archetype"])
     grp = df.groupby(["arrival_date","archetype"]).agg(
         arrivals=("reservation_id","count"),
         arriving_adults=("adults","sum"),
         arriving_children=("children","sum"),
     ).reset_index().rename(columns={"arrival_date":"date"})
     return grp
+
+@stage("features.parse_dates")
+def parse_reservation_dates(df: pd.DataFrame, cols=("arrival_date","departure_date")) -> pd.DataFrame:
+    out = df.copy()
+    for c in cols:
+        if c in out.columns:
+            out[c] = pd.to_datetime(out[c], errors="coerce")
+    return out
+
+class FeatureCache:
+    """Lazily computed, memoized intermediates shared by every forecaster run on one enriched frame."""
+
+    # name -> (dependencies, builder); builders receive the resolved dependencies in order
+    NODES: Dict[str, Tuple[Tuple[str, ...], Callable[..., Any]]] = {
+        "reservations": (("enriched",), parse_reservation_dates),
+        "inhouse": (("reservations",), inhouse_by_day_and_archetype),
+        "arrivals": (("reservations",), arrivals_by_day_and_archetype),
+        "checkouts": (("reservations",), checkouts_by_day_and_archetype),
+    }
+
+    def __init__(self, enriched: pd.DataFrame):
+        self._memo: Dict[str, Any] = {"enriched": enriched}
+
+    @classmethod
+    def from_intermediates(cls, **frames: pd.DataFrame) -> "FeatureCache":
+        # seed the cache with already computed nodes (e.g. from an OccupancyState)
+        unknown = set(frames) - set(cls.NODES)
+        if unknown:
+            raise KeyError(f"Unknown intermediates {sorted(unknown)}. Available: {list(cls.NODES)}")
+        cache = cls(None)
+        cache._memo.update(frames)
+        return cache
+
+    def get(self, name: str) -> Any:
+        if name not in self._memo:
+            if name not in self.NODES:
+                raise KeyError(f"Unknown intermediate '{name}'. Available: {list(self.NODES)}")
+            deps, fn = self.NODES[name]
+            self._memo[name] = fn(*(self.get(d) for d in deps))
+        return self._memo[name]
+
+    def computed(self) -> list:
+        return [k for k in self._memo if k != "enriched"]
+
+    @property
+    def rows(self) -> Optional[int]:
+        # reservations behind the cache (None when seeded from intermediates); used by profiling
+        return None if self.enriched is None else len(self.enriched)
+
+    @property
+    def enriched(self) -> pd.DataFrame: return self._memo["enriched"]
+    @property
+    def reservations(self) -> pd.DataFrame: return self.get("reservations")
+    @property
+    def inhouse(self) -> pd.DataFrame: return self.get("inhouse")
+    @property
+    def arrivals(self) -> pd.DataFrame: return self.get("arrivals")
+    @property
+    def checkouts(self) -> pd.DataFrame: return self.get("checkouts")
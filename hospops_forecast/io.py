@@ -0,0 +1,210 @@
+from __future__ import annotations
+import shutil
+from pathlib import Path
+from typing import Any, List, Mapping, Optional, Sequence, Union
+import pandas as pd
+from .profiling import stage
+from .segmentation.archetypes import Archetype
+
+PathLike = Union[str, Path]
+
+# extension -> format; a directory (or a path without suffix) is a partitioned Parquet dataset
+FORMATS = {".csv": "csv", ".parquet": "parquet", ".pq": "parquet",
+           ".feather": "feather", ".arrow": "feather", ".ipc": "feather"}
+
+ENRICHED_DATE_COLUMNS = ["arrival_date","departure_date"]
+ENRICHED_CATEGORICAL_COLUMNS = ["room_type","channel","company","nationality","archetype"]
+PARTITION_COLUMN = "arrival_month"
+
+def table_format(path: PathLike) -> str:
+    path = Path(path)
+    if path.is_dir() or not path.suffix:
+        return "parquet"
+    fmt = FORMATS.get(path.suffix.lower())
+    if fmt is None:
+        raise ValueError(f"Unsupported file type '{path.suffix}'. Use one of {sorted(FORMATS)}")
+    return fmt
+
+def _require_pyarrow(fmt: str):
+    # imported on first Arrow use so CSV-only commands don't pay for it
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet  # noqa: F401
+    except Exception:
+        raise ImportError(f"{fmt} I/O needs pyarrow: pip install 'hospops-forecast[arrow]'") from None
+    return pa
+
+@stage("io.read")
+def read_table(path: PathLike, columns: Optional[Sequence[str]] = None,
+               parse_dates: Optional[Sequence[str]] = None, filters: Optional[list] = None) -> pd.DataFrame:
+    """Read CSV, Parquet (file or partitioned directory) or Feather/Arrow IPC by extension.
+
+    ``columns`` limits what is read; ``filters`` (pyarrow DNF, e.g. ``[("arrival_date", "<=", ts)]``)
+    prunes partitions and row groups for Parquet and is applied to the rows of other formats.
+    """
+    fmt = table_format(path)
+    cols = list(columns) if columns is not None else None
+    if fmt == "csv":
+        dates = [c for c in (parse_dates or []) if cols is None or c in cols]
+        df = pd.read_csv(path, usecols=cols, parse_dates=dates or None)
+        return _apply_filters(df, filters)
+    _require_pyarrow(fmt)
+    if fmt == "parquet":
+        df = pd.read_parquet(path, columns=cols, filters=filters)
+        if PARTITION_COLUMN in df.columns and (cols is None or PARTITION_COLUMN not in cols):
+            df = df.drop(columns=PARTITION_COLUMN)
+    else:
+        df = _apply_filters(pd.read_feather(path, columns=cols), filters)
+    for c in parse_dates or []:
+        if c in df.columns:
+            df[c] = pd.to_datetime(df[c], errors="coerce")
+    return df
+
+def _apply_filters(df: pd.DataFrame, filters: Optional[list]) -> pd.DataFrame:
+    # conjunction of (column, op, value) triples; the subset of pyarrow filters this package emits
+    if not filters:
+        return df
+    ops = {"<": "__lt__", "<=": "__le__", ">": "__gt__", ">=": "__ge__", "==": "__eq__", "!=": "__ne__"}
+    mask = pd.Series(True, index=df.index)
+    for col, op, value in filters:
+        if col not in df.columns:
+            continue
+        mask &= getattr(df[col], ops[op])(value).fillna(False)
+    return df[mask].reset_index(drop=True)
+
+@stage("io.write")
+def write_table(df: pd.DataFrame, path: PathLike, partition_cols: Optional[List[str]] = None) -> Path:
+    path = Path(path)
+    fmt = table_format(path)
+    if partition_cols and fmt != "parquet":
+        raise ValueError("Partitioned output needs a Parquet directory path (no suffix or .parquet)")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if fmt == "csv":
+        df.to_csv(path, index=False)
+        return path
+    _require_pyarrow(fmt)
+    if partition_cols:
+        _clear_dataset(path, partition_cols[0])
+    if fmt == "parquet":
+        df.to_parquet(path, index=False, partition_cols=partition_cols)
+    else:
+        df.reset_index(drop=True).to_feather(path)
+    return path
+
+def _clear_dataset(path: Path, partition_col: str) -> None:
+    # partitioned writes add part files next to existing ones; replace a previous dataset instead
+    if not path.exists():
+        return
+    foreign = [p.name for p in path.iterdir() if not p.name.startswith((f"{partition_col}=", ".", "_"))] if path.is_dir() else [path.name]
+    if foreign:
+        raise ValueError(f"{path} exists and is not a '{partition_col}'-partitioned dataset; not replacing it")
+    shutil.rmtree(path)
+
+def to_enriched_schema(df: pd.DataFrame, categories: Optional[Mapping[str, Sequence[str]]] = None) -> pd.DataFrame:
+    """Datetimes stay datetimes and low-cardinality strings become categoricals in the stored schema.
+
+    ``categories`` fixes the categories per column (chunked writers pass the whole file's values so
+    every chunk has the same dictionary); archetypes always include every ``Archetype``.
+    """
+    df = df.copy()
+    for c in ENRICHED_DATE_COLUMNS:
+        if c in df.columns:
+            df[c] = pd.to_datetime(df[c], errors="coerce")
+    for c in ENRICHED_CATEGORICAL_COLUMNS:
+        if c not in df.columns:
+            continue
+        fixed = (categories or {}).get(c)
+        if fixed is None and c == "archetype":
+            fixed = sorted(set(a.value for a in Archetype) | set(df[c].dropna().astype(str)))
+        df[c] = df[c].astype(pd.CategoricalDtype(sorted(fixed)) if fixed is not None else "category")
+    return df
+
+def write_enriched(df: pd.DataFrame, path: PathLike, partition_by_month: bool = False) -> Path:
+    """Write enriched reservations; Parquet/Feather keep dtypes, ``partition_by_month`` writes a
+    Parquet dataset with one ``arrival_month=YYYY-MM`` directory per month."""
+    if table_format(path) == "csv":
+        if partition_by_month:
+            raise ValueError("Partitioned output needs a Parquet directory path (no suffix or .parquet)")
+        return write_table(df, path)
+    df = to_enriched_schema(df)
+    if not partition_by_month:
+        return write_table(df, path)
+    df[PARTITION_COLUMN] = df["arrival_date"].dt.strftime("%Y-%m").fillna("unknown")
+    return write_table(df, path, partition_cols=[PARTITION_COLUMN])
+
+def read_enriched(path: PathLike, columns: Optional[Sequence[str]] = None,
+                  start=None, end=None) -> pd.DataFrame:
+    """Read enriched reservations, optionally only ``columns`` and the stays overlapping [start, end].
+
+    On a month-partitioned dataset, partitions whose arrivals fall after ``end`` are never opened.
+    """
+    filters = []
+    if end is not None:
+        end = pd.Timestamp(end)
+        filters.append(("arrival_date", "<=", end))
+        if table_format(path) == "parquet" and Path(path).is_dir():
+            filters.append((PARTITION_COLUMN, "<=", end.strftime("%Y-%m")))
+    if start is not None:
+        filters.append(("departure_date", ">=", pd.Timestamp(start)))
+    return read_table(path, columns=columns, parse_dates=ENRICHED_DATE_COLUMNS, filters=filters or None)
+
+class TableWriter:
+    """Append chunks to one CSV/Parquet/Feather output (or a month-partitioned Parquet dataset).
+
+    An existing output is replaced. The schema is fixed by the first chunk; use as a context manager.
+    """
+
+    def __init__(self, path: PathLike, partition_by_month: bool = False):
+        self.path = Path(path)
+        self.fmt = table_format(self.path)
+        self.partition_by_month = partition_by_month
+        if partition_by_month and self.fmt != "parquet":
+            raise ValueError("Partitioned output needs a Parquet directory path (no suffix or .parquet)")
+        self._pa: Any = _require_pyarrow(self.fmt) if self.fmt != "csv" else None
+        self.rows = 0
+        self._schema = None
+        self._writer: Any = None
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if partition_by_month:
+            _clear_dataset(self.path, PARTITION_COLUMN)
+
+    def write(self, df: pd.DataFrame) -> None:
+        if self.fmt == "csv":
+            df.to_csv(self.path, mode="w" if self.rows == 0 else "a", header=self.rows == 0, index=False)
+        elif self.partition_by_month:
+            df = df.assign(**{PARTITION_COLUMN: pd.to_datetime(df["arrival_date"]).dt.strftime("%Y-%m").fillna("unknown")})
+            table = self._pa.Table.from_pandas(df, schema=self._schema, preserve_index=False)
+            self._schema = self._schema or table.schema
+            self._pa.parquet.write_to_dataset(table, self.path, partition_cols=[PARTITION_COLUMN])
+        else:
+            table = self._pa.Table.from_pandas(df, schema=self._schema, preserve_index=False)
+            if self._writer is None:
+                self._schema = table.schema
+                self._writer = (self._pa.parquet.ParquetWriter(self.path, self._schema) if self.fmt == "parquet"
+                                else self._pa.ipc.new_file(self.path, self._schema))
+            self._writer.write_table(table)
+        self.rows += len(df)
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def __enter__(self) -> "TableWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+def clip_dates(out: pd.DataFrame, start=None, end=None) -> pd.DataFrame:
+    # keep forecast rows whose date/datetime falls in [start, end]; used with read_enriched(start, end)
+    if (start is None and end is None) or out.empty:
+        return out
+    col = "date" if "date" in out.columns else "datetime"
+    day = pd.to_datetime(out[col]).dt.normalize()
+    keep = pd.Series(True, index=out.index)
+    if start is not None:
+        keep &= day >= pd.Timestamp(start)
+    if end is not None:
+        keep &= day <= pd.Timestamp(end)
+    return out[keep].reset_index(drop=True)
@@ -1,55 +1,76 @@
 from __future__ import annotations
 import numpy as np, pandas as pd
 from dataclasses import dataclass
-from datetime import datetime, timedelta
-from typing import Dict
+from typing import Dict, List, Optional, Sequence, Tuple
 from .base import BaseForecaster
-from .queueing import erlang_c_wait_minutes
+from ..profiling import stage
+from .staffing import staffing_table
 
-def _rel_to_abs_times(base_date: pd.Timestamp, base_time: pd.Timestamp, rel: str) -> pd.Timestamp:
-    # rel format: "-HH:MM" relative to base_time on base_date
+def _rel_to_seconds(rel: str) -> int:
+    # rel format: "-HH:MM" before gate_time
     hh, mm = rel.replace("-", "").split(":")
-    delta = timedelta(hours=int(hh), minutes=int(mm))
-    return pd.Timestamp.combine(pd.Timestamp(base_date).date(), pd.to_datetime(base_time).time()) - delta
+    return int(hh) * 3600 + int(mm) * 60
+
+def compile_offsets(distributions: Dict[str, float]) -> Tuple[np.ndarray, np.ndarray]:
+    """Parse an area's offsets once: seconds before gate time and their weights."""
+    return (np.array([_rel_to_seconds(k) for k in distributions], dtype=np.int64),
+            np.array([float(w) for w in distributions.values()], dtype=float))
+
+def _clock_seconds(s: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+    # "HH:MM" or "HH:MM:SS" -> seconds after midnight (and a mask of unparseable values)
+    text = s.astype(str).str.strip()
+    text = text.where(text.str.count(":") != 1, text + ":00")
+    td = pd.to_timedelta(text, errors="coerce")
+    miss = td.isna() & s.notna()
+    if miss.any():  # anything else pandas can read as a clock time, e.g. "3:00 PM"
+        t = pd.to_datetime(s[miss].astype(str), errors="coerce", format="mixed")
+        td[miss] = t - t.dt.normalize()
+    secs = td.to_numpy(dtype="timedelta64[ns]").astype(np.int64) // 1_000_000_000
+    return secs, td.isna().to_numpy()
 
 @dataclass
 class AirlineForecaster(BaseForecaster):
+    @stage("airline.predict")
     def predict(self, flights: pd.DataFrame, area: str) -> pd.DataFrame:
         area = area.lower().strip()
+        out = self.predict_all(flights, areas=[area])
+        return out[["datetime","expected_pax","recommended_staff","area"]]
+
+    @stage("airline.predict_all")
+    def predict_all(self, flights: pd.DataFrame, areas: Optional[Sequence[str]] = None) -> pd.DataFrame:
         cfg = self.config.get("airline", {})
-        if area not in cfg:
-            raise ValueError(f"Unknown airline area '{area}'. Available: {list(cfg.keys())}")
-        acfg = cfg[area]
-        pax_per_agent = float(acfg["pax_per_agent_per_hour"])
-        target_wait = float(acfg["sla_target_wait_min"])
-        dist = acfg["distributions"]
-
-        df = flights.copy()
-        df["date"] = pd.to_datetime(df["date"]).dt.date
-        df["gate_time"] = pd.to_datetime(df["gate_time"]).dt.time
-
-        buckets = {}
-        for _, r in df.iterrows():
-            for rel, w in dist.items():
-                ts = _rel_to_abs_times(pd.Timestamp(r["date"]), pd.Timestamp.combine(pd.Timestamp(r["date"]), r["gate_time"]), rel)
-                buckets[ts] = buckets.get(ts, 0.0) + float(r["pax_count"]) * float(w)
-
-        if not buckets:
-            return pd.DataFrame(columns=["datetime","expected_pax","recommended_staff"])
-        out = pd.DataFrame({"datetime": list(buckets.keys()), "expected_pax": list(buckets.values())}).sort_values("datetime")
-        # SLA staffing via Erlang C
-        rec = []
-        for lam in out["expected_pax"]:
-            if lam <= 0: rec.append(0); continue
-            mu = pax_per_agent
-            c = 1
-            while c < 500:
-                wq = erlang_c_wait_minutes(lam, mu, c)
-                rho = lam/(c*mu)
-                if (wq <= target_wait) and (rho < 0.9):
-                    break
-                c += 1
-            rec.append(c)
-        out["recommended_staff"] = rec
-        out["area"] = area
-        return out
+        areas = list(cfg.keys()) if areas is None else [a.lower().strip() for a in areas]
+        for area in areas:
+            if area not in cfg:
+                raise ValueError(f"Unknown airline area '{area}'. Available: {list(cfg.keys())}")
+
+        day = pd.to_datetime(flights["date"], errors="coerce").dt.normalize()
+        clock, bad_clock = _clock_seconds(flights["gate_time"])
+        ok = day.notna().to_numpy() & ~bad_clock
+        gate = day.to_numpy(dtype="datetime64[s]").astype(np.int64)[ok] + clock[ok]  # epoch seconds
+        pax = pd.to_numeric(flights["pax_count"], errors="coerce").to_numpy(dtype=float)[ok]
+
+        # flights x offsets broadcast into one int64 time grid per area; midnight crossings fall out of the arithmetic
+        keys: List[np.ndarray] = []; loads: List[np.ndarray] = []
+        for i, area in enumerate(areas):
+            offsets, weights, _, _ = self.compiled.airline[area]
+            keys.append(((gate[:, None] - offsets[None, :]) * len(areas) + i).ravel())
+            loads.append((pax[:, None] * weights[None, :]).ravel())
+        key = np.concatenate(keys) if keys else np.zeros(0, dtype=np.int64)
+        if len(key) == 0:
+            return pd.DataFrame(columns=["datetime","expected_pax","recommended_staff","area"])
+        uniq, inv = np.unique(key, return_inverse=True)
+        expected = np.bincount(inv.ravel(), weights=np.concatenate(loads), minlength=len(uniq))
+        area_idx = uniq % len(areas)
+        ts = (uniq // len(areas)).astype("datetime64[s]")
+
+        frames = []
+        for i, area in enumerate(areas):
+            sel = area_idx == i
+            _, _, rate, target = self.compiled.airline[area]
+            tmp = pd.DataFrame({"datetime": ts[sel], "expected_pax": expected[sel]})
+            # SLA staffing via Erlang C
+            tmp["recommended_staff"] = staffing_table(rate, target, 0.9).staff(expected[sel])
+            tmp["area"] = area
+            frames.append(tmp)
+        return pd.concat(frames, ignore_index=True)
@@ -1,23 +1,54 @@
 from __future__ import annotations
-from dataclasses import dataclass
-from typing import Optional, Dict, Any
+import copy
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional, Dict, Any, Type, TypeVar, cast
 import pandas as pd
-import yaml
+from ..features import parse_reservation_dates
+
+if TYPE_CHECKING:
+    from ..config.compiled import CompiledConfig
+
+F = TypeVar("F", bound="BaseForecaster")
+
+DEFAULT_CONFIG_PATH = Path(__file__).resolve().parents[1] / "config" / "base.yaml"
+
+@lru_cache(maxsize=1)
+def _default_config() -> Dict[str, Any]:
+    import yaml
+    with open(DEFAULT_CONFIG_PATH, "r", encoding="utf-8") as f:
+        return yaml.safe_load(f)
+
+def default_config() -> Dict[str, Any]:
+    # parsed once per process; callers get their own copy since calibrators edit nested sections
+    return copy.deepcopy(_default_config())
 
 @dataclass
 class BaseForecaster:
+    # a config dict; a CompiledConfig (see `from_compiled`) is used as-is and `config` becomes its raw dict
     config: Optional[dict] = None
+    _compiled: Optional["CompiledConfig"] = field(default=None, init=False, repr=False, compare=False)
+
     def __post_init__(self):
-        if self.config is None:
-            from pathlib import Path
-            cfg_path = Path(__file__).resolve().parents[1] / "config" / "base.yaml"
-            with open(cfg_path, "r", encoding="utf-8") as f:
-                self.config = yaml.safe_load(f)
+        from ..config.compiled import CompiledConfig
+        if isinstance(self.config, CompiledConfig):
+            self._compiled, self.config = self.config, self.config.raw
+        elif self.config is None:
+            self.config = default_config()
+
+    @classmethod
+    def from_compiled(cls: Type[F], compiled: "CompiledConfig", **kwargs: Any) -> F:
+        return cls(cast(dict, compiled), **kwargs)
+
+    @property
+    def compiled(self) -> "CompiledConfig":
+        # looked up by fingerprint on each use, so edits to `config` are picked up
+        if self._compiled is not None:
+            return self._compiled
+        from ..config.compiled import compile_config
+        return compile_config(cast(dict, self.config))  # set by __post_init__
 
     @staticmethod
     def _ensure_dates(df: pd.DataFrame, cols=("arrival_date","departure_date")) -> pd.DataFrame:
-        out = df.copy()
-        for c in cols:
-            if c in out.columns:
-                out[c] = pd.to_datetime(out[c], errors="coerce")
-        return out
+        return parse_reservation_dates(df, cols)
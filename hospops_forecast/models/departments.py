@@ -1,64 +1,82 @@
 from __future__ import annotations
 import numpy as np, pandas as pd
 from dataclasses import dataclass
-from ..features import expand_reservations_daily, count_inhouse_by_day_and_archetype
+from typing import Dict, Optional, Sequence, Tuple
+from ..features import FeatureCache
 from .base import BaseForecaster
+from ..profiling import stage
+
+# dept -> (driver, rate key, default per-archetype rate, minutes key, default utilization, volume column)
+DEPT_SPECS: Dict[str, Tuple[str, str, Optional[float], str, float, Optional[str]]] = {
+    "spa": ("guests", "treatments_per_guest_day", 0.03, "minutes_per_treatment", 0.8, None),
+    "concierge": ("guests", "requests_per_guest_day", 0.1, "minutes_per_request", 0.85, None),
+    "valet": ("rooms", "cars_per_room_day", 0.15, "minutes_per_transaction", 0.85, "transactions"),
+    "engineering": ("rooms", "tickets_per_room_day", None, "minutes_per_ticket", 0.8, "tickets"),
+}
+
+def compile_departments(dept_cfg: Dict[str, dict], depts: Sequence[str], archetypes: Sequence[str]):
+    """Per-department rate vectors over ``archetypes`` plus driver, minutes and utilization arrays."""
+    rates = np.zeros((len(depts), len(archetypes)))
+    minutes = np.zeros(len(depts)); util = np.zeros(len(depts))
+    by_rooms = np.zeros(len(depts), dtype=bool)
+    for i, dept in enumerate(depts):
+        driver, rate_key, default_rate, minutes_key, default_util, _ = DEPT_SPECS[dept]
+        dcfg = dept_cfg[dept]
+        rate = dcfg[rate_key]
+        if default_rate is None:  # one rate for every archetype
+            rates[i] = float(rate)
+        else:
+            rates[i] = [float(rate.get(a, default_rate)) for a in archetypes]
+        minutes[i] = float(dcfg[minutes_key])
+        util[i] = float(dcfg.get("utilization", default_util))
+        by_rooms[i] = driver == "rooms"
+    return rates, minutes, util, by_rooms
 
 @dataclass
 class DepartmentForecaster(BaseForecaster):
-    def predict(self, enriched_reservations: pd.DataFrame, dept: str) -> pd.DataFrame:
-        df = self._ensure_dates(enriched_reservations)
+    @stage("dept.predict")
+    def predict(self, enriched_reservations: Optional[pd.DataFrame], dept: str,
+                *, features: Optional[FeatureCache] = None) -> pd.DataFrame:
         dept = dept.lower().strip()
+        tidy = self.predict_all(enriched_reservations, depts=[dept], features=features)
+        volume = DEPT_SPECS[dept][5]
+        cols = ["date"] + ([volume] if volume else []) + ["work_minutes","staff_hours","recommended_headcount"]
+        return tidy.rename(columns={"volume": volume} if volume else {})[cols]
+
+    @stage("dept.predict_all")
+    def predict_all(self, enriched_reservations: Optional[pd.DataFrame], depts: Optional[Sequence[str]] = None,
+                    *, features: Optional[FeatureCache] = None) -> pd.DataFrame:
+        # tidy frame keyed by (date, dept)
+        feats = features if features is not None else FeatureCache(enriched_reservations)
         cfg = self.config.get("departments", {})
-        if dept not in cfg:
-            raise ValueError(f"Unknown department '{dept}'. Available: {list(cfg.keys())}")
-        dcfg = cfg[dept]
+        depts = list(cfg.keys()) if depts is None else [d.lower().strip() for d in depts]
+        for dept in depts:
+            if dept not in cfg:
+                raise ValueError(f"Unknown department '{dept}'. Available: {list(cfg.keys())}")
+            if dept not in DEPT_SPECS:
+                raise ValueError(f"No forecasting rule for department '{dept}'. Supported: {list(DEPT_SPECS)}")
 
-        daily = expand_reservations_daily(df)
-        agg = count_inhouse_by_day_and_archetype(daily)
+        agg = feats.inhouse
+        cols = ["date","dept","volume","work_minutes","staff_hours","recommended_headcount"]
+        if agg.empty:
+            return pd.DataFrame(columns=cols)
+        d_codes, dates = pd.factorize(agg["date"], sort=True)
+        a_codes, archetypes = pd.factorize(agg["archetype"], sort=True)
+        guests = np.zeros((len(dates), len(archetypes)))
+        rooms = np.zeros((len(dates), len(archetypes)))
+        np.add.at(guests, (d_codes, a_codes), (agg["adults"] + agg["children"]).to_numpy(dtype=float))
+        np.add.at(rooms, (d_codes, a_codes), agg["rooms"].to_numpy(dtype=float))
 
-        results = []
-        for date, g in agg.groupby("date"):
-            row = {"date": date}
-            if dept == "spa":
-                m_per_treat = float(dcfg["minutes_per_treatment"])
-                util = float(dcfg.get("utilization", 0.8))
-                total_minutes = 0.0
-                for _, r in g.iterrows():
-                    rate = float(dcfg["treatments_per_guest_day"].get(r["archetype"], 0.03))
-                    total_minutes += (r["adults"] + r["children"]) * rate * m_per_treat
-                staff_hours = total_minutes / 60.0
-                headcount = int(np.ceil(staff_hours / (8 * util)))
-                row.update(work_minutes=total_minutes, staff_hours=staff_hours, recommended_headcount=headcount)
-            elif dept == "concierge":
-                m_per_req = float(dcfg["minutes_per_request"])
-                util = float(dcfg.get("utilization", 0.85))
-                total_minutes = 0.0
-                for _, r in g.iterrows():
-                    rate = float(dcfg["requests_per_guest_day"].get(r["archetype"], 0.1))
-                    total_minutes += (r["adults"] + r["children"]) * rate * m_per_req
-                staff_hours = total_minutes / 60.0
-                headcount = int(np.ceil(staff_hours / (8 * util)))
-                row.update(work_minutes=total_minutes, staff_hours=staff_hours, recommended_headcount=headcount)
-            elif dept == "valet":
-                m_per_tx = float(dcfg["minutes_per_transaction"])
-                util = float(dcfg.get("utilization", 0.85))
-                cars = 0.0
-                for _, r in g.iterrows():
-                    rate = float(dcfg["cars_per_room_day"].get(r["archetype"], 0.15))
-                    cars += r["rooms"] * rate
-                total_minutes = cars * m_per_tx
-                staff_hours = total_minutes / 60.0
-                headcount = int(np.ceil(staff_hours / (8 * util)))
-                row.update(transactions=cars, work_minutes=total_minutes, staff_hours=staff_hours, recommended_headcount=headcount)
-            elif dept == "engineering":
-                tickets_per_room_day = float(dcfg["tickets_per_room_day"])
-                m_per_ticket = float(dcfg["minutes_per_ticket"])
-                util = float(dcfg.get("utilization", 0.8))
-                tickets = g["rooms"].sum() * tickets_per_room_day
-                total_minutes = tickets * m_per_ticket
-                staff_hours = total_minutes / 60.0
-                headcount = int(np.ceil(staff_hours / (8 * util)))
-                row.update(tickets=tickets, work_minutes=total_minutes, staff_hours=staff_hours, recommended_headcount=headcount)
-            results.append(row)
-        return pd.DataFrame(results).sort_values("date")
+        rates, minutes, util, by_rooms = self.compiled.departments_for(depts, archetypes)
+        volume = np.where(by_rooms, rooms @ rates.T, guests @ rates.T)  # (date x dept)
+        work_minutes = volume * minutes
+        staff_hours = work_minutes / 60.0
+        headcount = np.ceil(staff_hours / (8 * util)).astype(int)
+        return pd.DataFrame({
+            "date": np.repeat(np.asarray(dates, dtype=object), len(depts)),
+            "dept": np.tile(depts, len(dates)),
+            "volume": volume.ravel(),
+            "work_minutes": work_minutes.ravel(),
+            "staff_hours": staff_hours.ravel(),
+            "recommended_headcount": headcount.ravel(),
+        })
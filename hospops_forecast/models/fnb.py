@@ -1,34 +1,67 @@
 from __future__ import annotations
-import pandas as pd
+import numpy as np, pandas as pd
 from dataclasses import dataclass
-from ..features import expand_reservations_daily, count_inhouse_by_day_and_archetype
+from typing import Dict, List, Optional, Sequence, Tuple
+from ..features import FeatureCache
 from .base import BaseForecaster
+from ..profiling import stage
 
-@dataclass
-class FNBConsumptionForecaster(BaseForecaster):
-    def predict(self, enriched_reservations: pd.DataFrame, meal: str = "breakfast") -> pd.DataFrame:
-        df = self._ensure_dates(enriched_reservations)
-        meals = self.config.get("fnb_meals", {})
-        if meal not in meals:
-            raise ValueError(f"Meal '{meal}' not configured. Available: {list(meals.keys())}")
-        cfg = meals[meal]
+def compile_meals(meals_cfg: Dict[str, dict], meals: Sequence[str], archetypes: Sequence[str]) -> Tuple[List[Tuple[str, str]], np.ndarray, np.ndarray]:
+    """Flatten the ``fnb_meals`` registry into (meal, item) keys, base (key x adult/child) and
+    multiplier (archetype x key) arrays. Missing multipliers default to 1.0."""
+    keys: List[Tuple[str, str]] = []
+    base_rows, mult_cols = [], []
+    for meal in meals:
+        cfg = meals_cfg[meal]
         base = cfg.get("base", {})
         mults = cfg.get("multipliers", {})
-        items = list(base.keys())
+        for item, b in base.items():
+            keys.append((meal, item))
+            base_rows.append((float(b["adult"]), float(b["child"])))
+            mult_cols.append([float(mults.get(a, {}).get(item, 1.0)) for a in archetypes])
+    base_arr = np.asarray(base_rows, dtype=float).reshape(len(keys), 2)
+    mult_arr = np.asarray(mult_cols, dtype=float).reshape(len(keys), len(archetypes)).T
+    return keys, base_arr, mult_arr
 
-        daily = expand_reservations_daily(df)
-        agg = count_inhouse_by_day_and_archetype(daily)
-
-        rows = []
-        for date, g in agg.groupby("date"):
-            row = {"date": date}
-            for _, r in g.iterrows():
-                arche = r["archetype"]
-                a = r["adults"]; c = r["children"]
-                for item in items:
-                    b_a = float(base[item]["adult"]); b_c = float(base[item]["child"])
-                    m = float(mults.get(arche, {}).get(item, 1.0))
-                    row[item] = row.get(item, 0.0) + (a*b_a + c*b_c) * m
-            rows.append(row)
-        out = pd.DataFrame(rows).sort_values("date")
+@dataclass
+class FNBConsumptionForecaster(BaseForecaster):
+    @stage("fnb.predict")
+    def predict(self, enriched_reservations: Optional[pd.DataFrame], meal: str = "breakfast",
+                *, features: Optional[FeatureCache] = None) -> pd.DataFrame:
+        long = self.predict_all(enriched_reservations, meals=[meal], features=features)
+        items = list(self.compiled.raw["fnb_meals"][meal].get("base", {}).keys())
+        if long.empty:
+            return pd.DataFrame(columns=["date"] + items)
+        out = long.pivot(index="date", columns="item", values="quantity").reset_index()
+        out.columns.name = None
         return out[["date"] + items]
+
+    @stage("fnb.predict_all")
+    def predict_all(self, enriched_reservations: Optional[pd.DataFrame], meals: Optional[Sequence[str]] = None,
+                    *, features: Optional[FeatureCache] = None) -> pd.DataFrame:
+        # long format: one row per (date, meal, item)
+        feats = features if features is not None else FeatureCache(enriched_reservations)
+        meals_cfg = self.config.get("fnb_meals", {})
+        meals = list(meals_cfg.keys()) if meals is None else list(meals)
+        for meal in meals:
+            if meal not in meals_cfg:
+                raise ValueError(f"Meal '{meal}' not configured. Available: {list(meals_cfg.keys())}")
+
+        agg = feats.inhouse
+        if agg.empty:
+            return pd.DataFrame(columns=["date","meal","item","quantity"])
+        d_codes, dates = pd.factorize(agg["date"], sort=True)
+        a_codes, archetypes = pd.factorize(agg["archetype"], sort=True)
+        pax = np.zeros((len(dates), len(archetypes), 2))
+        np.add.at(pax, (d_codes, a_codes, 0), agg["adults"].to_numpy(dtype=float))
+        np.add.at(pax, (d_codes, a_codes, 1), agg["children"].to_numpy(dtype=float))
+
+        keys, base, mults = self.compiled.meals_for(meals, archetypes)
+        # quantity[d, k] = sum_a sum_s pax[d, a, s] * base[k, s] * mults[a, k]
+        qty = np.einsum("das,ks,ak->dk", pax, base, mults, optimize=True)
+        return pd.DataFrame({
+            "date": np.repeat(np.asarray(dates, dtype=object), len(keys)),
+            "meal": np.tile([m for m, _ in keys], len(dates)),
+            "item": np.tile([i for _, i in keys], len(dates)),
+            "quantity": qty.ravel(),
+        })
@@ -1,33 +1,33 @@
 from __future__ import annotations
 import numpy as np, pandas as pd
 from dataclasses import dataclass
-from typing import Dict
+from typing import Optional
 from .base import BaseForecaster
-from ..features import expand_reservations_daily, count_inhouse_by_day_and_archetype
+from ..features import FeatureCache
+from ..profiling import stage
 
 @dataclass
 class LaborForecaster(BaseForecaster):
-    def predict(self, enriched_reservations: pd.DataFrame, shift_hours: float = 8.0, utilization: float = 0.85) -> pd.DataFrame:
-        df = self._ensure_dates(enriched_reservations)
-        cfg = self.config.get("housekeeping", {})
-        min_checkout = float(cfg.get("minutes_per_checkout", 45))
-        min_stay = float(cfg.get("minutes_per_stayover", 20))
-        mults: Dict[str, float] = cfg.get("archetype_multipliers", {})
+    @stage("labor.predict")
+    def predict(self, enriched_reservations: Optional[pd.DataFrame], shift_hours: float = 8.0, utilization: float = 0.85,
+                *, features: Optional[FeatureCache] = None) -> pd.DataFrame:
+        feats = features if features is not None else FeatureCache(enriched_reservations)
+        cc = self.compiled
+        hk = cc.housekeeping
+        min_checkout, min_stay = hk["minutes_per_checkout"], hk["minutes_per_stayover"]
         if utilization is None:
-            utilization = float(cfg.get("target_utilization", 0.85))
+            utilization = hk["target_utilization"]
 
-        daily = expand_reservations_daily(df)
-        dep = df.copy()
-        dep["date"] = dep["departure_date"].dt.date
-        checkouts = dep.groupby(["date","archetype"]).reservation_id.count().rename("checkouts").reset_index()
-        agg = count_inhouse_by_day_and_archetype(daily)
+        checkouts = feats.checkouts
+        agg = feats.inhouse
         out = agg.merge(checkouts, on=["date","archetype"], how="left").fillna({"checkouts":0})
         out["stayovers"] = (out["rooms"] - out["checkouts"]).clip(lower=0)
 
-        def a_mult(a): return float(mults.get(a, 1.0))
+        codes, labels = pd.factorize(out["archetype"], use_na_sentinel=False)
+        a_mult = cc.hk_multipliers_for(labels)[codes]
         out["hk_minutes"] = (
-            out["checkouts"] * min_checkout * out["archetype"].map(a_mult)
-            + out["stayovers"] * min_stay * out["archetype"].map(a_mult)
+            out["checkouts"] * min_checkout * a_mult
+            + out["stayovers"] * min_stay * a_mult
         )
         day = out.groupby("date").agg(
             hk_minutes=("hk_minutes","sum"),
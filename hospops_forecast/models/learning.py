@@ -1,18 +1,19 @@
 from __future__ import annotations
+import copy
 import pandas as pd
 import numpy as np
 from dataclasses import dataclass
 from sklearn.linear_model import LinearRegression
-from ..features import expand_reservations_daily, count_inhouse_by_day_and_archetype
+from ..features import inhouse_by_day_and_archetype
 from .base import BaseForecaster
+from ..profiling import stage
 from ..segmentation.archetypes import Archetype
 
 @dataclass
 class HKLearner(BaseForecaster):
-    def fit(self, enriched_reservations: pd.DataFrame, hk_actual_daily: pd.DataFrame) -> dict:
+    def _design(self, enriched_reservations: pd.DataFrame) -> pd.DataFrame:
         df = self._ensure_dates(enriched_reservations)
-        daily = expand_reservations_daily(df)
-        grp = count_inhouse_by_day_and_archetype(daily)
+        grp = inhouse_by_day_and_archetype(df)
 
         # build daily features: counts per archetype + average LOS
         pivot = grp.pivot_table(index="date", columns="archetype", values="guest_nights", aggfunc="sum").fillna(0.0)
@@ -20,30 +21,38 @@ class HKLearner(BaseForecaster):
         # simple feature: total checkouts per day
         dep = df.copy(); dep["date"] = dep["departure_date"].dt.date
         checkouts = dep.groupby("date").reservation_id.count().rename("checkouts")
-        X = pivot.join(checkouts, how="left").fillna(0.0)
+        return pivot.join(checkouts, how="left").fillna(0.0)
+
+    @staticmethod
+    def _multipliers(columns, coef) -> dict:
+        # Translate coefficients into a simple multiplier suggestion for archetypes
+        # Baseline minutes per guest-night surrogate
+        coefs = dict(zip(list(columns), np.asarray(coef).tolist()))
+        gn_cols = [c for c in columns if c.startswith("gn_")]
+        mults = {}
+        baseline = np.mean([coefs.get(c, 0.0) for c in gn_cols]) or 1.0
+        for a in [a.value for a in Archetype]:
+            key = f"gn_{a}"
+            val = coefs.get(key, baseline)
+            mults[a] = float(max(0.5, min(3.0, val / baseline)))
+        return mults
+
+    @stage("learn.hk")
+    def fit(self, enriched_reservations: pd.DataFrame, hk_actual_daily: pd.DataFrame) -> dict:
+        X = self._design(enriched_reservations)
 
         y = hk_actual_daily.copy()
         y["date"] = pd.to_datetime(y["date"]).dt.date
         y = y.groupby("date").hk_man_hours.sum()
 
-        X, y = X.align(y, join="inner")
+        X, y = X.align(y, join="inner", axis=0)
         if len(X) == 0:
             raise ValueError("No overlapping dates for learning.")
 
         model = LinearRegression()
         model.fit(X.values, y.values)
-        coefs = dict(zip(X.columns.tolist(), model.coef_.tolist()))
-
-        # Translate coefficients into a simple multiplier suggestion for archetypes
-        # Baseline minutes per guest-night surrogate
-        gn_cols = [c for c in X.columns if c.startswith("gn_")]
-        mults = {}
-        baseline = np.mean([coefs.get(c, 0.0) for c in gn_cols]) or 1.0
-        for a in [a.value for a in Archetype]:
-            key = f"gn_{a}"
-            val = coefs.get(key, baseline)
-            mults[a] = float(max(0.5, min(3.0, val / baseline)))
-        out = self.config.copy()
+        mults = self._multipliers(X.columns.tolist(), model.coef_)
+        out = copy.deepcopy(self.config or {})  # `config` may be a cached CompiledConfig's raw dict
         out.setdefault("housekeeping", {})
         out["housekeeping"].setdefault("archetype_multipliers", {})
         out["housekeeping"]["archetype_multipliers"].update(mults)
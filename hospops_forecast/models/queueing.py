@@ -1,20 +1,43 @@
 from __future__ import annotations
-import math
+import numpy as np
+
+def log_erlang_b(offered_load, c) -> np.ndarray:
+    # log of the Erlang B blocking probability via the inverse recursion in log space:
+    # 1/B(k) = 1 + (k/a) * 1/B(k-1), B(0) = 1  ->  L(k) = logaddexp(0, log(k/a) + L(k-1)), B = exp(-L)
+    a, c = np.broadcast_arrays(np.asarray(offered_load, dtype=float), np.asarray(c, dtype=np.int64))
+    inv = np.zeros(a.shape)
+    log_a = np.log(np.where(a > 0, a, 1.0))
+    for k in range(1, int(c.max(initial=0)) + 1):
+        step = k <= c
+        inv = np.where(step, np.logaddexp(0.0, np.log(k) - log_a + inv), inv)
+    return np.where(a > 0, -inv, np.where(c > 0, -np.inf, 0.0))
+
+def erlang_c_from_b(log_b, rho) -> np.ndarray:
+    # P(wait) for M/M/c from Erlang B: C = B / (1 - rho * (1 - B)); only meaningful for rho < 1
+    b = np.exp(log_b)
+    return b / (1.0 - rho * (1.0 - b))
+
+def erlang_c_wait_minutes_array(arrival_rate_per_hour, service_rate_per_agent_per_hour: float, c) -> np.ndarray:
+    # vectorized erlang_c_wait_minutes; inf wherever the queue is unstable
+    lam = np.asarray(arrival_rate_per_hour, dtype=float)
+    c = np.asarray(c, dtype=np.int64)
+    mu = float(service_rate_per_agent_per_hour)
+    cap = np.maximum(c, 1) * mu
+    rho = lam / cap
+    stable = (c > 0) & (rho < 1.0)
+    p_wait = erlang_c_from_b(log_erlang_b(lam / mu, np.where(stable, c, 0)), np.where(stable, rho, 0.0))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(stable, p_wait / (cap - lam) * 60.0, np.inf)
 
 def erlang_c_wait_minutes(arrival_rate_per_hour: float, service_rate_per_agent_per_hour: float, c: int) -> float:
     # Returns expected waiting time in **minutes** for M/M/c
-    lam = arrival_rate_per_hour
-    mu = service_rate_per_agent_per_hour
+    lam = float(arrival_rate_per_hour)
+    mu = float(service_rate_per_agent_per_hour)
     if c <= 0 or mu <= 0:
         return float("inf")
     rho = lam / (c * mu)
     if rho >= 1.0:
         return float("inf")
-    a = lam / mu
-    # compute P0
-    sum_terms = sum((a**n) / math.factorial(n) for n in range(c))
-    last = (a**c) / math.factorial(c) * (1/(1 - rho))
-    P0 = 1.0 / (sum_terms + last)
-    P_wait = ((a**c) / math.factorial(c)) * (1/(1 - rho)) * P0
-    Wq_hours = P_wait / (c * mu - lam)  # hours
+    p_wait = float(erlang_c_from_b(log_erlang_b(lam / mu, c), rho))
+    Wq_hours = p_wait / (c * mu - lam)  # hours
     return Wq_hours * 60.0
@@ -1,127 +1,109 @@
 from __future__ import annotations
 import numpy as np, pandas as pd
 from dataclasses import dataclass
-from datetime import time
-from typing import Dict
+from typing import Dict, Optional, Sequence, Tuple
 from .base import BaseForecaster
-from ..features import arrivals_by_day_and_archetype, expand_reservations_daily, count_inhouse_by_day_and_archetype
-from .queueing import erlang_c_wait_minutes
+from ..features import FeatureCache
+from ..profiling import stage
+from .staffing import staffing_table
 
-def _hours_to_bins(distribution: Dict[str, float], date: pd.Timestamp) -> Dict[pd.Timestamp, float]:
-    out = {}
-    base_date = pd.Timestamp(date).date()
-    for hhmm, w in distribution.items():
-        h, m = hhmm.split(":")
-        ts = pd.Timestamp.combine(base_date, time(int(h), int(m)))
-        out[ts] = float(w)
-    s = sum(out.values())
-    if s > 0: out = {k: v / s for k, v in out.items()}
-    return out
+def _hhmm_to_minutes(hhmm: str) -> int:
+    h, m = hhmm.split(":")
+    return int(h) * 60 + int(m)
+
+def compile_distributions(dist_cfg: Dict[str, Dict[str, float]], archetypes: Sequence[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Archetype x time-slot weights (rows normalized to 1) for the given archetype order.
+
+    Returns ``(slot_minutes, weights, support)``; ``support`` marks the slots an archetype lists,
+    so zero-weight slots still appear in the output like they did with per-date dicts.
+    """
+    rows = [dist_cfg.get(a, dist_cfg["Other"]) for a in archetypes]
+    slots = sorted({_hhmm_to_minutes(k) for r in rows for k in r})
+    col = {m: i for i, m in enumerate(slots)}
+    weights = np.zeros((len(rows), len(slots)))
+    support = np.zeros((len(rows), len(slots)), dtype=bool)
+    for i, r in enumerate(rows):
+        for hhmm, w in r.items():
+            j = col[_hhmm_to_minutes(hhmm)]
+            weights[i, j] = float(w); support[i, j] = True
+        s = sum(float(w) for w in r.values())  # in config order, independent of the slot layout
+        if s > 0: weights[i] /= s
+    return np.asarray(slots, dtype=np.int64), weights, support
+
+def _date_by_archetype(counts: pd.DataFrame, value: pd.Series) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    # dense (date x archetype) load and presence from a long (date, archetype) frame
+    d_codes, dates = pd.factorize(counts["date"], sort=True)
+    a_codes, archetypes = pd.factorize(counts["archetype"], sort=True)
+    load = np.zeros((len(dates), len(archetypes)))
+    present = np.zeros((len(dates), len(archetypes)), dtype=bool)
+    np.add.at(load, (d_codes, a_codes), value.to_numpy(dtype=float))
+    present[d_codes, a_codes] = True
+    return np.asarray(dates), np.asarray(archetypes), load, present
 
 @dataclass
 class ServiceLoadForecaster(BaseForecaster):
-    def predict(self, enriched_reservations: pd.DataFrame, area: str, utilization: float = 0.85, target_wait_min: float | None = None) -> pd.DataFrame:
-        df = self._ensure_dates(enriched_reservations)
+    @stage("service.predict")
+    def predict(self, enriched_reservations: Optional[pd.DataFrame], area: str, utilization: float = 0.85, target_wait_min: float | None = None,
+                *, features: Optional[FeatureCache] = None) -> pd.DataFrame:
+        feats = features if features is not None else FeatureCache(enriched_reservations)
         area = area.lower().strip()
         if area not in {"reception","breakfast"}:
             raise ValueError("area must be 'reception' or 'breakfast'")
         if area == "reception":
-            return self._reception(df, utilization, target_wait_min)
+            return self._reception(feats, utilization, target_wait_min)
         else:
-            return self._breakfast(df, utilization, target_wait_min)
+            return self._breakfast(feats, utilization, target_wait_min)
 
-    def _reception(self, df: pd.DataFrame, utilization: float, target_wait_min: float | None) -> pd.DataFrame:
+    def _reception(self, feats: FeatureCache, utilization: float, target_wait_min: float | None) -> pd.DataFrame:
         cfg = self.config["service_load"]["reception"]
         t_per_agent = float(cfg["transactions_per_agent_per_hour"])
         util = utilization if utilization is not None else float(cfg.get("utilization", 0.85))
-        dist_cfg = cfg["distributions"]
         if target_wait_min is None:
             target_wait_min = float(self.config.get("service_sla", {}).get("default_target_wait_min", 5.0))
 
-        arrivals = arrivals_by_day_and_archetype(df)
-        frames = []
-        for date, g in arrivals.groupby("date"):
-            hourly = {}
-            for _, r in g.iterrows():
-                arche = r["archetype"]; n = r["arrivals"]
-                dist = _hours_to_bins(dist_cfg.get(arche, dist_cfg["Other"]), pd.Timestamp(date))
-                for ts, w in dist.items():
-                    hourly[ts] = hourly.get(ts, 0.0) + n * w
-            if not hourly: continue
-            tmp = pd.DataFrame({"datetime": list(hourly.keys()), "expected_transactions": list(hourly.values())}).sort_values("datetime")
-            tmp["area"] = "reception"
-            # Two staffing modes
-            # Utilization-based:
-            tmp["staff_util"] = np.ceil(tmp["expected_transactions"] / (t_per_agent * util)).astype(int).clip(lower=1)
-            # SLA-based (Erlang C); solve minimal c s.t. E[Wq] <= target
-            staff_sla = []
-            for x in tmp["expected_transactions"]:
-                lam = x  # arrivals per hour
-                mu = t_per_agent  # service rate per agent per hour
-                c = 1
-                if lam == 0:
-                    staff_sla.append(0)
-                    continue
-                while c < 200:
-                    wq = erlang_c_wait_minutes(lam, mu, c)
-                    rho = lam/(c*mu)
-                    if (wq <= target_wait_min) and (rho < util):
-                        break
-                    c += 1
-                staff_sla.append(c)
-            tmp["staff_sla"] = staff_sla
-            tmp["recommended_staff"] = np.maximum(tmp["staff_util"], tmp["staff_sla"]).astype(int)
-            tmp["load_status"] = np.where(
-                tmp["expected_transactions"] <= t_per_agent * util * tmp["recommended_staff"] * 0.7, "Green",
-                np.where(tmp["expected_transactions"] <= t_per_agent * util * tmp["recommended_staff"], "Amber","Red")
-            )
-            frames.append(tmp)
-        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=["datetime","expected_transactions","area","recommended_staff","load_status"])
+        arrivals = feats.arrivals
+        out = self._hourly(arrivals, arrivals["arrivals"], "reception", "expected_transactions")
+        return self._staff(out, "reception", "expected_transactions", t_per_agent, util, target_wait_min)
 
-    def _breakfast(self, df: pd.DataFrame, utilization: float, target_wait_min: float | None) -> pd.DataFrame:
+    def _breakfast(self, feats: FeatureCache, utilization: float, target_wait_min: float | None) -> pd.DataFrame:
         cfg = self.config["service_load"]["breakfast"]
         covers_per_staff = float(cfg["covers_per_staff_per_hour"])
         util = utilization if utilization is not None else float(cfg.get("utilization", 0.85))
-        dist_cfg = cfg["distributions"]
         if target_wait_min is None:
             target_wait_min = float(self.config.get("service_sla", {}).get("default_target_wait_min", 5.0))
 
-        daily = expand_reservations_daily(df)
-        agg = count_inhouse_by_day_and_archetype(daily)
+        agg = feats.inhouse
+        out = self._hourly(agg, agg["adults"] + agg["children"], "breakfast", "expected_covers")
+        # SLA using Erlang C on covers as "transactions"
+        return self._staff(out, "breakfast", "expected_covers", covers_per_staff, util, target_wait_min)
+
+    def _hourly(self, counts: pd.DataFrame, value: pd.Series, area: str, col: str) -> pd.DataFrame:
+        if counts.empty:
+            return pd.DataFrame({"datetime": pd.Series(dtype="datetime64[ns]"), col: pd.Series(dtype=float)})
+        dates, archetypes, load, present = _date_by_archetype(counts, value)
+        slots, weights, support = self.compiled.distributions_for(area, archetypes)
+        # (date x archetype) @ (archetype x slot) for the whole horizon at once
+        hourly = load @ weights
+        listed = (present.astype(float) @ support.astype(float)) > 0
+        d_idx, s_idx = np.nonzero(listed)
+        ts = pd.to_datetime(pd.Series(dates[d_idx])) + pd.to_timedelta(slots[s_idx], unit="min")
+        return pd.DataFrame({"datetime": ts.to_numpy(), col: hourly[d_idx, s_idx]})
 
-        frames = []
-        for date, g in agg.groupby("date"):
-            hourly = {}
-            for _, r in g.iterrows():
-                arche = r["archetype"]
-                covers = r["adults"] + r["children"]
-                dist = _hours_to_bins(dist_cfg.get(arche, dist_cfg["Other"]), pd.Timestamp(date))
-                for ts, w in dist.items():
-                    hourly[ts] = hourly.get(ts, 0.0) + covers * w
-            if not hourly: continue
-            tmp = pd.DataFrame({"datetime": list(hourly.keys()), "expected_covers": list(hourly.values())}).sort_values("datetime")
-            tmp["area"] = "breakfast"
-            tmp["staff_util"] = np.ceil(tmp["expected_covers"] / (covers_per_staff * util)).astype(int).clip(lower=1)
-            # SLA using Erlang C on covers as "transactions"
-            staff_sla = []
-            for x in tmp["expected_covers"]:
-                lam = x
-                mu = covers_per_staff
-                c = 1
-                if lam == 0:
-                    staff_sla.append(0); continue
-                while c < 200:
-                    wq = erlang_c_wait_minutes(lam, mu, c)
-                    rho = lam/(c*mu)
-                    if (wq <= target_wait_min) and (rho < util):
-                        break
-                    c += 1
-                staff_sla.append(c)
-            tmp["staff_sla"] = staff_sla
-            tmp["recommended_staff"] = np.maximum(tmp["staff_util"], tmp["staff_sla"]).astype(int)
-            tmp["load_status"] = np.where(
-                tmp["expected_covers"] <= covers_per_staff * util * tmp["recommended_staff"] * 0.7, "Green",
-                np.where(tmp["expected_covers"] <= covers_per_staff * util * tmp["recommended_staff"], "Amber","Red")
-            )
-            frames.append(tmp)
-        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=["datetime","expected_covers","area","recommended_staff","load_status"])
+    @staticmethod
+    def _staff(tmp: pd.DataFrame, area: str, col: str, rate: float, util: float, target_wait_min: float) -> pd.DataFrame:
+        if tmp.empty:
+            return pd.DataFrame(columns=["datetime",col,"area","recommended_staff","load_status"])
+        tmp["area"] = area
+        load = tmp[col].to_numpy()
+        # Two staffing modes
+        # Utilization-based:
+        tmp["staff_util"] = np.ceil(load / (rate * util)).astype(int).clip(min=1)
+        # SLA-based (Erlang C); minimal c s.t. E[Wq] <= target
+        tmp["staff_sla"] = staffing_table(rate, target_wait_min, util).staff(load)
+        staff = np.maximum(tmp["staff_util"].to_numpy(), tmp["staff_sla"].to_numpy()).astype(int)
+        tmp["recommended_staff"] = staff
+        tmp["load_status"] = np.where(
+            load <= rate * util * staff * 0.7, "Green",
+            np.where(load <= rate * util * staff, "Amber","Red")
+        )
+        return tmp
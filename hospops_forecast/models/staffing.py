@@ -0,0 +1,171 @@
+from __future__ import annotations
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional, Tuple
+import numpy as np
+from .queueing import erlang_c_from_b, erlang_c_wait_minutes_array
+from ..profiling import stage
+
+def utilization_floor(arrival_rate, service_rate, max_utilization) -> np.ndarray:
+    # smallest c >= 1 with lam / (c * mu) < max_utilization (and < 1, where Erlang C is finite)
+    lam = np.asarray(arrival_rate, dtype=float)
+    cap = np.minimum(np.asarray(max_utilization, dtype=float), 1.0)
+    c = np.maximum(np.floor(lam / (service_rate * cap)) + 1, 1)
+    # the float division above can land one agent off; settle it with the exact comparison used downstream
+    c = np.where(lam / (c * service_rate) < cap, c, c + 1)
+    lower = np.maximum(c - 1, 1)
+    c = np.where((lower < c) & (lam / (lower * service_rate) < cap), lower, c)
+    return c.astype(np.int64)
+
+@stage("staffing.required_staff")
+def required_staff(arrival_rate, service_rate: float, target_wait_min, max_utilization) -> np.ndarray:
+    """Minimal agents per bucket so that E[Wq] <= target_wait_min and utilization < max_utilization.
+
+    Buckets with no arrivals need 0 agents. The search starts at the utilization bound and walks the
+    log-space Erlang B recursion once for all buckets together (each extra agent is O(1) per bucket).
+    """
+    lam = np.asarray(arrival_rate, dtype=float)
+    shape = lam.shape
+    lam = lam.ravel()
+    target = np.broadcast_to(np.asarray(target_wait_min, dtype=float), shape).ravel()
+    cap = np.broadcast_to(np.asarray(max_utilization, dtype=float), shape).ravel()
+    mu = float(service_rate)
+    if mu <= 0:
+        raise ValueError("service_rate must be positive")
+    if not (np.isfinite(target).all() and (target > 0).all()):
+        raise ValueError("target_wait_min must be positive and finite")
+    if not (cap > 0).all():
+        raise ValueError("max_utilization must be positive")
+    if not np.isfinite(lam).all():
+        raise ValueError("arrival rates must be finite")
+
+    out = np.zeros(lam.shape, dtype=np.int64)
+    busy = lam > 0
+    if not busy.any():
+        return out.reshape(shape)
+    # identical (load, target, cap) buckets share one solve
+    keys = np.stack([lam[busy], target[busy], cap[busy]], axis=1)
+    uniq, inv = np.unique(keys, axis=0, return_inverse=True)
+    u_lam, u_target, u_cap = uniq[:, 0], uniq[:, 1], uniq[:, 2]
+    a = u_lam / mu
+    log_a = np.log(a)
+    floor = utilization_floor(u_lam, mu, u_cap)
+
+    staff = np.zeros(len(uniq), dtype=np.int64)
+    open_ = np.ones(len(uniq), dtype=bool)
+    inv_b = np.zeros(len(uniq))
+    k = 0
+    while open_.any():
+        k += 1
+        inv_b = np.logaddexp(0.0, np.log(k) - log_a + inv_b)
+        check = open_ & (k >= floor)
+        if check.any():
+            rho = a[check] / k
+            wq = erlang_c_from_b(-inv_b[check], rho) / (k * mu - u_lam[check]) * 60.0
+            hit = np.zeros(len(uniq), dtype=bool)
+            hit[check] = wq <= u_target[check]
+            staff[hit] = k
+            open_ &= ~hit
+    out[busy] = staff[inv.ravel()]
+    return out.reshape(shape)
+
+TABLE_VERSION = 1
+TABLE_CACHE_SIZE = 32
+_BISECT_STEPS = 64
+_TABLES: "OrderedDict[Tuple[float, float, float], StaffingTable]" = OrderedDict()
+_CACHE_DIR: Optional[Path] = None
+
+@dataclass
+class StaffingTable:
+    """Step function arrival rate -> minimal staff for one (service rate, wait target, utilization cap).
+
+    ``wait_bounds[c - 1]`` is the largest arrival rate at which ``c`` agents still meet the wait target;
+    the utilization cap is applied exactly via ``utilization_floor``.
+    """
+    service_rate: float
+    target_wait_min: float
+    max_utilization: float
+    wait_bounds: np.ndarray = field(default_factory=lambda: np.zeros(0))
+    path: Optional[Path] = None
+
+    @stage("staffing.search")
+    def extend(self, max_staff: int) -> None:
+        have = len(self.wait_bounds)
+        if max_staff <= have:
+            return
+        c = np.arange(have + 1, max_staff + 1)
+        lo, hi = np.zeros(len(c)), c * self.service_rate
+        for _ in range(_BISECT_STEPS):
+            mid = (lo + hi) / 2
+            ok = erlang_c_wait_minutes_array(mid, self.service_rate, c) <= self.target_wait_min
+            lo, hi = np.where(ok, mid, lo), np.where(ok, hi, mid)
+        self.wait_bounds = np.concatenate([self.wait_bounds, lo])
+        if self.path is not None:
+            self.save(self.path)
+
+    def staff(self, arrival_rate, max_utilization=None) -> np.ndarray:
+        # `max_utilization` (broadcast against the rates) overrides the table's cap; the wait bounds don't depend on it
+        lam = np.asarray(arrival_rate, dtype=float)
+        if not np.isfinite(lam).all():
+            raise ValueError("arrival rates must be finite")
+        busy = lam > 0
+        if not busy.any():
+            return np.zeros(lam.shape, dtype=np.int64)
+        top = lam[busy].max()
+        while len(self.wait_bounds) == 0 or self.wait_bounds[-1] < top:
+            self.extend(max(32, 2 * len(self.wait_bounds)))
+        by_wait = np.searchsorted(self.wait_bounds, lam, side="left") + 1
+        cap = self.max_utilization if max_utilization is None else max_utilization
+        by_util = utilization_floor(lam, self.service_rate, cap)
+        return np.where(busy, np.maximum(by_wait, by_util), 0).astype(np.int64)
+
+    def save(self, path: Path) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "wb") as f:
+            np.savez(f, version=TABLE_VERSION, params=[self.service_rate, self.target_wait_min, self.max_utilization],
+                     wait_bounds=self.wait_bounds)
+
+    @classmethod
+    def load(cls, path: Path) -> "StaffingTable":
+        with np.load(path) as z:
+            if int(z["version"]) != TABLE_VERSION:
+                raise ValueError(f"Staffing table {path} has version {int(z['version'])}, expected {TABLE_VERSION}")
+            mu, target, cap = (float(v) for v in z["params"])
+            return cls(mu, target, cap, wait_bounds=z["wait_bounds"].copy(), path=Path(path))
+
+def set_table_cache_dir(path: Optional[Path]) -> None:
+    global _CACHE_DIR
+    _CACHE_DIR = Path(path) if path is not None else None
+
+def table_cache_dir_for(config_path: Path) -> Path:
+    # tables live next to the config they were built for
+    config_path = Path(config_path)
+    return config_path.parent / f".{config_path.stem}.staffing"
+
+def staffing_table(service_rate: float, target_wait_min: float, max_utilization: float) -> StaffingTable:
+    key = (float(service_rate), float(target_wait_min), float(max_utilization))
+    table = _TABLES.get(key)
+    if table is not None:
+        _TABLES.move_to_end(key)
+        return table
+    if key[0] <= 0 or not np.isfinite(key[1]) or key[1] <= 0 or key[2] <= 0:
+        raise ValueError("service_rate, target_wait_min and max_utilization must be positive")
+    path = None
+    if _CACHE_DIR is not None:
+        path = _CACHE_DIR / f"staffing_v{TABLE_VERSION}_{key[0]:g}_{key[1]:g}_{key[2]:g}.npz"
+    try:
+        table = StaffingTable.load(path) if path is not None and path.exists() else None
+    except (OSError, ValueError, KeyError):
+        table = None
+    if table is None or (table.service_rate, table.target_wait_min, table.max_utilization) != key:
+        table = StaffingTable(*key, path=path)
+    # wait bounds do not depend on the utilization cap: start from the longest sibling's search
+    for (mu, target, _), other in _TABLES.items():
+        if (mu, target) == key[:2] and len(other.wait_bounds) > len(table.wait_bounds):
+            table.wait_bounds = other.wait_bounds.copy()
+    _TABLES[key] = table
+    while len(_TABLES) > TABLE_CACHE_SIZE:
+        _TABLES.popitem(last=False)
+    return table
@@ -0,0 +1,234 @@
+from __future__ import annotations
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Set, Tuple
+import numpy as np
+import pandas as pd
+from .features import FeatureCache, INHOUSE_COLUMNS, ensure_datetime
+from .segmentation.archetypes import Archetype
+
+# counter fields along the last axis of OccupancyState._counts
+ROOMS, ADULTS, CHILDREN, ARRIVALS, ARR_ADULTS, ARR_CHILDREN, CHECKOUTS = range(7)
+_N_FIELDS = 7
+
+Stay = Tuple[int, int, int, int, int]  # arrival day, departure day, archetype code, adults, children
+
+def _day(value) -> int:
+    ts = pd.Timestamp(value)
+    if pd.isna(ts):
+        raise ValueError("arrival_date and departure_date are required")
+    return int(np.datetime64(ts.normalize().date(), "D").astype(np.int64))
+
+def _to_dates(days: np.ndarray) -> np.ndarray:
+    return np.asarray(days, dtype=np.int64).astype("datetime64[D]").astype(object)
+
+class OccupancyState:
+    """Per-(date, archetype) counters kept up to date from reservation add/modify/cancel events.
+
+    Each event touches only the nights of the affected stay, so the cost is proportional to the
+    length of stay rather than to the size of the book. Days touched since the last
+    ``clear_dirty()`` are tracked so forecasters can re-derive just those days.
+    Reservation ids are unique: adding an id that already exists replaces it.
+    """
+
+    def __init__(self, archetypes: Optional[Sequence[str]] = None):
+        self.archetypes: List[str] = list(archetypes) if archetypes is not None else [a.value for a in Archetype]
+        self._code: Dict[str, int] = {a: i for i, a in enumerate(self.archetypes)}
+        self._origin = 0
+        self._counts = np.zeros((0, len(self.archetypes), _N_FIELDS), dtype=np.int64)
+        self._stays: Dict[str, Stay] = {}
+        # stays from a bulk load stay columnar; events only touch the dict above
+        self._bulk_ids = pd.Index([], dtype=object)
+        self._bulk = np.zeros((0, 5), dtype=np.int64)
+        self._bulk_live = np.zeros(0, dtype=bool)
+        self._dirty: Set[int] = set()
+
+    def __len__(self) -> int:
+        return len(self._stays) + int(self._bulk_live.sum())
+
+    def __contains__(self, reservation_id: str) -> bool:
+        return self._find(str(reservation_id)) is not None
+
+    def _find(self, rid: str) -> Optional[Stay]:
+        if rid in self._stays:
+            return self._stays[rid]
+        i = self._bulk_row(rid)
+        if i is not None and self._bulk_live[i]:
+            return tuple(int(v) for v in self._bulk[i])  # type: ignore[return-value]
+        return None
+
+    def _bulk_row(self, rid: str) -> Optional[int]:
+        try:
+            return int(self._bulk_ids.get_loc(rid))
+        except KeyError:
+            return None
+
+    def _pop(self, rid: str) -> Optional[Stay]:
+        stay = self._find(rid)
+        if stay is not None and self._stays.pop(rid, None) is None:
+            self._bulk_live[self._bulk_row(rid)] = False
+        return stay
+
+    # ---- storage -------------------------------------------------------------------------------
+    def _archetype_code(self, archetype: str) -> int:
+        if archetype not in self._code:
+            self._code[archetype] = len(self.archetypes)
+            self.archetypes.append(archetype)
+            pad = np.zeros((self._counts.shape[0], 1, _N_FIELDS), dtype=np.int64)
+            self._counts = np.concatenate([self._counts, pad], axis=1)
+        return self._code[archetype]
+
+    def _reserve(self, lo: int, hi: int) -> None:
+        # make day ordinals lo..hi addressable; grows geometrically so appends stay amortized O(1)
+        n = self._counts.shape[0]
+        if n == 0:
+            self._origin = lo
+            self._counts = np.zeros((hi - lo + 1, len(self.archetypes), _N_FIELDS), dtype=np.int64)
+            return
+        start, end = self._origin, self._origin + n - 1
+        if lo >= start and hi <= end:
+            return
+        new_start = min(lo, start - (n // 2 if lo < start else 0))
+        new_end = max(hi, end + (n // 2 if hi > end else 0))
+        grown = np.zeros((new_end - new_start + 1, len(self.archetypes), _N_FIELDS), dtype=np.int64)
+        grown[start - new_start:start - new_start + n] = self._counts
+        self._counts, self._origin = grown, new_start
+
+    def _apply(self, stay: Stay, sign: int) -> None:
+        a, d, k, adults, children = stay
+        self._reserve(min(a, d), max(a, d))
+        o = self._origin
+        if d > a:
+            self._counts[a - o:d - o, k, ROOMS] += sign
+            self._counts[a - o:d - o, k, ADULTS] += sign * adults
+            self._counts[a - o:d - o, k, CHILDREN] += sign * children
+        self._counts[a - o, k, [ARRIVALS, ARR_ADULTS, ARR_CHILDREN]] += (sign, sign * adults, sign * children)
+        self._counts[d - o, k, CHECKOUTS] += sign
+        self._dirty.update(range(min(a, d), max(a, d) + 1))
+
+    def _stay(self, reservation: Mapping) -> Stay:
+        return (_day(reservation["arrival_date"]), _day(reservation["departure_date"]),
+                self._archetype_code(str(reservation["archetype"])),
+                int(reservation.get("adults", 1)), int(reservation.get("children", 0)))
+
+    # ---- events --------------------------------------------------------------------------------
+    def add(self, reservation: Mapping) -> None:
+        rid = str(reservation["reservation_id"])
+        old = self._pop(rid)
+        if old is not None:
+            self._apply(old, -1)
+        stay = self._stay(reservation)
+        self._apply(stay, +1)
+        self._stays[rid] = stay
+
+    def modify(self, reservation: Mapping) -> None:
+        rid = str(reservation["reservation_id"])
+        if rid not in self:
+            raise KeyError(f"Unknown reservation_id '{rid}'")
+        self.add(reservation)
+
+    def cancel(self, reservation_id: str) -> None:
+        stay = self._pop(str(reservation_id))
+        if stay is None:
+            raise KeyError(f"Unknown reservation_id '{reservation_id}'")
+        self._apply(stay, -1)
+
+    def apply(self, events: pd.DataFrame | Iterable[Mapping]) -> None:
+        # events carry an "event" field: add | modify | cancel, plus the enriched reservation columns
+        rows = events.to_dict(orient="records") if isinstance(events, pd.DataFrame) else events
+        for ev in rows:
+            kind = str(ev.get("event", "add")).lower()
+            if kind == "add":
+                self.add(ev)
+            elif kind == "modify":
+                self.modify(ev)
+            elif kind == "cancel":
+                self.cancel(ev["reservation_id"])
+            else:
+                raise ValueError(f"Unknown event '{kind}'. Expected add|modify|cancel")
+
+    @classmethod
+    def from_enriched(cls, enriched: pd.DataFrame, archetypes: Optional[Sequence[str]] = None) -> "OccupancyState":
+        # bulk load with difference arrays instead of one event per reservation
+        state = cls(archetypes)
+        df = enriched.drop_duplicates("reservation_id", keep="last")
+        arr = ensure_datetime(df["arrival_date"]).to_numpy(dtype="datetime64[ns]").astype("datetime64[D]")
+        dep = ensure_datetime(df["departure_date"]).to_numpy(dtype="datetime64[ns]").astype("datetime64[D]")
+        ok = ~(np.isnat(arr) | np.isnat(dep)) & df["archetype"].notna().to_numpy()
+        if not ok.any():
+            return state
+        df = df[ok]
+        a, d = arr[ok].astype(np.int64), dep[ok].astype(np.int64)
+        codes, uniques = pd.factorize(df["archetype"].astype(str))
+        k = np.array([state._archetype_code(u) for u in uniques], dtype=np.int64)[codes]
+        adults = df["adults"].fillna(0).to_numpy(dtype=np.int64)
+        children = df["children"].fillna(0).to_numpy(dtype=np.int64)
+        state._reserve(int(min(a.min(), d.min())), int(max(a.max(), d.max())) + 1)
+        o, c = state._origin, state._counts
+        nights = d > a
+        for field, w in ((ROOMS, np.ones_like(a)), (ADULTS, adults), (CHILDREN, children)):
+            delta = np.zeros(c.shape[:2], dtype=np.int64)
+            np.add.at(delta, (a[nights] - o, k[nights]), w[nights])
+            np.add.at(delta, (d[nights] - o, k[nights]), -w[nights])
+            c[:, :, field] += delta.cumsum(axis=0)
+        for field, w in ((ARRIVALS, np.ones_like(a)), (ARR_ADULTS, adults), (ARR_CHILDREN, children)):
+            np.add.at(c[:, :, field], (a - o, k), w)
+        np.add.at(c[:, :, CHECKOUTS], (d - o, k), 1)
+        state._bulk_ids = pd.Index(df["reservation_id"].astype(str).to_numpy(dtype=object))
+        state._bulk = np.column_stack([a, d, k, adults, children])
+        state._bulk_live = np.ones(len(a), dtype=bool)
+        return state
+
+    # ---- views ---------------------------------------------------------------------------------
+    def dirty_dates(self) -> list:
+        return list(_to_dates(np.array(sorted(self._dirty), dtype=np.int64)))
+
+    def clear_dirty(self) -> None:
+        self._dirty.clear()
+
+    def _view(self, dates: Optional[Iterable]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        # counters for the requested days with archetypes in name order, like the batch groupbys
+        days = self._days(dates)
+        order = np.argsort(np.asarray(self.archetypes, dtype=object), kind="stable")
+        return days, np.asarray(self.archetypes, dtype=object)[order], self._counts[days][:, order]
+
+    def _days(self, dates: Optional[Iterable]) -> np.ndarray:
+        n = self._counts.shape[0]
+        if dates is None:
+            return np.arange(n)
+        days = np.array(sorted({_day(x) for x in dates}), dtype=np.int64) - self._origin
+        return days[(days >= 0) & (days < n)]
+
+    def inhouse(self, dates: Optional[Iterable] = None) -> pd.DataFrame:
+        days, names, c = self._view(dates)
+        day, code = np.nonzero(c[:, :, ROOMS] > 0)
+        if len(day) == 0:
+            return pd.DataFrame(columns=INHOUSE_COLUMNS)
+        rooms, adults, children = (c[:, :, f] for f in (ROOMS, ADULTS, CHILDREN))
+        return pd.DataFrame({
+            "date": _to_dates(days[day] + self._origin),
+            "archetype": names[code],
+            "rooms": rooms[day, code],
+            "adults": adults[day, code],
+            "children": children[day, code],
+            "guest_nights": rooms[day, code],
+            "rooms_total": rooms.sum(axis=1)[day],
+            "adults_total": adults.sum(axis=1)[day],
+            "children_total": children.sum(axis=1)[day],
+            "guest_nights_total": rooms.sum(axis=1)[day],
+        })
+
+    def _per_day(self, dates: Optional[Iterable], fields: Dict[str, int], key: int) -> pd.DataFrame:
+        days, names, c = self._view(dates)
+        day, code = np.nonzero(c[:, :, key] > 0)
+        out = {"date": _to_dates(days[day] + self._origin), "archetype": names[code]}
+        out.update({name: c[day, code, f] for name, f in fields.items()})
+        return pd.DataFrame(out, columns=["date","archetype"] + list(fields))
+
+    def arrivals(self, dates: Optional[Iterable] = None) -> pd.DataFrame:
+        return self._per_day(dates, {"arrivals": ARRIVALS, "arriving_adults": ARR_ADULTS, "arriving_children": ARR_CHILDREN}, ARRIVALS)
+
+    def checkouts(self, dates: Optional[Iterable] = None) -> pd.DataFrame:
+        return self._per_day(dates, {"checkouts": CHECKOUTS}, CHECKOUTS)
+
+    def features(self, dates: Optional[Iterable] = None) -> FeatureCache:
+        # a FeatureCache any forecaster accepts via features=, limited to `dates` (e.g. dirty_dates())
+        return FeatureCache.from_intermediates(inhouse=self.inhouse(dates), arrivals=self.arrivals(dates), checkouts=self.checkouts(dates))
@@ -0,0 +1,59 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+import pandas as pd
+from .features import FeatureCache
+from .io import write_table
+from .models.base import BaseForecaster
+from .models.labor import LaborForecaster
+from .models.fnb import FNBConsumptionForecaster
+from .models.service import ServiceLoadForecaster
+from .models.departments import DepartmentForecaster
+from .models.airline import AirlineForecaster
+from .profiling import stage
+
+SERVICE_AREAS = ("reception", "breakfast")
+
+@dataclass
+class ForecastPipeline(BaseForecaster):
+    utilization: float = 0.85
+    target_wait_min: Optional[float] = None
+
+    def tasks(self, flights: Optional[pd.DataFrame] = None) -> List[Tuple[str, Callable[[FeatureCache], pd.DataFrame]]]:
+        cfg = self.compiled  # compiled once, shared by every task
+        # Callable[..., ...]: the loop lambdas bind their label as a default argument
+        out: List[Tuple[str, Callable[..., pd.DataFrame]]] = [
+            ("labor", lambda f: LaborForecaster.from_compiled(cfg).predict(None, utilization=self.utilization, features=f)),
+        ]
+        for meal in cfg.raw.get("fnb_meals", {}):
+            out.append((f"fnb_{meal}", lambda f, m=meal: FNBConsumptionForecaster.from_compiled(cfg).predict(None, meal=m, features=f)))
+        for area in SERVICE_AREAS:
+            out.append((f"service_{area}", lambda f, a=area: ServiceLoadForecaster.from_compiled(cfg).predict(
+                None, area=a, utilization=self.utilization, target_wait_min=self.target_wait_min, features=f)))
+        for dept in cfg.raw.get("departments", {}):
+            out.append((f"dept_{dept}", lambda f, d=dept: DepartmentForecaster.from_compiled(cfg).predict(None, dept=d, features=f)))
+        if flights is not None:
+            airline: Dict[str, pd.DataFrame] = {}
+            def area_view(f: FeatureCache, a: str) -> pd.DataFrame:
+                if not airline:  # every area from one columnar pass
+                    airline.update({k: g.reset_index(drop=True) for k, g in AirlineForecaster.from_compiled(cfg).predict_all(flights).groupby("area")})
+                return airline.get(a, pd.DataFrame(columns=["datetime","expected_pax","recommended_staff","area"]))
+            for area in cfg.raw.get("airline", {}):
+                out.append((f"airline_{area}", lambda f, a=area: area_view(f, a)))
+        return out
+
+    @stage("pipeline.run")
+    def run(self, enriched: pd.DataFrame | FeatureCache, flights: Optional[pd.DataFrame] = None) -> Dict[str, pd.DataFrame]:
+        # one FeatureCache per input: dates, in-house cube, arrivals and checkouts are built at most once
+        feats = enriched if isinstance(enriched, FeatureCache) else FeatureCache(enriched)
+        return {name: fn(feats) for name, fn in self.tasks(flights)}
+
+    @staticmethod
+    def write(outputs: Dict[str, pd.DataFrame], output_dir: Path, fmt: str = "csv") -> List[Path]:
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        paths = []
+        for name, frame in outputs.items():
+            paths.append(write_table(frame, output_dir / f"{name}.{fmt}"))
+        return paths
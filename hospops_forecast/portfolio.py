@@ -0,0 +1,175 @@
+from __future__ import annotations
+import os, time, traceback
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, as_completed, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import pandas as pd
+import yaml
+from .config.loader import load_config, merge_config
+from .io import FORMATS, TableWriter, read_table, write_enriched, write_table
+from .pipeline import ForecastPipeline
+from .segmentation.segmenter import Segmenter
+
+SUMMARY_COLUMNS = ["property_id","status","reservations","seconds","error"]
+
+@dataclass
+class PropertyJob:
+    property_id: str
+    reservations: Path
+    config: Optional[Path] = None  # YAML overrides merged onto the portfolio config
+    flights: Optional[Path] = None
+
+def discover(source: Path) -> List[PropertyJob]:
+    """Jobs from a directory (one reservation file per property, id = file stem, optional
+    ``<stem>.yaml`` overrides and ``<stem>.flights.csv`` next to it) or a CSV/YAML manifest with
+    ``property_id``, ``reservations`` and optional ``config`` / ``flights`` (paths relative to the manifest)."""
+    source = Path(source)
+    if source.is_dir():
+        jobs = []
+        for p in sorted(source.iterdir()):
+            if p.suffix.lower() not in FORMATS or p.stem.endswith(".flights"):
+                continue
+            cfg = p.with_suffix(".yaml")
+            flights = p.with_name(f"{p.stem}.flights.csv")
+            jobs.append(PropertyJob(p.stem, p, cfg if cfg.exists() else None, flights if flights.exists() else None))
+        return jobs
+    if source.suffix.lower() in (".yaml", ".yml"):
+        with open(source, "r", encoding="utf-8") as f:
+            data = yaml.safe_load(f) or []
+        rows = data.get("properties", []) if isinstance(data, dict) else data
+    else:
+        rows = read_table(source).to_dict(orient="records")
+
+    def rel(v) -> Optional[Path]:
+        if v is None or (isinstance(v, float) and pd.isna(v)) or str(v).strip() == "":
+            return None
+        p = Path(str(v))
+        return p if p.is_absolute() else source.parent / p
+
+    jobs = []
+    for r in rows:
+        reservations = rel(r.get("reservations"))
+        if "property_id" not in r or reservations is None:
+            raise ValueError(f"Manifest rows need property_id and reservations, got {sorted(r)}")
+        jobs.append(PropertyJob(str(r["property_id"]), reservations, rel(r.get("config")), rel(r.get("flights"))))
+    ids = [j.property_id for j in jobs]
+    if len(set(ids)) != len(ids):
+        raise ValueError("Duplicate property_id in manifest")
+    return jobs
+
+# per-process state: the portfolio config is shipped once per worker, not once per property
+_WORKER: Dict[str, Any] = {}
+
+def _init_worker(config: dict, options: dict) -> None:
+    _WORKER.update(config=config, options=options)
+
+def _run_property(job: PropertyJob) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    result: Dict[str, Any] = {"property_id": job.property_id, "status": "ok", "reservations": 0, "error": None, "outputs": {}}
+    try:
+        opts = _WORKER["options"]
+        cfg = _WORKER["config"]
+        if job.config is not None:
+            with open(job.config, "r", encoding="utf-8") as f:
+                cfg = merge_config(cfg, yaml.safe_load(f) or {})
+        enriched = Segmenter().enrich(read_table(job.reservations))
+        if enriched["arrival_date"].notna().sum() == 0:
+            raise ValueError("no reservations with a valid arrival_date")
+        flights = read_table(job.flights) if job.flights is not None else None
+        outputs = ForecastPipeline(cfg, utilization=opts["utilization"], target_wait_min=opts["target_wait_min"]).run(enriched, flights=flights)
+        out_dir = Path(opts["output_dir"]) / job.property_id
+        write_enriched(enriched, out_dir / f"enriched.{opts['fmt']}")
+        paths = ForecastPipeline.write(outputs, out_dir, fmt=opts["fmt"])
+        # only paths go back to the parent; frames stay on disk until consolidation streams them
+        result.update(reservations=len(enriched),
+                      outputs={name: str(p) for (name, out), p in zip(outputs.items(), paths) if not out.empty})
+    except Exception as e:  # one bad property must not stop the batch
+        result.update(status="error", error=f"{type(e).__name__}: {e}", traceback=traceback.format_exc())
+    result["seconds"] = time.perf_counter() - t0
+    return result
+
+def _collect(fut: Future, job: PropertyJob) -> Dict[str, Any]:
+    try:
+        return fut.result()
+    except Exception as e:  # the worker died (e.g. out of memory) or the result could not be sent back
+        return {"property_id": job.property_id, "status": "error", "reservations": 0,
+                "seconds": float("nan"), "error": f"{type(e).__name__}: {e}", "outputs": {}}
+
+def _isolated(jobs: List[PropertyJob], workers: int, config: dict, options: dict) -> List[Dict[str, Any]]:
+    # retry after a pool broke: one single-process pool per job, `workers` at a time, so a property
+    # that kills its worker again fails alone instead of every job in flight with it
+    results, queue = [], list(jobs)
+    running: Dict[Future, tuple] = {}
+    while queue or running:
+        while queue and len(running) < workers:
+            job = queue.pop(0)
+            pool = ProcessPoolExecutor(max_workers=1, initializer=_init_worker, initargs=(config, options))
+            running[pool.submit(_run_property, job)] = (job, pool)
+        done, _ = wait(running, return_when=FIRST_COMPLETED)
+        for fut in done:
+            job, pool = running.pop(fut)
+            results.append(_collect(fut, job))
+            pool.shutdown()
+    return results
+
+@dataclass
+class PortfolioRunner:
+    """Segment and forecast many properties on a process pool.
+
+    Writes ``<output_dir>/<property_id>/`` per property, one consolidated ``portfolio_<forecast>``
+    file per forecast (with a ``property_id`` column) and ``portfolio_summary.csv``.
+    """
+    config: Optional[dict] = None
+    workers: Optional[int] = None
+    utilization: float = 0.85
+    target_wait_min: Optional[float] = None
+    fmt: str = "csv"
+    results: List[Dict[str, Any]] = field(default_factory=list, repr=False)
+
+    def run(self, jobs: List[PropertyJob], output_dir: Path) -> pd.DataFrame:
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        config = self.config if self.config is not None else load_config(None)
+        options = {"utilization": self.utilization, "target_wait_min": self.target_wait_min,
+                   "fmt": self.fmt, "output_dir": str(output_dir)}
+        workers = min(self.workers or os.cpu_count() or 1, max(len(jobs), 1))
+        if workers <= 1:
+            _init_worker(config, options)
+            self.results = [_run_property(j) for j in jobs]
+        else:
+            self.results = []
+            unfinished = []
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(config, options)) as pool:
+                futures = {pool.submit(_run_property, j): j for j in jobs}
+                for fut in as_completed(futures):
+                    if isinstance(fut.exception(), BrokenProcessPool):
+                        unfinished.append(futures[fut])  # a worker died and took the whole pool down
+                    else:
+                        self.results.append(_collect(fut, futures[fut]))
+            if unfinished:
+                self.results.extend(_isolated(unfinished, workers, config, options))
+            order = {j.property_id: i for i, j in enumerate(jobs)}
+            self.results.sort(key=lambda r: order[r["property_id"]])
+        self._consolidate(output_dir)
+        summary = pd.DataFrame([{k: r.get(k) for k in SUMMARY_COLUMNS} for r in self.results], columns=SUMMARY_COLUMNS)
+        write_table(summary, output_dir / "portfolio_summary.csv")
+        return summary
+
+    def _consolidate(self, output_dir: Path) -> List[Path]:
+        # appends the per-property files one at a time, so memory holds a single property's forecast
+        sources: Dict[str, List[tuple]] = {}
+        for r in self.results:
+            for name, path in r["outputs"].items():
+                sources.setdefault(name, []).append((r["property_id"], path))
+        paths = []
+        for name, parts in sources.items():
+            target = output_dir / f"portfolio_{name}.{self.fmt}"
+            with TableWriter(target) as writer:
+                for property_id, path in parts:
+                    df = read_table(path)
+                    df.insert(0, "property_id", property_id)
+                    writer.write(df)
+            paths.append(target)
+        return paths
@@ -0,0 +1,186 @@
+from __future__ import annotations
+import functools, json, threading, time, tracemalloc
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, TypeVar, Union
+
+# Stage instrumentation. `@stage(name)` wraps segmentation, feature builders, forecasters, the staffing
+# search, I/O and calibrators. With no sink active the wrapper is one list check before the call;
+# a `Profile` (CLI --profile) keeps every call with nesting depth and optional tracemalloc peaks,
+# `StageTotals` (API /metrics) only aggregates counts, seconds and rows per stage.
+# Sinks are process-wide; stages that run in portfolio or job worker processes are not seen.
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+@dataclass
+class StageRecord:
+    name: str
+    depth: int
+    start: float  # perf_counter at entry
+    seconds: float
+    rows_in: Optional[int] = None
+    rows_out: Optional[int] = None
+    peak_mb: Optional[float] = None
+
+_sinks: List[Any] = []
+_memory_users = 0
+_local = threading.local()
+
+def _nrows(x: Any) -> Optional[int]:
+    if x is None:
+        return None
+    if isinstance(x, dict):
+        counts = [n for n in (_nrows(v) for v in x.values()) if n is not None]
+        return sum(counts) if counts else None
+    shape = getattr(x, "shape", None)  # DataFrame, Series, ndarray
+    if shape is not None and not isinstance(x, type):
+        return int(shape[0]) if len(shape) else 1
+    rows = getattr(x, "rows", None)  # FeatureCache
+    return rows if isinstance(rows, int) else None
+
+def _rows_in(args: tuple, kwargs: dict) -> Optional[int]:
+    for a in (*args, *kwargs.values()):
+        n = _nrows(a)
+        if n is not None:
+            return n
+    return None
+
+def _run(name: str, fn: Callable, args: tuple, kwargs: dict) -> Any:
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    mem = _memory_users > 0 and tracemalloc.is_tracing()
+    base = 0
+    if mem:
+        # per-stage peaks: park the parent's peak so far, measure this stage from a fresh peak
+        base, peak = tracemalloc.get_traced_memory()
+        if stack:
+            stack[-1][1] = max(stack[-1][1], peak)
+        tracemalloc.reset_peak()
+    frame: List[Any] = [name, 0]  # [stage name, peak bytes of finished children]
+    stack.append(frame)
+    t0 = time.perf_counter()
+    try:
+        out = fn(*args, **kwargs)
+    finally:
+        seconds = time.perf_counter() - t0
+        stack.pop()
+        peak_mb = None
+        if mem:
+            peak = max(tracemalloc.get_traced_memory()[1], frame[1])
+            peak_mb = max(peak - base, 0) / 2**20
+            if stack:
+                stack[-1][1] = max(stack[-1][1], peak)
+    rec = StageRecord(name, len(stack), t0, seconds, _rows_in(args, kwargs), _nrows(out), peak_mb)
+    for sink in tuple(_sinks):
+        sink.add(rec)
+    return out
+
+def stage(name: str) -> Callable[[F], F]:
+    """Record calls of the decorated function as stage ``name`` while a sink is active."""
+    def deco(fn: F) -> F:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _sinks:
+                return fn(*args, **kwargs)
+            return _run(name, fn, args, kwargs)
+        return wrapper  # type: ignore[return-value]
+    return deco
+
+def enabled() -> bool:
+    return bool(_sinks)
+
+class Profile:
+    """Every stage call while active (``with Profile(): ...``), in start order with nesting depth.
+
+    ``memory=True`` traces allocations with tracemalloc (slower, typically 1.5-3x) to report each
+    stage's peak above what was allocated when it started.
+    """
+
+    def __init__(self, memory: bool = True):
+        self.memory = memory
+        self.records: List[StageRecord] = []
+        self.seconds = 0.0
+        self._t0 = 0.0
+        self._started_tracing = False
+        self._lock = threading.Lock()
+
+    def add(self, rec: StageRecord) -> None:
+        with self._lock:
+            self.records.append(rec)
+
+    def __enter__(self) -> "Profile":
+        global _memory_users
+        if self.memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracing = True
+            _memory_users += 1
+        _sinks.append(self)
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        global _memory_users
+        self.seconds = time.perf_counter() - self._t0
+        _sinks.remove(self)
+        if self.memory:
+            _memory_users -= 1
+            if self._started_tracing:
+                tracemalloc.stop()
+                self._started_tracing = False
+
+    def stages(self) -> List[StageRecord]:
+        return sorted(self.records, key=lambda r: r.start)
+
+    def to_dict(self) -> Dict[str, Any]:
+        rows = []
+        for r in self.stages():
+            d = asdict(r)
+            d["start"] = round(r.start - self._t0, 6)
+            rows.append(d)
+        return {"total_seconds": self.seconds, "memory": self.memory, "stages": rows}
+
+    def write_json(self, path: Union[str, Path]) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.to_dict(), indent=2), encoding="utf-8")
+        return path
+
+    def format_table(self) -> str:
+        def num(v, fmt):
+            return "-" if v is None else format(v, fmt)
+        lines = [f"{'stage':40s} {'seconds':>9s} {'rows in':>11s} {'rows out':>11s} {'peak MB':>9s}"]
+        for r in self.stages():
+            lines.append(f"{('  ' * r.depth + r.name)[:40]:40s} {r.seconds:9.4f} {num(r.rows_in, ',d'):>11s} "
+                         f"{num(r.rows_out, ',d'):>11s} {num(r.peak_mb, '.1f'):>9s}")
+        lines.append(f"{'total':40s} {self.seconds:9.4f}")
+        return "\n".join(lines)
+
+class StageTotals:
+    """Running count, seconds and rows per stage name; cheap enough to leave on in a server."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.totals: Dict[str, Dict[str, float]] = {}
+
+    def add(self, rec: StageRecord) -> None:
+        with self._lock:
+            t = self.totals.setdefault(rec.name, {"count": 0, "seconds": 0.0, "rows_in": 0, "rows_out": 0})
+            t["count"] += 1
+            t["seconds"] += rec.seconds
+            t["rows_in"] += rec.rows_in or 0
+            t["rows_out"] += rec.rows_out or 0
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {k: dict(v) for k, v in self.totals.items()}
+
+    def install(self) -> "StageTotals":
+        if self not in _sinks:
+            _sinks.append(self)
+        return self
+
+    def uninstall(self) -> None:
+        if self in _sinks:
+            _sinks.remove(self)
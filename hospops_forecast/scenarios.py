@@ -0,0 +1,290 @@
+from __future__ import annotations
+import itertools, json
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+import numpy as np
+import pandas as pd
+from .config.compiled import CompiledConfig, compile_config
+from .features import FeatureCache
+from .models.base import BaseForecaster
+from .models.service import _date_by_archetype
+from .models.staffing import staffing_table
+from .profiling import stage
+from .segmentation.archetypes import Archetype
+
+# What-if evaluation of many config variants on one book. Demand (in-house, arrivals, checkouts)
+# is computed once; each output is then one array op with a leading scenario axis instead of a
+# `predict` per variant. Overrides are dotted config paths, e.g.
+# `housekeeping.archetype_multipliers.FamilyWithKids`, `fnb_meals.breakfast.multipliers.TourGroup.eggs_kg`,
+# `service_load.reception.transactions_per_agent_per_hour`, plus the run parameters below.
+
+RUN_PARAMS: Dict[str, Any] = {"utilization": 0.85, "target_wait_min": None, "shift_hours": 8.0}
+OUTPUTS = ("labor", "fnb", "service_reception", "service_breakfast")
+
+@dataclass
+class Scenario:
+    name: str
+    overrides: Dict[str, Any] = field(default_factory=dict)
+
+    def config_overrides(self) -> Dict[str, Any]:
+        # dotted keys -> nested dict for merge_config; run parameters are not config
+        out: Dict[str, Any] = {}
+        for key, value in self.overrides.items():
+            if key in RUN_PARAMS:
+                continue
+            *path, leaf = key.split(".")
+            node = out
+            for p in path:
+                node = node.setdefault(p, {})
+            node[leaf] = value
+        return out
+
+_ARCHETYPES = {a.value for a in Archetype}
+
+def _leaf_paths(node: Any, prefix: str = "") -> List[str]:
+    if not isinstance(node, dict):
+        return [prefix]
+    return [p for k, v in node.items() for p in _leaf_paths(v, f"{prefix}.{k}" if prefix else str(k))]
+
+def check_override_keys(config: Dict[str, Any], keys: Sequence[str]) -> None:
+    """Raise ``ValueError`` for keys that are neither run parameters nor a leaf of ``config``.
+
+    merge_config would drop them silently and the scenario would report baseline numbers. An
+    archetype missing from an archetype-keyed mapping is accepted with the shape of its siblings.
+    """
+    for key in keys:
+        if key in RUN_PARAMS:
+            continue
+        parts = key.split(".")
+        node, depth = config, 0
+        while depth < len(parts) and isinstance(node, dict):
+            part = parts[depth]
+            if part not in node and part in _ARCHETYPES and _ARCHETYPES & set(node):
+                part = next(k for k in node if k in _ARCHETYPES)
+            if part not in node:
+                break
+            node, depth = node[part], depth + 1
+        if depth == len(parts) and not isinstance(node, dict):
+            continue
+        prefix = ".".join(parts[:depth])
+        raise ValueError(f"Unknown override '{key}'. Valid keys{f' under {prefix!r}' if prefix else ''}: "
+                         f"{', '.join(sorted(_leaf_paths(node, prefix)))}; run parameters: {', '.join(RUN_PARAMS)}")
+
+def grid(axes: Dict[str, Sequence[Any]]) -> List[Scenario]:
+    """Cartesian product of override values, named ``key=value;key=value``."""
+    keys = list(axes)
+    out = []
+    for values in itertools.product(*(list(axes[k]) for k in keys)):
+        ov = dict(zip(keys, values))
+        out.append(Scenario(";".join(f"{k}={v}" for k, v in ov.items()) or "base", ov))
+    return out
+
+def scenarios_from_spec(spec: Dict[str, Any]) -> List[Scenario]:
+    """``{"grid": {key: [values]}, "scenarios": [{"name": ..., key: value}]}``; either part may be omitted."""
+    if not isinstance(spec, dict) or not ({"grid", "scenarios"} & set(spec)):
+        raise ValueError("Scenario spec needs a 'grid' mapping and/or a 'scenarios' list")
+    out = []
+    for i, item in enumerate(spec.get("scenarios") or []):
+        item = dict(item)
+        out.append(Scenario(str(item.pop("name", f"scenario_{i}")), item))
+    if spec.get("grid"):
+        out += grid(spec["grid"])
+    names = [s.name for s in out]
+    if len(set(names)) != len(names):
+        raise ValueError("Duplicate scenario names")
+    return out
+
+def load_scenarios(path: Union[str, Path]) -> List[Scenario]:
+    text = Path(path).read_text(encoding="utf-8")
+    if Path(path).suffix.lower() == ".json":
+        return scenarios_from_spec(json.loads(text))
+    import yaml
+    return scenarios_from_spec(yaml.safe_load(text))
+
+@dataclass
+class ScenarioEngine(BaseForecaster):
+    """Labor, F&B and service forecasts for many scenarios at once.
+
+    Each scenario's rows match the single-config forecasters run with the merged config
+    (``LaborForecaster``, ``FNBConsumptionForecaster.predict_all``, ``ServiceLoadForecaster``),
+    with a leading ``scenario`` column. ``utilization``, ``target_wait_min`` and ``shift_hours``
+    are the defaults for scenarios that do not override them, as in ``ForecastPipeline``.
+    """
+    utilization: Optional[float] = RUN_PARAMS["utilization"]
+    target_wait_min: Optional[float] = RUN_PARAMS["target_wait_min"]
+    shift_hours: float = RUN_PARAMS["shift_hours"]
+
+    def _resolve(self, scenarios: Sequence[Scenario]) -> Tuple[List[CompiledConfig], List[Dict[str, Any]]]:
+        from .config.loader import merge_config
+        merged: Dict[str, CompiledConfig] = {}  # grids repeat the same config overrides many times
+        base = self.config or {}
+        check_override_keys(base, sorted({k for s in scenarios for k in s.overrides}))
+        configs, params = [], []
+        for s in scenarios:
+            ov = s.config_overrides()
+            key = json.dumps(ov, sort_keys=True, default=str)
+            if key not in merged:
+                merged[key] = compile_config(merge_config(base, ov)) if ov else self.compiled
+            configs.append(merged[key])
+            params.append({k: s.overrides.get(k, getattr(self, k)) for k in RUN_PARAMS})
+        return configs, params
+
+    @staticmethod
+    def parameters(scenarios: Sequence[Scenario]) -> pd.DataFrame:
+        return pd.DataFrame([{"scenario": s.name, **s.overrides} for s in scenarios])
+
+    @stage("scenarios.evaluate")
+    def evaluate(self, enriched: pd.DataFrame | FeatureCache, scenarios: Sequence[Scenario],
+                 outputs: Sequence[str] = OUTPUTS) -> Dict[str, pd.DataFrame]:
+        unknown = set(outputs) - set(OUTPUTS)
+        if unknown:
+            raise ValueError(f"Unknown outputs {sorted(unknown)}. Available: {list(OUTPUTS)}")
+        if not scenarios:
+            raise ValueError("No scenarios")
+        feats = enriched if isinstance(enriched, FeatureCache) else FeatureCache(enriched)
+        configs, params = self._resolve(scenarios)
+        names = np.asarray([s.name for s in scenarios], dtype=object)
+        out: Dict[str, pd.DataFrame] = {"scenarios": self.parameters(scenarios)}
+        if "labor" in outputs:
+            out["labor"] = self._labor(feats, configs, params, names)
+        if "fnb" in outputs:
+            out["fnb"] = self._fnb(feats, configs, names)
+        for area in ("reception", "breakfast"):
+            if f"service_{area}" in outputs:
+                out[f"service_{area}"] = self._service(feats, area, configs, params, names)
+        return out
+
+    # ---- housekeeping --------------------------------------------------------------------------
+    def _labor(self, feats: FeatureCache, configs: List[CompiledConfig], params: List[dict], names: np.ndarray) -> pd.DataFrame:
+        cols = ["scenario","date","hk_man_hours","recommended_headcount","shift_hours","utilization","rooms_total","guest_nights_total"]
+        base = feats.inhouse.merge(feats.checkouts, on=["date","archetype"], how="left").fillna({"checkouts":0})
+        if base.empty:
+            return pd.DataFrame(columns=cols)
+        base["stayovers"] = (base["rooms"] - base["checkouts"]).clip(lower=0)
+        d_codes, dates = pd.factorize(base["date"], sort=True)
+        a_codes, labels = pd.factorize(base["archetype"], use_na_sentinel=False)
+        co = np.zeros((len(dates), len(labels))); st = np.zeros_like(co)
+        np.add.at(co, (d_codes, a_codes), base["checkouts"].to_numpy(dtype=float))
+        np.add.at(st, (d_codes, a_codes), base["stayovers"].to_numpy(dtype=float))
+        mults = np.stack([cc.hk_multipliers_for(labels) for cc in configs])            # (S, A)
+        m_co = np.array([cc.housekeeping["minutes_per_checkout"] for cc in configs])
+        m_st = np.array([cc.housekeeping["minutes_per_stayover"] for cc in configs])
+        hours = (m_co[:, None] * (mults @ co.T) + m_st[:, None] * (mults @ st.T)) / 60.0   # (S, D)
+        util = np.array([p["utilization"] if p["utilization"] is not None else cc.housekeeping["target_utilization"]
+                         for p, cc in zip(params, configs)], dtype=float)
+        shift = np.array([p["shift_hours"] for p in params], dtype=float)
+        headcount = np.ceil(hours / (shift * util)[:, None]).astype(int).clip(min=0)
+        totals = base.groupby("date").agg(rooms_total=("rooms_total","max"), guest_nights_total=("guest_nights_total","max"))
+        totals = totals.reindex(dates)
+        S, D = hours.shape
+        return pd.DataFrame({
+            "scenario": np.repeat(names, D),
+            "date": np.tile(np.asarray(dates, dtype=object), S),
+            "hk_man_hours": hours.ravel(),
+            "recommended_headcount": headcount.ravel(),
+            "shift_hours": np.repeat(shift, D),
+            "utilization": np.repeat(util, D),
+            "rooms_total": np.tile(totals["rooms_total"].to_numpy(), S),
+            "guest_nights_total": np.tile(totals["guest_nights_total"].to_numpy(), S),
+        })[cols]
+
+    # ---- F&B -----------------------------------------------------------------------------------
+    def _fnb(self, feats: FeatureCache, configs: List[CompiledConfig], names: np.ndarray) -> pd.DataFrame:
+        cols = ["scenario","date","meal","item","quantity"]
+        agg = feats.inhouse
+        if agg.empty:
+            return pd.DataFrame(columns=cols)
+        d_codes, dates = pd.factorize(agg["date"], sort=True)
+        a_codes, archetypes = pd.factorize(agg["archetype"], sort=True)
+        pax = np.zeros((len(dates), len(archetypes), 2))
+        np.add.at(pax, (d_codes, a_codes, 0), agg["adults"].to_numpy(dtype=float))
+        np.add.at(pax, (d_codes, a_codes, 1), agg["children"].to_numpy(dtype=float))
+        # scenarios with the same (meal, item) layout share one einsum
+        groups: Dict[tuple, List[int]] = {}
+        compiled = []
+        for i, cc in enumerate(configs):
+            keys, base, mults = cc.meals_for(list(cc.raw.get("fnb_meals", {})), archetypes)
+            compiled.append((base, mults))
+            groups.setdefault(tuple(keys), []).append(i)
+        parts = []
+        for layout, idx in groups.items():
+            if not layout:
+                continue
+            base = np.stack([compiled[i][0] for i in idx])   # (S, K, 2)
+            mults = np.stack([compiled[i][1] for i in idx])  # (S, A, K)
+            qty = np.einsum("dap,skp,sak->sdk", pax, base, mults, optimize=True)
+            S, D, K = qty.shape
+            parts.append((np.asarray(idx), pd.DataFrame({
+                "scenario": np.repeat(names[idx], D * K),
+                "date": np.tile(np.repeat(np.asarray(dates, dtype=object), K), S),
+                "meal": np.tile([m for m, _ in layout], S * D),
+                "item": np.tile([i for _, i in layout], S * D),
+                "quantity": qty.ravel(),
+            })))
+        if not parts:
+            return pd.DataFrame(columns=cols)
+        if len(parts) == 1:
+            return parts[0][1]
+        order = {n: i for i, n in enumerate(names)}
+        out = pd.concat([p for _, p in parts], ignore_index=True)
+        return out.sort_values("scenario", key=lambda s: s.map(order), kind="stable").reset_index(drop=True)
+
+    # ---- service load --------------------------------------------------------------------------
+    def _service(self, feats: FeatureCache, area: str, configs: List[CompiledConfig], params: List[dict],
+                 names: np.ndarray) -> pd.DataFrame:
+        col = "expected_transactions" if area == "reception" else "expected_covers"
+        cols = ["scenario","datetime",col,"area","staff_util","staff_sla","recommended_staff","load_status"]
+        if area == "reception":
+            counts = feats.arrivals; value = counts["arrivals"] if not counts.empty else None
+            rate_key = "transactions_per_agent_per_hour"
+        else:
+            counts = feats.inhouse; value = counts["adults"] + counts["children"] if not counts.empty else None
+            rate_key = "covers_per_staff_per_hour"
+        if counts.empty:
+            return pd.DataFrame(columns=cols)
+        dates, archetypes, load, present = _date_by_archetype(counts, value)
+
+        rate, util, target = np.zeros(len(configs)), np.zeros(len(configs)), np.zeros(len(configs))
+        for i, (cc, p) in enumerate(zip(configs, params)):
+            cfg = cc.raw["service_load"][area]
+            rate[i] = float(cfg[rate_key])
+            util[i] = p["utilization"] if p["utilization"] is not None else float(cfg.get("utilization", 0.85))
+            target[i] = (p["target_wait_min"] if p["target_wait_min"] is not None
+                         else float(cc.raw.get("service_sla", {}).get("default_target_wait_min", 5.0)))
+
+        # hourly[s, d, t] = load[d, a] @ weights[s, a, t] over the union of time slots
+        dists = [cc.distributions_for(area, archetypes) for cc in configs]
+        slots = np.unique(np.concatenate([d[0] for d in dists]))
+        weights = np.zeros((len(configs), len(archetypes), len(slots)))
+        support = np.zeros(weights.shape, dtype=bool)
+        for i, (s, w, sup) in enumerate(dists):
+            j = np.searchsorted(slots, s)
+            weights[i][:, j] = w; support[i][:, j] = sup
+        hourly = np.einsum("da,sat->sdt", load, weights, optimize=True)
+        listed = np.einsum("da,sat->sdt", present.astype(float), support.astype(float), optimize=True) > 0
+        s_idx, d_idx, t_idx = np.nonzero(listed)
+        x = hourly[s_idx, d_idx, t_idx]
+
+        staff_util = np.ceil(x / (rate * util)[s_idx]).astype(int).clip(min=1)
+        staff_sla = np.zeros(len(x), dtype=np.int64)
+        # one cached staffing table per distinct (rate, target); the utilization cap is applied per row
+        uniq, first, inv = np.unique(np.stack([rate, target], axis=1), axis=0, return_index=True, return_inverse=True)
+        row_key = inv.ravel()[s_idx]
+        for k, (r, t) in enumerate(uniq):
+            m = row_key == k
+            if m.any():
+                staff_sla[m] = staffing_table(r, t, util[first[k]]).staff(x[m], util[s_idx[m]])
+        staff = np.maximum(staff_util, staff_sla).astype(int)
+        cap = (rate * util)[s_idx] * staff
+        ts = pd.to_datetime(pd.Series(dates[d_idx])) + pd.to_timedelta(slots[t_idx], unit="min")
+        return pd.DataFrame({
+            "scenario": names[s_idx],
+            "datetime": ts.to_numpy(),
+            col: x,
+            "area": area,
+            "staff_util": staff_util,
+            "staff_sla": staff_sla,
+            "recommended_staff": staff,
+            "load_status": np.where(x <= cap * 0.7, "Green", np.where(x <= cap, "Amber", "Red")),
+        })[cols]
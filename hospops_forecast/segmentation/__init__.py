@@ -1,3 +1,4 @@
 from .archetypes import Archetype
+from .model import SegmentModel
 from .segmenter import Segmenter
-__all__ = ["Archetype", "Segmenter"]
+__all__ = ["Archetype", "SegmentModel", "Segmenter"]
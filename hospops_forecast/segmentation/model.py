@@ -0,0 +1,122 @@
+from __future__ import annotations
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Union
+import numpy as np
+from .archetypes import Archetype
+
+MODEL_VERSION = 1
+FEATURES = ["length_of_stay","group_size","arrival_weekday","adults","children"]
+
+def _archetype(centroid: np.ndarray) -> str:
+    # centroid in original units; the rules the per-call KMeans mapping applied to cluster means
+    if centroid[FEATURES.index("group_size")] >= 3: return Archetype.FamilyWithKids.value
+    if centroid[FEATURES.index("length_of_stay")] <= 2: return Archetype.SoloBusiness.value
+    return Archetype.LeisureCouple.value
+
+@dataclass
+class SegmentModel:
+    """Fitted clusters for the rule-based "Other" reservations.
+
+    Centroids live in standardized feature space (``mean``/``scale`` from the fitting data);
+    ``archetypes`` maps each cluster to a label. Clusters are ordered by their centroid in original
+    units at fit time, so the same fit always yields the same artifact. ``counts`` (rows per cluster
+    so far) carry mini-batch updates across ``partial_fit`` calls.
+    """
+    mean: np.ndarray
+    scale: np.ndarray
+    centroids: np.ndarray
+    counts: np.ndarray
+    archetypes: List[str]
+    features: List[str]
+    algorithm: str = "kmeans"
+
+    @classmethod
+    def from_centroids(cls, centroids: np.ndarray, counts: np.ndarray, mean: np.ndarray, scale: np.ndarray,
+                       algorithm: str = "kmeans") -> "SegmentModel":
+        original = centroids * scale + mean
+        order = np.lexsort(original.T[::-1])
+        m = cls(mean=mean, scale=scale, centroids=centroids[order], counts=counts[order].astype(np.int64),
+                archetypes=[], features=list(FEATURES), algorithm=algorithm)
+        m.remap()
+        return m
+
+    @property
+    def n_clusters(self) -> int:
+        return len(self.centroids)
+
+    def remap(self) -> None:
+        original = self.centroids * self.scale + self.mean
+        self.archetypes = [Archetype.Other.value if n == 0 else _archetype(c) for c, n in zip(original, self.counts)]
+
+    def standardize(self, X: np.ndarray) -> np.ndarray:
+        return (np.asarray(X, dtype=float) - self.mean) / self.scale
+
+    def assign(self, X: np.ndarray) -> np.ndarray:
+        """Nearest centroid per row: argmin of |c|² - 2x·c (|x|² is the same for every cluster)."""
+        Z = self.standardize(X)
+        return np.argmin((self.centroids ** 2).sum(axis=1) - 2.0 * Z @ self.centroids.T, axis=1)
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return np.asarray(self.archetypes, dtype=object)[self.assign(X)] if len(X) else np.empty(0, dtype=object)
+
+    def update(self, X: np.ndarray) -> "SegmentModel":
+        # mini-batch k-means step: every centroid moves to the running mean of all rows assigned to it
+        Z = self.standardize(X)
+        labels = self.assign(X)
+        n = np.bincount(labels, minlength=self.n_clusters)
+        sums = np.zeros_like(self.centroids)
+        np.add.at(sums, labels, Z)
+        self.counts = self.counts + n
+        hit = n > 0
+        self.centroids[hit] += (sums[hit] - n[hit, None] * self.centroids[hit]) / self.counts[hit, None]
+        self.remap()
+        return self
+
+    # ---- persistence ---------------------------------------------------------------------------
+    def state(self) -> dict:
+        return {
+            "version": MODEL_VERSION,
+            "algorithm": self.algorithm,
+            "features": list(self.features),
+            "mean": self.mean.tolist(),
+            "scale": self.scale.tolist(),
+            "centroids": self.centroids.tolist(),
+            "counts": self.counts.tolist(),
+            "archetypes": list(self.archetypes),
+        }
+
+    def save(self, path: Union[str, Path]) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(json.dumps(self.state()), encoding="utf-8")
+        tmp.replace(path)
+        return path
+
+    @classmethod
+    def from_state(cls, state: dict) -> "SegmentModel":
+        if state.get("version") != MODEL_VERSION:
+            raise ValueError(f"Segment model version {state.get('version')}, expected {MODEL_VERSION}")
+        if list(state["features"]) != FEATURES:
+            raise ValueError(f"Segment model was fitted on {state['features']}, expected {FEATURES}")
+        k = len(state["centroids"])
+        return cls(
+            mean=np.asarray(state["mean"], dtype=float),
+            scale=np.asarray(state["scale"], dtype=float),
+            centroids=np.asarray(state["centroids"], dtype=float).reshape(k, len(FEATURES)),
+            counts=np.asarray(state["counts"], dtype=np.int64),
+            archetypes=list(state["archetypes"]),
+            features=list(state["features"]),
+            algorithm=str(state.get("algorithm", "kmeans")),
+        )
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "SegmentModel":
+        return cls.from_state(json.loads(Path(path).read_text(encoding="utf-8")))
+
+def scaling(X: np.ndarray):
+    # zero-variance features keep unit scale so they drop out of the distance instead of dividing by 0
+    std = X.std(axis=0)
+    return X.mean(axis=0), np.where(std > 0, std, 1.0)
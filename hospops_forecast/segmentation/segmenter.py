@@ -1,24 +1,123 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from typing import Optional, Tuple
 import numpy as np
 import pandas as pd
 
-try:
-    from sklearn.cluster import KMeans
-except Exception:
-    KMeans = None
-
 from .archetypes import Archetype
+from .model import FEATURES, SegmentModel, scaling
+from ..profiling import stage
+
+def _kmeans(minibatch: bool = False):
+    # sklearn is only needed to fit clusters; importing it costs seconds
+    try:
+        from sklearn.cluster import KMeans, MiniBatchKMeans
+    except Exception:
+        return None
+    return MiniBatchKMeans if minibatch else KMeans
+
+KEEP_COLUMNS = ["reservation_id","arrival_date","departure_date","adults","children","group_size",
+                "room_type","channel","company","nationality","length_of_stay",
+                "arrival_weekday","is_weekend_arrival","archetype"]
+ALGORITHMS = ("kmeans", "minibatch")
 
 @dataclass
 class Segmenter:
+    """Rule-based archetypes, optionally refined by clustering the reservations no rule matched.
+
+    ``fit`` clusters the "Other" rows into a ``SegmentModel`` (KMeans, or MiniBatchKMeans with
+    ``algorithm="minibatch"``) and ``partial_fit`` folds further batches into it; ``transform``
+    applies the rules plus a nearest-centroid lookup and needs no sklearn. ``enrich`` uses ``model``
+    when set, otherwise with ``use_unsupervised`` it fits a throwaway model on every call.
+    """
     use_unsupervised: bool = False
     random_state: int = 42
     n_clusters: int = 4
+    algorithm: str = "kmeans"
+    batch_size: int = 1024
+    model: Optional[SegmentModel] = None
 
+    def __post_init__(self):
+        if self.algorithm not in ALGORITHMS:
+            raise ValueError(f"algorithm must be one of {ALGORITHMS}")
+
+    @stage("segment")
     def enrich(self, df: pd.DataFrame) -> pd.DataFrame:
-        df = df.copy()
+        df, c_res = self._labelled(df)
+        model = self.model
+        if model is None and self.use_unsupervised:
+            X = self._other_features(df)
+            if len(X) >= self.n_clusters and _kmeans() is not None:
+                model = self._fit_model(X)
+        if model is not None:
+            self._apply(df, model)
+        return self._finalize(df, c_res)
+
+    @stage("segment.fit")
+    def fit(self, df: pd.DataFrame) -> "Segmenter":
+        """Fit ``model`` on the rows of ``df`` that no rule or tour group claims."""
+        df, _ = self._labelled(df)
+        self.model = self._fit_model(self._other_features(df))
+        return self
+
+    def partial_fit(self, df: pd.DataFrame) -> "Segmenter":
+        """Fold one batch into ``model`` (fitting it on the first batch), for histories too large to
+        cluster at once. Tour groups are detected within the batch."""
+        df, _ = self._labelled(df)
+        return self._partial_fit_rows(self._other_features(df))
+
+    @stage("segment.transform")
+    def transform(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Enrich ``df`` with the fitted ``model``; no refitting, so labels are stable across batches."""
+        if self.model is None:
+            raise ValueError("Segmenter has no model; call fit/partial_fit or pass model=SegmentModel.load(path)")
+        df, c_res = self._labelled(df)
+        self._apply(df, self.model)
+        return self._finalize(df, c_res)
+
+    def _labelled(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, Optional[str]]:
+        df, c_res = self._prepare(df)
+        df["archetype"] = self._rule_based(df)
+        return self._detect_tour_groups(df), c_res
+
+    @staticmethod
+    def _other_features(df: pd.DataFrame) -> np.ndarray:
+        return df.loc[df["archetype"] == Archetype.Other.value, FEATURES].fillna(0).to_numpy(dtype=float)
+
+    @staticmethod
+    def _apply(df: pd.DataFrame, model: SegmentModel) -> None:
+        labels = df["archetype"].to_numpy(dtype=object, copy=True)
+        mask = labels == Archetype.Other.value
+        if mask.any():
+            labels[mask] = model.predict(np.nan_to_num(df[FEATURES].to_numpy(dtype=float)[mask]))
+            df["archetype"] = labels
+
+    def _fit_model(self, X: np.ndarray) -> SegmentModel:
+        if len(X) < self.n_clusters:
+            raise ValueError(f"{len(X)} unmatched reservations, need at least n_clusters={self.n_clusters} to fit")
+        minibatch = self.algorithm == "minibatch"
+        est = _kmeans(minibatch)
+        if est is None:
+            raise ImportError("Fitting a segment model requires scikit-learn")
+        mean, scale = scaling(X)
+        extra = {"batch_size": self.batch_size} if minibatch else {}
+        km = est(n_clusters=self.n_clusters, random_state=self.random_state, **extra).fit((X - mean) / scale)
+        counts = np.bincount(km.labels_, minlength=self.n_clusters)
+        return SegmentModel.from_centroids(km.cluster_centers_, counts, mean, scale, algorithm=self.algorithm)
+
+    def _partial_fit_rows(self, X: np.ndarray) -> "Segmenter":
+        if self.model is None:
+            self.model = self._fit_model(X)
+        elif len(X):
+            self.model.update(X)
+        return self
+
+    @staticmethod
+    def _prepare(df: pd.DataFrame, copy: bool = True) -> Tuple[pd.DataFrame, Optional[str]]:
+        # normalize PMS column names/dtypes and derive the rule inputs; returns the reservation id column used
+        if copy:
+            df = df.copy()
 
         def pick(*names, default=None):
             for n in names:
@@ -50,63 +149,86 @@ class Segmenter:
         df["length_of_stay"] = (df["departure_date"] - df["arrival_date"]).dt.days.clip(lower=0)
         df["arrival_weekday"] = df["arrival_date"].dt.weekday
         df["is_weekend_arrival"] = df["arrival_weekday"].isin([4,5,6])
+        return df, c_res
 
-        df["archetype"] = df.apply(self._rule_based, axis=1)
-        df = self._detect_tour_groups(df)
-
-        if self.use_unsupervised and KMeans is not None:
-            mask = df["archetype"] == Archetype.Other.value
-            feat = ["length_of_stay","group_size","arrival_weekday","adults","children"]
-            X = df.loc[mask, feat].fillna(0).to_numpy()
-            if len(X) >= self.n_clusters:
-                km = KMeans(n_clusters=self.n_clusters, random_state=self.random_state)
-                labels = km.fit_predict(X)
-                # naive mapping
-                cmap = {}
-                for i in range(self.n_clusters):
-                    gi = X[labels == i]
-                    if len(gi)==0: cmap[i]=Archetype.Other.value; continue
-                    avg_group = gi[:, feat.index("group_size")].mean()
-                    avg_los = gi[:, feat.index("length_of_stay")].mean()
-                    if avg_group>=3: cmap[i]=Archetype.FamilyWithKids.value
-                    elif avg_los<=2: cmap[i]=Archetype.SoloBusiness.value
-                    else: cmap[i]=Archetype.LeisureCouple.value
-                df.loc[mask,"archetype"] = [cmap[l] for l in labels]
-
-        if c_res and c_res in df.columns and not df[c_res].isna().all():
+    @staticmethod
+    def _finalize(df: pd.DataFrame, c_res: Optional[str], id_offset: int = 0, has_ids: Optional[bool] = None) -> pd.DataFrame:
+        # has_ids: whether the whole file carries ids (chunked callers decide once, not per chunk)
+        if has_ids is None:
+            has_ids = bool(c_res and c_res in df.columns and not df[c_res].isna().all())
+        if has_ids:
             df["reservation_id"] = df[c_res].astype(str)
         else:
-            df["reservation_id"] = [f"SYN-{i:06d}" for i in range(len(df))]
-
-        keep = ["reservation_id","arrival_date","departure_date","adults","children","group_size",
-                "room_type","channel","company","nationality","length_of_stay",
-                "arrival_weekday","is_weekend_arrival","archetype"]
-        return df[keep]
+            df["reservation_id"] = [f"SYN-{i:06d}" for i in range(id_offset, id_offset + len(df))]
+        return df[KEEP_COLUMNS]
 
     @staticmethod
-    def _rule_based(r: pd.Series) -> str:
-        adults, children = int(r.get("adults",1)), int(r.get("children",0))
+    def _lowered(s: pd.Series):
+        # factorize once, lower-case only the distinct values; substring tests run on the uniques
+        codes, uniques = pd.factorize(s, use_na_sentinel=False)
+        return codes, np.array([str(v).lower() for v in uniques], dtype=object)
+
+    @classmethod
+    def _contains(cls, s: pd.Series, keys) -> np.ndarray:
+        codes, lowered = cls._lowered(s)
+        return np.array([any(k in v for k in keys) for v in lowered], dtype=bool)[codes]
+
+    @classmethod
+    def _rule_based(cls, df: pd.DataFrame) -> np.ndarray:
+        adults = df["adults"].to_numpy()
+        children = df["children"].to_numpy()
         group = adults + children
-        los = int(r.get("length_of_stay",1))
-        weekday = int(r.get("arrival_weekday",0))
-        is_weekend = weekday in [4,5,6]
-        channel = str(r.get("channel","")).lower()
-        company = str(r.get("company","")).lower()
-        room_type = str(r.get("room_type","")).lower()
-        if adults==1 and children==0 and los<=3 and weekday in range(0,5) and ("corp" in channel or company not in ["","nan"]):
-            return Archetype.SoloBusiness.value
-        if adults==2 and children==0 and (is_weekend or los>=2) and any(k in channel for k in ["ota","direct",""]):
-            return Archetype.LeisureCouple.value
-        if children>=1 or group>=3 or any(k in room_type for k in ["suite","family"]):
-            return Archetype.FamilyWithKids.value
-        return Archetype.Other.value
+        los = df["length_of_stay"].to_numpy(dtype=float)
+        weekday = df["arrival_weekday"].to_numpy(dtype=float)
+        is_weekend = np.isin(weekday, [4,5,6])
+        codes, lowered = cls._lowered(df["company"])
+        has_company = np.isin(lowered, ["","nan"], invert=True)[codes]
+
+        solo = (adults==1) & (children==0) & (los<=3) & (weekday>=0) & (weekday<5) & (cls._contains(df["channel"], ["corp"]) | has_company)
+        couple = (adults==2) & (children==0) & (is_weekend | (los>=2)) & cls._contains(df["channel"], ["ota","direct",""])
+        family = (children>=1) | (group>=3) | cls._contains(df["room_type"], ["suite","family"])
+        return np.select(
+            [solo, couple, family],
+            [Archetype.SoloBusiness.value, Archetype.LeisureCouple.value, Archetype.FamilyWithKids.value],
+            default=Archetype.Other.value,
+        ).astype(object)
 
     @staticmethod
-    def _detect_tour_groups(df: pd.DataFrame) -> pd.DataFrame:
-        df = df.copy()
-        key = df["company"].replace({"nan":"", "None":""}) + "|" + df["channel"].fillna("")
-        df["__k"] = key
-        grp = df.groupby(["arrival_date","__k"]).reservation_id.transform("count")
-        df.loc[grp >= 10, "archetype"] = Archetype.TourGroup.value
-        df.drop(columns=["__k"], inplace=True)
+    def _tour_groups(df: pd.DataFrame):
+        # group key is company|channel; build it only for the distinct (company, channel) pairs
+        comp_codes, comp = pd.factorize(df["company"], use_na_sentinel=False)
+        chan_codes, chan = pd.factorize(df["channel"], use_na_sentinel=False)
+        comp_key = np.array([None if pd.isna(v) else ("" if v in ("nan","None") else v) for v in comp], dtype=object)
+        chan_key = np.array(["" if pd.isna(v) else v for v in chan], dtype=object)
+        n_chan = max(len(chan), 1)
+        pairs, pair_inv = np.unique(comp_codes.astype(np.int64) * n_chan + chan_codes, return_inverse=True)
+        pair_str = [None if c is None else f"{c}|{h}" for c, h in zip(comp_key[pairs // n_chan], chan_key[pairs % n_chan])]
+        key_codes, key_uniques = pd.factorize(pd.Series(pair_str, dtype=object))
+        key = key_codes[pair_inv]
+
+        day, days = pd.factorize(df["arrival_date"])
+        valid = (day >= 0) & (key >= 0)
+        n_keys = max(len(key_uniques), 1)
+        gid = day.astype(np.int64) * n_keys + key
+        ids = df["reservation_id"] if "reservation_id" in df.columns else pd.Series(1, index=df.index)
+        weights = ids.notna().to_numpy(dtype=float)
+        groups, inv = np.unique(gid[valid], return_inverse=True)
+        counts = np.bincount(inv, weights=weights[valid], minlength=len(groups))
+        index = pd.MultiIndex.from_arrays([days[groups // n_keys], np.asarray(key_uniques, dtype=object)[groups % n_keys]],
+                                          names=["arrival_date","key"])
+        return valid, inv, pd.Series(counts, index=index)
+
+    @classmethod
+    def _tour_group_counts(cls, df: pd.DataFrame) -> pd.Series:
+        # reservations per (arrival_date, company|channel); summed across chunks by the streaming path
+        return cls._tour_groups(df)[2]
+
+    @classmethod
+    def _detect_tour_groups(cls, df: pd.DataFrame, totals: Optional[pd.Series] = None) -> pd.DataFrame:
+        valid, inv, counts = cls._tour_groups(df)
+        if totals is not None:
+            counts = totals.reindex(counts.index).fillna(0)
+        tour = np.zeros(len(df), dtype=bool)
+        tour[valid] = counts.to_numpy()[inv] >= 10
+        df.loc[tour, "archetype"] = Archetype.TourGroup.value
         return df
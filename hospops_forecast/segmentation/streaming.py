@@ -0,0 +1,120 @@
+from __future__ import annotations
+import re
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+import numpy as np
+import pandas as pd
+from ..io import ENRICHED_CATEGORICAL_COLUMNS, TableWriter, table_format, to_enriched_schema
+from .model import SegmentModel
+from .segmenter import KEEP_COLUMNS, Segmenter
+from ..profiling import stage
+
+# working set per chunk is a few copies of the raw rows (raw, prepared columns, output slice)
+_MEMORY_SAFETY = 4.0
+_SAMPLE_ROWS = 10_000
+_MIN_CHUNK_ROWS = 1_000
+
+def parse_memory(value: Union[str, int]) -> int:
+    """'512MB' / '2G' / '1048576' -> bytes."""
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    m = re.fullmatch(r"\s*([\d.]+)\s*([KMGT]?)i?B?\s*", str(value), flags=re.I)
+    if not m:
+        raise ValueError(f"Cannot parse memory size '{value}'. Use e.g. 512MB or 2GB")
+    return int(float(m.group(1)) * 1024 ** " KMGT".index(m.group(2).upper() or " "))
+
+def chunk_rows_for(input: Path, max_memory: Union[str, int], segmenter: Optional[Segmenter] = None) -> int:
+    # estimate bytes per row from a sample chunk run through the same preparation
+    seg = segmenter or Segmenter()
+    sample = pd.read_csv(input, nrows=_SAMPLE_ROWS)
+    if sample.empty:
+        return _MIN_CHUNK_ROWS
+    prepared, _ = seg._prepare(sample)
+    per_row = (sample.memory_usage(deep=True).sum() + prepared.memory_usage(deep=True).sum()) / len(sample)
+    return max(_MIN_CHUNK_ROWS, int(parse_memory(max_memory) / (per_row * _MEMORY_SAFETY)))
+
+def _chunks(input: Path, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    with pd.read_csv(input, chunksize=chunk_rows) as reader:
+        yield from reader
+
+def _chunk_rows(input: Path, chunk_rows: Optional[int], max_memory: Union[str, int, None], seg: Segmenter) -> int:
+    if chunk_rows is None:
+        chunk_rows = chunk_rows_for(input, max_memory, seg) if max_memory is not None else 100_000
+    if chunk_rows <= 0:
+        raise ValueError("chunk_rows must be positive")
+    if table_format(input) != "csv":
+        raise ValueError("Chunked segmentation reads CSV exports; Parquet/Feather inputs fit the in-memory path")
+    return chunk_rows
+
+def _first_pass(input: Path, chunk_rows: int, seg: Segmenter) -> Tuple[Optional[pd.Series], bool, Dict[str, List[str]]]:
+    # reservations per (arrival_date, company|channel) over the whole file, whether it has ids, and
+    # the values of the categorical columns (so every chunk written to Arrow has the same dictionary)
+    totals: Optional[pd.Series] = None
+    has_ids = False
+    values: Dict[str, set] = {c: set() for c in ENRICHED_CATEGORICAL_COLUMNS if c != "archetype"}
+    for chunk in _chunks(input, chunk_rows):
+        df, c_res = seg._prepare(chunk, copy=False)
+        counts = seg._tour_group_counts(df)
+        totals = counts if totals is None else totals.add(counts, fill_value=0)
+        has_ids = has_ids or bool(c_res and df[c_res].notna().any())
+        for c, seen in values.items():
+            seen.update(df[c].dropna().unique())
+    return totals, has_ids, {c: sorted(v) for c, v in values.items()}
+
+def _labelled_chunks(input: Path, chunk_rows: int, seg: Segmenter, totals: Optional[pd.Series]):
+    for chunk in _chunks(input, chunk_rows):
+        df, c_res = seg._prepare(chunk, copy=False)
+        df["archetype"] = seg._rule_based(df)
+        yield seg._detect_tour_groups(df, totals=totals), c_res
+
+@stage("segment.fit_chunked")
+def fit_segment_model_chunked(input: Path, chunk_rows: Optional[int] = None, max_memory: Union[str, int, None] = None,
+                              segmenter: Optional[Segmenter] = None) -> SegmentModel:
+    """Fit ``segmenter.model`` on a reservation CSV one chunk at a time (``Segmenter.partial_fit``).
+
+    Tour groups are found on whole-file totals as in ``segment_csv_chunked``; the first chunks seed
+    the clusters once they hold ``n_clusters`` unmatched rows, later ones update them.
+    """
+    seg = segmenter or Segmenter(algorithm="minibatch")
+    chunk_rows = _chunk_rows(input, chunk_rows, max_memory, seg)
+    totals, _, _ = _first_pass(input, chunk_rows, seg)
+    pending = []
+    for df, _ in _labelled_chunks(input, chunk_rows, seg, totals):
+        pending.append(seg._other_features(df))
+        if seg.model is not None or sum(len(x) for x in pending) >= seg.n_clusters:
+            seg._partial_fit_rows(np.concatenate(pending))
+            pending = []
+    if seg.model is None:
+        raise ValueError(f"{sum(len(x) for x in pending)} unmatched reservations, need at least n_clusters={seg.n_clusters} to fit")
+    return seg.model
+
+@stage("segment.chunked")
+def segment_csv_chunked(input: Path, output: Path, chunk_rows: Optional[int] = None,
+                        max_memory: Union[str, int, None] = None, segmenter: Optional[Segmenter] = None,
+                        partition_by_month: bool = False) -> int:
+    """Segment a reservation CSV in bounded chunks and append the enriched rows to ``output``.
+
+    Pass 1 sums reservations per (arrival_date, company|channel) into a compact aggregate; pass 2
+    assigns rule-based archetypes per chunk and looks tour groups up in that aggregate, so the
+    result matches ``Segmenter.enrich`` on the whole file. The output format follows the extension
+    of ``output`` (see ``io.TableWriter``). Returns the number of rows written. A fitted
+    ``segmenter.model`` is applied per chunk, matching ``Segmenter.transform``.
+    """
+    seg = segmenter or Segmenter()
+    if seg.use_unsupervised and seg.model is None:
+        raise ValueError("Fitting clusters needs the whole file; fit a model first (fit_segment_model_chunked) to apply it per chunk")
+    chunk_rows = _chunk_rows(input, chunk_rows, max_memory, seg)
+    totals, has_ids, categories = _first_pass(input, chunk_rows, seg)
+    arrow = table_format(output) != "csv"
+
+    written = 0
+    with TableWriter(output, partition_by_month=partition_by_month) as writer:
+        for df, c_res in _labelled_chunks(input, chunk_rows, seg, totals):
+            if seg.model is not None:
+                seg._apply(df, seg.model)
+            df = seg._finalize(df, c_res, id_offset=written, has_ids=has_ids)
+            writer.write(to_enriched_schema(df, categories) if arrow else df)
+            written = writer.rows
+        if written == 0:
+            writer.write(pd.DataFrame(columns=KEEP_COLUMNS))
+    return written
@@ -0,0 +1,237 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+import numpy as np
+import pandas as pd
+from .features import _to_days, plain_labels
+from .models.base import BaseForecaster
+from .models.staffing import staffing_table
+from .profiling import stage
+
+# Monte Carlo staffing. Booked stays are grouped into cohorts (arrival, departure, archetype, party
+# size); each draw keeps Binomial(cohort size, (1 - cancellation) * (1 - no-show)) of a cohort, so
+# all nights of a stay go together, and adds Poisson walk-in rooms per (day, archetype). A chunk of
+# draws becomes (draw, day, archetype) rooms / checkouts / arrivals / covers cubes through segment
+# sums and one cumsum; HK hours and Erlang staffing then run on the whole chunk. Daily hours are kept
+# per draw (days x draws floats); hourly staff only as integer histograms per (day, slot), so memory
+# is bounded by `chunk_size` and the horizon, not by `draws`.
+
+AREAS = ("reception", "breakfast")
+
+def _label(q: float) -> str:
+    return f"p{q * 100:g}"
+
+def _quantile_from_counts(counts: np.ndarray, q: float) -> np.ndarray:
+    # smallest value whose empirical CDF reaches q (numpy's "inverted_cdf"), per row of value counts
+    cdf = counts.cumsum(axis=1)
+    need = np.ceil(q * cdf[:, -1:] - 1e-9)
+    return (cdf < np.maximum(need, 1)).sum(axis=1)
+
+@dataclass
+class Cohorts:
+    labels: List[str]
+    origin: int           # day ordinal of row 0
+    days: int             # rows in the cubes (last departure included)
+    arrival: np.ndarray   # (C,) day index
+    departure: np.ndarray # (C,) day index
+    archetype: np.ndarray # (C,) code into labels
+    pax: np.ndarray       # (C,) adults + children per stay
+    count: np.ndarray     # (C,) stays
+
+    @classmethod
+    def from_reservations(cls, df: pd.DataFrame) -> "Cohorts":
+        arr, dep = _to_days(df["arrival_date"]), _to_days(df["departure_date"])
+        arche = plain_labels(df["archetype"])
+        ok = ~(np.isnat(arr) | np.isnat(dep)) & (dep > arr) & arche.notna().to_numpy() & df["reservation_id"].notna().to_numpy()
+        if not ok.any():
+            raise ValueError("No reservations with valid stay dates.")
+        a, d = arr[ok].astype(np.int64), dep[ok].astype(np.int64)
+        codes, labels = pd.factorize(arche[ok], sort=True)
+        pax = (df["adults"][ok].fillna(0).to_numpy(dtype=float) + df["children"][ok].fillna(0).to_numpy(dtype=float))
+        origin = int(a.min())
+        # sorted by (arrival, archetype) so the arrival-side segment sums need no reordering
+        keys = np.stack([a - origin, codes, d - origin, pax], axis=1)
+        uniq, count = np.unique(keys, axis=0, return_counts=True)
+        return cls(labels=[str(x) for x in labels], origin=origin, days=int(uniq[:, 2].max()) + 1,
+                   arrival=uniq[:, 0].astype(np.int64), departure=uniq[:, 2].astype(np.int64),
+                   archetype=uniq[:, 1].astype(np.int64), pax=uniq[:, 3], count=count)
+
+class _Segments:
+    # out[:, index[j]] += values[:, j] for (draws x cohorts) blocks; the layout is computed once per run
+    def __init__(self, index: np.ndarray, size: int):
+        self.order = np.argsort(index, kind="stable")
+        self.identity = bool((self.order == np.arange(len(index))).all())
+        idx = index[self.order]
+        self.starts = np.flatnonzero(np.r_[True, idx[1:] != idx[:-1]])
+        self.slots = idx[self.starts]
+        self.size = size
+
+    def sum(self, values: np.ndarray, ordered: bool = False) -> np.ndarray:
+        v = values if ordered or self.identity else values[:, self.order]
+        out = np.zeros((values.shape[0], self.size))
+        out[:, self.slots] = np.add.reduceat(v, self.starts, axis=1)
+        return out
+
+@dataclass
+class MonteCarloForecaster(BaseForecaster):
+    """P50/P90/P95 (``quantiles``) of daily HK man-hours and headcount and of hourly reception and
+    breakfast staff over ``draws`` perturbed futures of the booked reservations.
+
+    Rates come from the ``simulation`` config section. With zero cancellation, no-show and walk-in
+    rates every quantile equals ``LaborForecaster`` / ``ServiceLoadForecaster`` on the same book
+    (duplicate ``reservation_id`` rows count as separate rooms here). Results are reproducible for a
+    given ``seed`` and ``chunk_size``.
+    """
+    draws: int = 10_000
+    chunk_size: int = 500
+    seed: int = 0
+    quantiles: Sequence[float] = (0.5, 0.9, 0.95)
+    utilization: Optional[float] = 0.85
+    target_wait_min: Optional[float] = None
+    shift_hours: float = 8.0
+    areas: Sequence[str] = AREAS
+
+    def __post_init__(self):
+        super().__post_init__()
+        if self.draws < 1 or self.chunk_size < 1:
+            raise ValueError("draws and chunk_size must be >= 1")
+        if not all(0.0 < q <= 1.0 for q in self.quantiles):
+            raise ValueError("quantiles must be in (0, 1]")
+        unknown = set(self.areas) - set(AREAS)
+        if unknown:
+            raise ValueError(f"Unknown areas {sorted(unknown)}. Available: {list(AREAS)}")
+
+    def _rates(self, labels: Sequence[str]) -> Tuple[np.ndarray, np.ndarray, int]:
+        from .config.schema import SimulationConfig
+        # a merged config was validated at load time; a hand-built dict is checked here (each rate in [0, 1])
+        cfg = SimulationConfig(**((self.config or {}).get("simulation") or {}))
+
+        def per_label(table: Dict[str, float]) -> np.ndarray:
+            return np.array([float(table.get(a, table.get("Other", 0.0))) for a in labels])
+
+        keep = (1.0 - per_label(cfg.cancellation_rate)) * (1.0 - per_label(cfg.no_show_rate))
+        return keep, per_label(cfg.walk_ins_per_day), cfg.walk_in_nights
+
+    @staticmethod
+    def _cubes(co: Cohorts, segments: Tuple[_Segments, _Segments], rng: Union[np.random.Generator, _ZeroRng], n: int, keep: np.ndarray,
+               walk_ins: np.ndarray, nights: int, walk_in_pax: np.ndarray) -> Dict[str, np.ndarray]:
+        D, A = co.days, len(co.labels)
+        start, end = segments
+        p = keep[co.archetype]
+        # most cohorts are one stay: a uniform draw is much cheaper than a binomial
+        kept = (rng.random((n, len(co.count))) < p).astype(float)
+        multi = np.flatnonzero(co.count > 1)
+        kept[:, multi] = rng.binomial(co.count[multi], p[multi], size=(n, len(multi)))
+        kept_end = kept[:, end.order]
+        arrivals = start.sum(kept)
+        checkouts = end.sum(kept_end, ordered=True)
+        rooms = (arrivals - checkouts).reshape(n, D, A).cumsum(axis=1)
+        covers = start.sum(kept * co.pax) - end.sum(kept_end * co.pax[end.order], ordered=True)
+        covers = covers.reshape(n, D, A).cumsum(axis=1)
+        arrivals, checkouts = arrivals.reshape(n, D, A), checkouts.reshape(n, D, A)
+        if walk_ins.any():
+            w = rng.poisson(walk_ins, size=(n, D, A)).astype(float)
+            w[:, -1] = 0  # the last row is the final departure day, outside the horizon
+            arrivals += w
+            for j in range(nights):  # a walk-in is in house for `nights` nights from its arrival
+                rooms[:, j:] += w[:, :D - j]
+                covers[:, j:] += w[:, :D - j] * walk_in_pax
+            checkouts[:, nights:] += w[:, :D - nights]
+        return {"rooms": rooms, "checkouts": checkouts, "arrivals": arrivals, "covers": covers}
+
+    @stage("simulate.run")
+    def simulate(self, enriched: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+        co = Cohorts.from_reservations(self._ensure_dates(enriched))
+        D, A = co.days, len(co.labels)
+        keep, walk_ins, nights = self._rates(co.labels)
+        # walk-in party size: the booked average per archetype (1 where an archetype has no stays)
+        stays = np.bincount(co.archetype, weights=co.count, minlength=A)
+        walk_in_pax = np.where(stays > 0, np.bincount(co.archetype, weights=co.count * co.pax, minlength=A) / np.maximum(stays, 1), 1.0)
+
+        cc = self.compiled
+        hk = cc.housekeeping
+        mults = cc.hk_multipliers_for(co.labels)
+        util = self.utilization if self.utilization is not None else hk["target_utilization"]
+
+        # output cells: the days/slots the point forecasters list for this book (all days if walk-ins)
+        size = D * A
+        segments = (_Segments(co.arrival * A + co.archetype, size), _Segments(co.departure * A + co.archetype, size))
+        base = self._cubes(co, segments, _ZeroRng(), 1, np.ones(A), np.zeros(A), nights, walk_in_pax)
+        inhouse_days = (base["rooms"][0] > 0).any(axis=1)
+        inhouse_days[-1] = False
+        if walk_ins.any():
+            inhouse_days[:-1] = True
+        services: Dict[str, Dict[str, Any]] = {}
+        for area in self.areas:
+            slots, weights, support = cc.distributions_for(area, co.labels)
+            counts = base["arrivals" if area == "reception" else "rooms"][0] > 0
+            if walk_ins.any():
+                counts[:-1] |= walk_ins > 0
+            listed = (counts.astype(float) @ support.astype(float)) > 0
+            cfg = cc.raw["service_load"][area]
+            rate = float(cfg["transactions_per_agent_per_hour" if area == "reception" else "covers_per_staff_per_hour"])
+            a_util = self.utilization if self.utilization is not None else float(cfg.get("utilization", 0.85))
+            target = self.target_wait_min
+            if target is None:
+                target = float(cc.raw.get("service_sla", {}).get("default_target_wait_min", 5.0))
+            d_idx, t_idx = np.nonzero(listed)
+            services[area] = {"slots": slots, "weights": weights, "d": d_idx, "t": t_idx, "rate": rate, "util": a_util,
+                              "table": staffing_table(rate, target, a_util), "sum": np.zeros(len(d_idx)),
+                              "hist": np.zeros((len(d_idx), 1), dtype=np.int64)}
+
+        hours = np.zeros((D, self.draws))
+        seeds = np.random.SeedSequence(self.seed).spawn((self.draws + self.chunk_size - 1) // self.chunk_size)
+        for i, ss in enumerate(seeds):
+            lo = i * self.chunk_size
+            n = min(self.chunk_size, self.draws - lo)
+            cube = self._cubes(co, segments, np.random.default_rng(ss), n, keep, walk_ins, nights, walk_in_pax)
+            rooms = cube["rooms"]
+            # as LaborForecaster: checkouts count only on days with stays of that archetype in house
+            out = np.where(rooms > 0, cube["checkouts"], 0.0)
+            stay = np.clip(rooms - out, 0, None)
+            minutes = (out * hk["minutes_per_checkout"] + stay * hk["minutes_per_stayover"]) @ mults
+            hours[:, lo:lo + n] = (minutes / 60.0).T
+            for area, s in services.items():
+                src = cube["arrivals"] if area == "reception" else cube["covers"]
+                load = (src @ s["weights"])[:, s["d"], s["t"]]  # (n, cells)
+                staff = s["table"].staff(load)
+                s["sum"] += load.sum(axis=0)
+                top = int(staff.max(initial=0)) + 1
+                if top > s["hist"].shape[1]:
+                    s["hist"] = np.pad(s["hist"], ((0, 0), (0, top - s["hist"].shape[1])))
+                V = s["hist"].shape[1]
+                cells = np.broadcast_to(np.arange(staff.shape[1]), staff.shape)
+                s["hist"] += np.bincount((cells * V + staff).ravel(), minlength=staff.shape[1] * V).reshape(-1, V)
+
+        dates = (np.arange(D) + co.origin).astype("datetime64[D]")
+        days = np.flatnonzero(inhouse_days)
+        labor = pd.DataFrame({"date": dates[days].astype(object), "hk_man_hours_mean": hours[days].mean(axis=1)})
+        for q in self.quantiles:
+            h = np.quantile(hours[days], q, axis=1, method="inverted_cdf")
+            labor[f"hk_man_hours_{_label(q)}"] = h
+        for q in self.quantiles:
+            h = labor[f"hk_man_hours_{_label(q)}"].to_numpy()
+            labor[f"recommended_headcount_{_label(q)}"] = np.ceil(h / (self.shift_hours * util)).astype(int).clip(min=0)
+        result = {"labor": labor}
+        for area, s in services.items():
+            col = "expected_transactions" if area == "reception" else "expected_covers"
+            ts = pd.to_datetime(pd.Series(dates[s["d"]])) + pd.to_timedelta(s["slots"][s["t"]], unit="min")
+            frame = pd.DataFrame({"datetime": ts.to_numpy(), "area": area, f"{col}_mean": s["sum"] / self.draws})
+            for q in self.quantiles:
+                frame[f"recommended_staff_{_label(q)}"] = _quantile_from_counts(s["hist"], q)
+            result[f"service_{area}"] = frame
+        return result
+
+class _ZeroRng:
+    # the unperturbed book through the same cube code: keep every stay, no walk-ins
+    @staticmethod
+    def random(size):
+        return np.zeros(size)
+
+    @staticmethod
+    def binomial(n, p, size):
+        return np.broadcast_to(n, size).copy()
+
+    @staticmethod
+    def poisson(lam, size):
+        return np.zeros(size)
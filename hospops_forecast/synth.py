@@ -0,0 +1,197 @@
+from __future__ import annotations
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Union
+import numpy as np
+import pandas as pd
+from .segmentation.archetypes import Archetype
+
+# Seeded generators for reservations, flights and HK actuals at any size (benchmarks, demos, tests).
+# Output is a pure function of the arguments: blocks of BLOCK_ROWS rows each draw from their own
+# (seed, block) stream, so `iter_reservations` and `generate_reservations` produce the same rows.
+
+BLOCK_ROWS = 250_000
+
+ARCHETYPE_MIX: Dict[str, float] = {
+    Archetype.SoloBusiness.value: 0.30,
+    Archetype.LeisureCouple.value: 0.28,
+    Archetype.FamilyWithKids.value: 0.18,
+    Archetype.TourGroup.value: 0.14,
+    Archetype.Other.value: 0.10,
+}
+
+RESERVATION_COLUMNS = ["reservation_id","arrival_date","departure_date","adults","children","room_type",
+                       "channel","company","nationality","status"]
+NATIONALITIES = np.array(["TR","US","DE","GB","FR","NL","RU","IT","ES","SA","JP","CN"], dtype=object)
+LEISURE_CHANNELS = np.array(["OTA","Direct","OTA","Direct-Web","Agent"], dtype=object)
+CARRIERS = np.array(["TK","PC","LH","BA","AF","KL","QR","EK"], dtype=object)
+
+# the segmenter tags 10+ same-day arrivals sharing company|channel as a tour group, so name pools
+# grow with booking density to keep individual bookings below that by a wide margin
+_KEY_LOAD = 3.0
+
+def _pool(prefix: str, daily: float, minimum: int) -> np.ndarray:
+    n = max(minimum, int(np.ceil(daily / _KEY_LOAD)))
+    return np.array([f"{prefix} {i:05d}" for i in range(n)], dtype=object)
+
+_RESERVATIONS, _FLIGHTS, _HK = range(3)  # independent streams per generator
+
+def _rng(seed: int, stream: int, block: int = 0) -> np.random.Generator:
+    return np.random.default_rng([seed, stream, block])
+
+def _geometric_los(rng: np.random.Generator, n: int, lo: int, p: float, cap: int) -> np.ndarray:
+    return np.minimum(lo + rng.geometric(p, n) - 1, cap)
+
+def _tour_rows(rng: np.random.Generator, n: int, days: int):
+    # whole groups of 10-40 rooms: one arrival day, stay length and operator per group
+    if n < 10:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    sizes = rng.integers(10, 41, size=n // 10 + 1)
+    group = np.repeat(np.arange(len(sizes)), sizes)[:n]
+    last = group[-1]
+    if (group == last).sum() < 10:
+        group[group == last] = last - 1
+    g = group.max() + 1
+    return rng.integers(0, days, g)[group], rng.integers(2, 6, g)[group], group
+
+def _block(rng: np.random.Generator, first_id: int, n: int, days: int, start: np.datetime64,
+           mix: Dict[str, float], cancel_rate: float, pools: Dict[str, np.ndarray]) -> pd.DataFrame:
+    names = list(mix)
+    p = np.array([mix[a] for a in names], dtype=float)
+    counts = rng.multinomial(n, p / p.sum())
+    tour = names.index(Archetype.TourGroup.value) if Archetype.TourGroup.value in names else None
+    rest = [i for i in range(len(names)) if i != tour and p[i] > 0]
+    if tour is not None and 0 < counts[tour] < 10 and rest:
+        # too few rows for one 10-room group: the last other archetype takes them, so the block keeps n rows
+        counts[rest[-1]] += counts[tour]
+        counts[tour] = 0
+    parts = []
+    for a, m in zip(names, counts):
+        if a == Archetype.TourGroup.value:
+            day, los, group = _tour_rows(rng, int(m), days)
+            k = len(day)
+            parts.append(dict(day=day, los=los, adults=np.full(k, 2), children=np.zeros(k, dtype=int),
+                              room_type=np.full(k, "Standard", dtype=object), channel=np.full(k, "Wholesale", dtype=object),
+                              company=pools["operators"][(group + first_id) % len(pools["operators"])]))
+            continue
+        m = int(m)
+        # business arrivals: each Mon-Fri day of the horizon equally likely
+        weekdays = pools["weekdays"]
+        day = weekdays[rng.integers(0, len(weekdays), m)] if a == Archetype.SoloBusiness.value else rng.integers(0, days, m)
+        if a == Archetype.SoloBusiness.value:
+            los = rng.choice([1, 2, 3], size=m, p=[0.5, 0.3, 0.2])
+            adults, children = np.ones(m, dtype=int), np.zeros(m, dtype=int)
+            room = rng.choice(np.array(["Standard","Deluxe"], dtype=object), size=m, p=[0.7, 0.3])
+            channel = rng.choice(np.array(["Corp","Corp","GDS"], dtype=object), size=m)
+            company = pools["companies"][rng.integers(0, len(pools["companies"]), m)]
+        elif a == Archetype.LeisureCouple.value:
+            los = _geometric_los(rng, m, 2, 0.4, 14)
+            adults, children = np.full(m, 2), np.zeros(m, dtype=int)
+            room = rng.choice(np.array(["Standard","Deluxe","Superior"], dtype=object), size=m, p=[0.4, 0.4, 0.2])
+            channel = LEISURE_CHANNELS[rng.integers(0, len(LEISURE_CHANNELS), m)]
+            company = pools["agencies"][rng.integers(0, len(pools["agencies"]), m)]
+        elif a == Archetype.FamilyWithKids.value:
+            los = _geometric_los(rng, m, 3, 0.3, 14)
+            adults = rng.choice([1, 2], size=m, p=[0.15, 0.85])
+            children = rng.choice([1, 2, 3], size=m, p=[0.5, 0.4, 0.1])
+            room = rng.choice(np.array(["Family","Suite","Deluxe"], dtype=object), size=m, p=[0.5, 0.2, 0.3])
+            channel = LEISURE_CHANNELS[rng.integers(0, len(LEISURE_CHANNELS), m)]
+            company = pools["agencies"][rng.integers(0, len(pools["agencies"]), m)]
+        else:  # long-stay singles: no rule matches them
+            los = _geometric_los(rng, m, 4, 0.25, 28)
+            adults, children = np.ones(m, dtype=int), np.zeros(m, dtype=int)
+            room = np.full(m, "Standard", dtype=object)
+            channel = np.full(m, "Direct", dtype=object)
+            company = pools["agencies"][rng.integers(0, len(pools["agencies"]), m)]
+        parts.append(dict(day=day, los=los, adults=adults, children=children, room_type=room, channel=channel, company=company))
+
+    cols = {k: np.concatenate([pt[k] for pt in parts]) for k in parts[0]}
+    k = len(cols["day"])
+    order = rng.permutation(k)  # exports are in booking order, not grouped by guest type
+    cols = {c: v[order] for c, v in cols.items()}
+    arrival = start + cols["day"].astype("timedelta64[D]")
+    return pd.DataFrame({
+        "reservation_id": "R" + pd.Series(np.arange(first_id, first_id + k)).astype(str).str.zfill(9),
+        "arrival_date": arrival.astype("datetime64[ns]"),
+        "departure_date": (arrival + cols["los"].astype("timedelta64[D]")).astype("datetime64[ns]"),
+        "adults": cols["adults"].astype(int),
+        "children": cols["children"].astype(int),
+        "room_type": cols["room_type"],
+        "channel": cols["channel"],
+        "company": cols["company"],
+        "nationality": NATIONALITIES[rng.integers(0, len(NATIONALITIES), k)],
+        "status": np.where(rng.random(k) < cancel_rate, "Cancelled", "Confirmed").astype(object),
+    }, columns=RESERVATION_COLUMNS)
+
+def iter_reservations(n: int, seed: int = 0, start: str = "2025-01-01", days: int = 365,
+                      mix: Optional[Dict[str, float]] = None, cancel_rate: float = 0.08) -> Iterator[pd.DataFrame]:
+    """Reservations in blocks of ``BLOCK_ROWS``; concatenated they equal ``generate_reservations``.
+
+    ``mix`` is the intended archetype share (default ``ARCHETYPE_MIX``): tour groups come as blocks of
+    10-40 rooms (a block drawing fewer than 10 tour rows gives them to another archetype, so exactly
+    ``n`` rows come out unless the mix is tour groups only), business stays arrive on weekdays. ``status`` marks ``cancel_rate`` of the rows
+    "Cancelled"; drop them before segmenting unless cancellations are what you are measuring.
+    """
+    mix = dict(ARCHETYPE_MIX if mix is None else mix)
+    total = sum(mix.values())
+    daily = n / max(days, 1)
+    pools = {
+        "companies": _pool("Company", daily * mix.get(Archetype.SoloBusiness.value, 0) / total, 50),
+        "agencies": _pool("Agency", daily * (1 - mix.get(Archetype.SoloBusiness.value, 0) / total), 50),
+        "operators": np.array([f"Tour Operator {i:03d}" for i in range(40)], dtype=object),
+        "weekdays": np.flatnonzero((np.arange(days) + pd.Timestamp(start).weekday()) % 7 < 5),
+    }
+    if len(pools["weekdays"]) == 0:  # a weekend-only horizon
+        pools["weekdays"] = np.arange(days)
+    first = np.datetime64(pd.Timestamp(start).date(), "D")
+    done = 0
+    for block in range((n + BLOCK_ROWS - 1) // BLOCK_ROWS):
+        m = min(BLOCK_ROWS, n - done)
+        yield _block(_rng(seed, _RESERVATIONS, block), done, m, days, first, mix, cancel_rate, pools)
+        done += m
+
+def generate_reservations(n: int, seed: int = 0, **kwargs) -> pd.DataFrame:
+    """``n`` synthetic reservations (see ``iter_reservations`` for the knobs)."""
+    blocks = list(iter_reservations(n, seed, **kwargs))
+    return pd.concat(blocks, ignore_index=True) if blocks else pd.DataFrame(columns=RESERVATION_COLUMNS)
+
+def write_reservations(path: Union[str, Path], n: int, seed: int = 0, **kwargs) -> int:
+    """Stream ``n`` reservations to CSV/Parquet/Feather block by block; returns the row count."""
+    from .io import TableWriter
+    with TableWriter(path) as w:
+        for block in iter_reservations(n, seed, **kwargs):
+            w.write(block)
+    return w.rows
+
+def generate_flights(n: int, seed: int = 0, start: str = "2025-01-01", days: int = 30) -> pd.DataFrame:
+    """``n`` departures over ``days`` days with morning and evening banks, in the flights CSV layout."""
+    rng = _rng(seed, _FLIGHTS)
+    hours = np.arange(5, 24)
+    w = np.exp(-0.5 * ((hours - 8) / 1.5) ** 2) + np.exp(-0.5 * ((hours - 18) / 2.0) ** 2) + 0.15
+    hour = rng.choice(hours, size=n, p=w / w.sum())
+    minute = rng.integers(0, 12, n) * 5
+    capacity = rng.choice([150, 180, 220, 300], size=n, p=[0.3, 0.4, 0.2, 0.1])
+    day = np.datetime64(pd.Timestamp(start).date(), "D") + rng.integers(0, days, n).astype("timedelta64[D]")
+    return pd.DataFrame({
+        "flight_id": CARRIERS[rng.integers(0, len(CARRIERS), n)] + pd.Series(rng.integers(100, 10000, n)).astype(str).to_numpy(dtype=object),
+        "date": pd.to_datetime(day).strftime("%Y-%m-%d"),
+        "gate_time": pd.Series(hour).astype(str).str.zfill(2) + ":" + pd.Series(minute).astype(str).str.zfill(2),
+        "pax_count": np.round(capacity * rng.beta(8, 2, n)).astype(int),
+        "mix_business_share": np.round(rng.uniform(0.05, 0.4, n), 2),
+    })
+
+def generate_hk_actuals(enriched: pd.DataFrame, seed: int = 0, multipliers: Optional[Dict[str, float]] = None,
+                        noise: float = 0.05, config: Optional[dict] = None) -> pd.DataFrame:
+    """Daily ``hk_man_hours`` the housekeeping model would give with ``multipliers``, times lognormal noise.
+
+    Calibration and learning runs on these should recover ``multipliers`` up to the noise.
+    """
+    from .models.base import default_config
+    from .models.labor import LaborForecaster
+    cfg = default_config() if config is None else config
+    if multipliers:
+        cfg = {**cfg, "housekeeping": {**cfg["housekeeping"],
+               "archetype_multipliers": {**cfg["housekeeping"]["archetype_multipliers"], **multipliers}}}
+    day = LaborForecaster(cfg).predict(enriched)
+    rng = _rng(seed, _HK)
+    return pd.DataFrame({"date": day["date"].to_numpy(),
+                         "hk_man_hours": day["hk_man_hours"].to_numpy() * rng.lognormal(0.0, noise, len(day))})
@@ -0,0 +1,16 @@
+import pandas as pd
+from hospops_forecast.models.airline import AirlineForecaster
+
+def test_airline_all_areas_and_midnight_crossing():
+    fl = pd.DataFrame([
+        {"flight_id":"A1","date":"2025-11-03","gate_time":"00:10","pax_count":100,"mix_business_share":0.2},
+        {"flight_id":"A2","date":"2025-11-03","gate_time":"15:00","pax_count":180,"mix_business_share":0.3},
+    ])
+    af = AirlineForecaster()
+    out = af.predict_all(fl)
+    assert set(out["area"]) == {"boarding","gate","lounge"}
+    lounge = af.predict(fl, area="lounge").set_index("datetime")["expected_pax"]
+    assert lounge[pd.Timestamp("2025-11-02 22:40")] == 20.0
+    assert lounge[pd.Timestamp("2025-11-02 23:10")] == 50.0
+    assert lounge[pd.Timestamp("2025-11-02 23:40")] == 30.0
+    assert out.groupby("area")["expected_pax"].sum().round(6).to_dict() == {"boarding": 280.0, "gate": 280.0, "lounge": 280.0}
@@ -0,0 +1,43 @@
+import pytest
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+from fastapi.testclient import TestClient
+from hospops_forecast.api import app as api
+from hospops_forecast.api.datasets import DatasetStore
+
+SAMPLE = open("examples/data/sample_reservations.csv", "rb").read()
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(api, "datasets", DatasetStore())
+    return TestClient(api.app)
+
+def test_dataset_upload_dedupes_and_serves_forecasts(client):
+    r1 = client.post("/datasets", files={"file": ("res.csv", SAMPLE)}).json()
+    r2 = client.post("/datasets", files={"file": ("again.csv", SAMPLE)}).json()
+    assert r1["created"] and not r2["created"] and r1["dataset_id"] == r2["dataset_id"]
+    ds = r1["dataset_id"]
+    for path, params in [("/forecast/labor", {}), ("/forecast/fnb", {"meal": "all"}),
+                         ("/forecast/service", {"area": "breakfast"}), ("/forecast/dept", {"dept": "spa"})]:
+        by_id = client.post(path, params={**params, "dataset_id": ds})
+        by_file = client.post(path, params=params, files={"file": ("res.csv", SAMPLE)})
+        assert by_id.status_code == 200 and by_id.json() == by_file.json()
+    assert len(api.datasets) == 1
+    assert "inhouse" in client.get(f"/datasets/{ds}").json()["intermediates"]
+    assert client.delete(f"/datasets/{ds}").status_code == 200
+    assert client.post("/forecast/labor", params={"dataset_id": ds}).status_code == 404
+
+def test_store_lru_ttl_and_budget():
+    now = [0.0]
+    store = DatasetStore(max_items=2, ttl_seconds=10, clock=lambda: now[0])
+    a, _ = store.put(SAMPLE)
+    b, _ = store.put(SAMPLE + b"\n")
+    store.get(a.id)  # a is now most recently used
+    c, _ = store.put(SAMPLE + b"\n\n")
+    assert a.id in store and c.id in store and b.id not in store
+    now[0] = 11.0
+    assert a.id not in store and len(store) == 0
+    tight = DatasetStore(max_bytes=c.nbytes() + 1)
+    d, _ = tight.put(SAMPLE)
+    e, _ = tight.put(SAMPLE + b"\n")
+    assert e.id in tight and d.id not in tight
@@ -0,0 +1,48 @@
+import io, json
+import pandas as pd
+import pytest
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+from fastapi.testclient import TestClient
+from hospops_forecast.api import app as api
+from hospops_forecast.api.datasets import DatasetStore
+
+SAMPLE = open("examples/data/sample_reservations.csv", "rb").read()
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(api, "datasets", DatasetStore())
+    c = TestClient(api.app)
+    c.ds = c.post("/datasets", files={"file": ("res.csv", SAMPLE)}).json()["dataset_id"]
+    return c
+
+def _get(client, **params):
+    return client.post("/forecast/service", params={"area": "breakfast", "dataset_id": client.ds, **params})
+
+def test_formats_carry_the_same_rows(client):
+    records = _get(client).json()
+    ndjson = [json.loads(line) for line in _get(client, format="ndjson").text.splitlines()]
+    col = _get(client, format="columnar").json()
+    assert col["columns"] == list(records[0]) and col["rows"] == len(records) == len(ndjson)
+    assert [r["datetime"] for r in ndjson] == [r["datetime"] for r in records] == col["data"]["datetime"]
+    assert col["data"]["expected_covers"] == pytest.approx([r["expected_covers"] for r in records])
+    pa = pytest.importorskip("pyarrow")
+    arrow = pa.ipc.open_stream(_get(client, format="arrow").content).read_pandas()
+    parquet = pd.read_parquet(io.BytesIO(client.post("/forecast/service", params={"area": "breakfast", "dataset_id": client.ds},
+                                                     headers={"Accept": "application/vnd.apache.parquet"}).content))
+    assert len(arrow) == len(parquet) == len(records)
+    assert arrow["recommended_staff"].tolist() == [r["recommended_staff"] for r in records]
+
+def test_date_window_pagination_and_gzip(client):
+    records = _get(client).json()
+    day = records[0]["datetime"][:10]
+    window = _get(client, start=day, end=day)
+    assert all(r["datetime"].startswith(day) for r in window.json())
+    assert int(window.headers["X-Total-Count"]) == sum(r["datetime"].startswith(day) for r in records)
+    page = _get(client, offset=5, limit=10)
+    assert page.json() == records[5:15] and page.headers["X-Total-Count"] == str(len(records))
+    raw = _get(client, format="ndjson")
+    zipped = client.post("/forecast/service", params={"area": "breakfast", "dataset_id": client.ds, "format": "ndjson"},
+                         headers={"Accept-Encoding": "gzip"})
+    assert zipped.headers.get("content-encoding") == "gzip" and zipped.text == raw.text
+    assert _get(client, format="xml").status_code == 422
@@ -0,0 +1,69 @@
+import threading, time
+import pytest
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+from fastapi.testclient import TestClient
+from hospops_forecast.api import app as api
+from hospops_forecast.api.datasets import DatasetStore
+from hospops_forecast.api.jobs import JobManager, TooManyJobs
+
+SAMPLE = open("examples/data/sample_reservations.csv", "rb").read()
+
+def _wait(client, job_id, timeout=60):
+    t0 = time.time()
+    while time.time() - t0 < timeout:
+        r = client.get(f"/jobs/{job_id}/result")
+        if r.status_code != 202:
+            return r
+        time.sleep(0.05)
+    raise AssertionError("job did not finish")
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_forecast_job_matches_inline(monkeypatch, executor):
+    monkeypatch.setattr(api, "datasets", DatasetStore())
+    monkeypatch.setattr(api, "jobs", JobManager(executor=executor, max_workers=1))
+    with TestClient(api.app) as client:
+        ds = client.post("/datasets", files={"file": ("res.csv", SAMPLE)}).json()["dataset_id"]
+        sub = client.post("/jobs/forecast", params={"kind": "dept", "dept": "all", "dataset_id": ds})
+        assert sub.status_code == 202 and sub.json()["status"] in ("queued", "running")
+        res = _wait(client, sub.json()["job_id"])
+        assert res.status_code == 200
+        assert res.json() == client.post("/forecast/dept", params={"dept": "all", "dataset_id": ds}).json()
+        info = client.get(f"/jobs/{sub.json()['job_id']}").json()
+        assert info["status"] == "done" and info["run_seconds"] >= 0 and info["queue_seconds"] >= 0
+
+def test_limits_cancel_and_failures():
+    gate = threading.Event()
+    mgr = JobManager(max_workers=1, max_pending=2)
+    running = mgr.submit("block", gate.wait, 10)
+    queued = mgr.submit("block", gate.wait, 10)
+    with pytest.raises(TooManyJobs):
+        mgr.submit("block", gate.wait, 10)
+    assert mgr.cancel(queued.id).status == "cancelled"
+    failing = mgr.submit("boom", int, "x")
+    gate.set()
+    running.future.result(timeout=5); failing.future.exception(timeout=5)
+    assert running.status == "done" and running.result() is True
+    assert failing.status == "failed" and "ValueError" in failing.info()["error"]
+    mgr.shutdown()
+
+def test_event_loop_not_blocked(monkeypatch):
+    # a slow job on the background pool leaves interactive requests responsive
+    gate = threading.Event()
+    monkeypatch.setattr(api, "jobs", JobManager(max_workers=1))
+    with TestClient(api.app) as client:
+        job = api.jobs.submit("block", gate.wait, 10)
+        t0 = time.time()
+        assert client.get("/jobs").status_code == 200
+        assert client.get(f"/jobs/{job.id}").json()["status"] == "running"
+        assert time.time() - t0 < 2
+        gate.set()
+
+def test_forecast_job_parameters_are_validated_up_front(monkeypatch):
+    monkeypatch.setattr(api, "jobs", JobManager(max_workers=1))
+    with TestClient(api.app) as client:
+        for params in ({"kind": "service"}, {"kind": "dept"}, {"kind": "service", "area": "spa"}, {"kind": "fnb", "meal": "brunch"}):
+            r = client.post("/jobs/forecast", params=params, files={"file": ("res.csv", SAMPLE)})
+            assert r.status_code == 422, params
+        assert client.get("/jobs").json() == []
+        assert client.post("/dq/check", files={"file": ("res.csv", SAMPLE)}).status_code == 200
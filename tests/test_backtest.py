@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+from hospops_forecast import synth
+from hospops_forecast.backtest import REPORT_COLUMNS, Backtester
+from hospops_forecast.calibration.labor_calibrator import LaborCalibrator
+from hospops_forecast.models.labor import LaborForecaster
+from hospops_forecast.segmentation.segmenter import Segmenter
+
+@pytest.fixture(scope="module")
+def book():
+    en = Segmenter().enrich(synth.generate_reservations(3000, seed=2, days=90, cancel_rate=0.0))
+    hk = synth.generate_hk_actuals(en, seed=2, multipliers={"FamilyWithKids": 2.0})
+    return en, hk
+
+def test_fold_matches_calibrator_and_labor_forecaster(book):
+    en, hk = book
+    res = Backtester(window=30, horizon=7, step=10, models=["calibrated"], workers=1).run(en, hk)
+    p = res.predictions
+    origin = p["origin"].iloc[0]
+    days = pd.to_datetime(hk["date"]).dt.date
+    train = hk[(days <= origin) & (days > origin - pd.Timedelta(days=30))]
+    tuned = LaborCalibrator().fit_multipliers(en, train)
+    direct = LaborForecaster(tuned).predict(en).groupby("date").hk_man_hours.sum()
+    fold = p[p["origin"] == origin]
+    assert fold["horizon"].tolist() == list(range(1, 8))
+    np.testing.assert_allclose(fold["forecast"], direct.reindex(fold["date"]).to_numpy(), rtol=1e-9)
+
+def test_report_and_modes(book):
+    en, hk = book
+    rolling = Backtester(window=30, horizon=5, step=3, workers=1).run(en, hk)
+    expanding = Backtester(mode="expanding", window=30, horizon=5, step=3, workers=1).run(en, hk)
+    rep = rolling.report
+    assert list(rep.columns) == REPORT_COLUMNS
+    overall = rep[rep["archetype"] == "ALL"]
+    assert sorted(overall["model"].unique()) == ["baseline", "calibrated", "learned"]
+    assert overall["horizon"].tolist() == list(range(1, 6)) * 3
+    # calibrating to actuals with a 2x FamilyWithKids effect beats the configured multipliers
+    mae = overall.groupby("model")["mae"].mean()
+    assert mae["calibrated"] < mae["baseline"]
+    # the first origin trains on the same days in both modes, later ones differ
+    a, b = rolling.predictions, expanding.predictions
+    first = a["origin"].min()
+    pd.testing.assert_frame_equal(a[a["origin"] == first].reset_index(drop=True), b[b["origin"] == first].reset_index(drop=True))
+    assert not np.allclose(a["forecast"], b["forecast"])
+
+def test_process_pool_gives_the_same_predictions(book):
+    en, hk = book
+    serial = Backtester(window=30, horizon=5, step=7, workers=1).run(en, hk)
+    pooled = Backtester(window=30, horizon=5, step=7, workers=2).run(en, hk)
+    pd.testing.assert_frame_equal(serial.predictions, pooled.predictions)
+
+def test_invalid_settings():
+    with pytest.raises(ValueError, match="mode"):
+        Backtester(mode="sliding")
+    with pytest.raises(ValueError, match="Unknown models"):
+        Backtester(models=["arima"])
@@ -0,0 +1,18 @@
+import subprocess, sys
+
+HEAVY = ("pandas", "numpy", "sklearn", "pydantic", "pyarrow", "yaml")
+
+def _loaded_after(code):
+    probe = code + f"\nimport sys; print(','.join(m for m in {HEAVY!r} if m in sys.modules))"
+    out = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True, check=True)
+    return out.stdout.strip().splitlines()[-1] if out.stdout.strip() else ""
+
+def test_cli_help_loads_no_heavy_modules():
+    code = ("from typer.testing import CliRunner\nfrom hospops_forecast.cli import app\n"
+            "assert CliRunner().invoke(app, ['--help']).exit_code == 0")
+    assert _loaded_after(code) == ""
+
+def test_rule_based_paths_skip_sklearn():
+    code = ("from hospops_forecast.segmentation.segmenter import Segmenter\n"
+            "from hospops_forecast.models.labor import LaborForecaster\nimport hospops_forecast.io")
+    assert "sklearn" not in _loaded_after(code)
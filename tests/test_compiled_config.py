@@ -0,0 +1,52 @@
+import os
+import numpy as np
+import pandas as pd
+from hospops_forecast.config.compiled import CompiledConfig, compile_config, load_compiled
+from hospops_forecast.config.loader import load_config
+from hospops_forecast.models.base import default_config
+from hospops_forecast.models.departments import compile_departments, DepartmentForecaster
+from hospops_forecast.models.fnb import compile_meals
+from hospops_forecast.models.labor import LaborForecaster
+from hospops_forecast.models.service import compile_distributions
+from hospops_forecast.pipeline import ForecastPipeline
+
+LABELS = ["TourGroup", "Other", "Mystery", "SoloBusiness"]  # includes a label the config does not know
+
+def test_arrays_match_per_call_compilation():
+    cfg = default_config()
+    cc = compile_config(cfg)
+    keys, base, mults = cc.meals_for(["breakfast", "dinner"], LABELS)
+    k2, b2, m2 = compile_meals(cfg["fnb_meals"], ["breakfast", "dinner"], LABELS)
+    assert keys == k2 and np.array_equal(base, b2) and np.array_equal(mults, m2)
+    depts = list(cfg["departments"])
+    for a, b in zip(cc.departments_for(depts, LABELS), compile_departments(cfg["departments"], depts, LABELS)):
+        assert np.array_equal(a, b)
+    slots, w, s = cc.distributions_for("reception", LABELS)
+    s2, w2, sup2 = compile_distributions(cfg["service_load"]["reception"]["distributions"], LABELS)
+    cols = np.searchsorted(slots, s2)
+    assert np.array_equal(w[:, cols], w2) and np.array_equal(s[:, cols], sup2)
+    mults = cfg["housekeeping"]["archetype_multipliers"]
+    assert cc.hk_multipliers_for(LABELS).tolist() == [mults.get(a, 1.0) for a in LABELS]
+
+def test_cache_by_fingerprint_and_file(tmp_path):
+    assert compile_config(default_config()) is compile_config(default_config())
+    p = tmp_path / "cfg.yaml"
+    p.write_bytes(open("hospops_forecast/config/base.yaml", "rb").read())
+    first = load_compiled(p)
+    assert load_compiled(p) is first
+    os.utime(p, ns=(1, 1))  # touched, same bytes: no re-parse
+    assert load_compiled(p) is first
+    p.write_text(p.read_text().replace("minutes_per_checkout: 45", "minutes_per_checkout: 50"))
+    changed = load_compiled(p)
+    assert changed is not first and changed.housekeeping["minutes_per_checkout"] == 50.0
+    assert load_config(p)["housekeeping"]["minutes_per_checkout"] == 50.0
+
+def test_forecasters_accept_compiled_config():
+    df = pd.read_csv("examples/data/sample_reservations.csv", parse_dates=["arrival_date","departure_date"])
+    from hospops_forecast.segmentation import Segmenter
+    en = Segmenter().enrich(df)
+    cc = load_compiled(None)
+    assert isinstance(cc, CompiledConfig)
+    pd.testing.assert_frame_equal(LaborForecaster(cc).predict(en), LaborForecaster(load_config(None)).predict(en))
+    pd.testing.assert_frame_equal(DepartmentForecaster(cc).predict_all(en), DepartmentForecaster().predict_all(en))
+    assert set(ForecastPipeline(cc).run(en)) >= {"labor", "fnb_breakfast", "service_reception", "dept_spa"}
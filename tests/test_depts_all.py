@@ -0,0 +1,16 @@
+import numpy as np
+import pandas as pd
+from hospops_forecast.segmentation.segmenter import Segmenter
+from hospops_forecast.models.departments import DepartmentForecaster
+
+def test_dept_all_is_tidy_and_matches_single_dept():
+    df = pd.read_csv("examples/data/sample_reservations.csv", parse_dates=["arrival_date","departure_date"])
+    en = Segmenter().enrich(df)
+    dfc = DepartmentForecaster()
+    tidy = dfc.predict_all(en)
+    assert set(tidy["dept"]) == {"spa","concierge","valet","engineering"}
+    assert not tidy.duplicated(["date","dept"]).any()
+    valet = dfc.predict(en, dept="valet")
+    sub = tidy[tidy["dept"] == "valet"].reset_index(drop=True)
+    assert np.allclose(sub["volume"], valet["transactions"])
+    assert (sub["recommended_headcount"] == valet["recommended_headcount"]).all()
@@ -0,0 +1,29 @@
+import numpy as np
+import pandas as pd
+from hospops_forecast.segmentation.segmenter import Segmenter
+from hospops_forecast.features import (
+    expand_reservations_daily, count_inhouse_by_day_and_archetype, inhouse_by_day_and_archetype,
+)
+
+def test_inhouse_matches_expanded_path_on_sample():
+    df = pd.read_csv("examples/data/sample_reservations.csv", parse_dates=["arrival_date","departure_date"])
+    en = Segmenter().enrich(df)
+    old = count_inhouse_by_day_and_archetype(expand_reservations_daily(en))
+    pd.testing.assert_frame_equal(inhouse_by_day_and_archetype(en), old)
+
+def test_inhouse_matches_expanded_path_with_duplicates_and_gaps():
+    rng = np.random.default_rng(7)
+    n = 400
+    arr = pd.Timestamp("2025-03-01") + pd.to_timedelta(rng.integers(0, 60, n), unit="D")
+    df = pd.DataFrame({
+        "reservation_id": rng.integers(0, 150, n).astype(str),
+        "arrival_date": arr,
+        "departure_date": arr + pd.to_timedelta(rng.integers(-1, 10, n), unit="D"),
+        "adults": rng.integers(0, 4, n),
+        "children": rng.integers(0, 3, n),
+        "archetype": rng.choice(["SoloBusiness","LeisureCouple","FamilyWithKids","Other"], n),
+    })
+    df.loc[rng.random(n) < 0.05, "arrival_date"] = pd.NaT
+    df.loc[rng.random(n) < 0.05, "reservation_id"] = np.nan
+    old = count_inhouse_by_day_and_archetype(expand_reservations_daily(df))
+    pd.testing.assert_frame_equal(inhouse_by_day_and_archetype(df), old)
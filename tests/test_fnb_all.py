@@ -0,0 +1,14 @@
+import numpy as np
+import pandas as pd
+from hospops_forecast.segmentation.segmenter import Segmenter
+from hospops_forecast.models.fnb import FNBConsumptionForecaster
+
+def test_fnb_predict_all_covers_every_meal_and_matches_single_meal_view():
+    df = pd.read_csv("examples/data/sample_reservations.csv", parse_dates=["arrival_date","departure_date"])
+    en = Segmenter().enrich(df)
+    fb = FNBConsumptionForecaster()
+    long = fb.predict_all(en)
+    assert set(long["meal"]) == {"breakfast","lunch","dinner"}
+    dinner = long[long["meal"] == "dinner"].pivot(index="date", columns="item", values="quantity")
+    single = fb.predict(en, meal="dinner").set_index("date")
+    assert np.allclose(dinner[single.columns].to_numpy(), single.to_numpy())
@@ -0,0 +1,55 @@
+import pandas as pd
+import pytest
+from hospops_forecast.features import FORECAST_COLUMNS
+from hospops_forecast.io import read_enriched, write_enriched, clip_dates
+from hospops_forecast.models.labor import LaborForecaster
+from hospops_forecast.segmentation import Segmenter
+from hospops_forecast.segmentation.streaming import segment_csv_chunked
+
+pytest.importorskip("pyarrow")
+
+def _enriched():
+    return Segmenter().enrich(pd.read_csv("examples/data/sample_reservations.csv"))
+
+@pytest.mark.parametrize("name,partition", [("en.parquet", False), ("en.feather", False), ("ds", True)])
+def test_roundtrip_keeps_dtypes_and_forecast(tmp_path, name, partition):
+    en = _enriched()
+    write_enriched(en, tmp_path / name, partition_by_month=partition)
+    back = read_enriched(tmp_path / name)
+    assert pd.api.types.is_datetime64_any_dtype(back["arrival_date"])
+    assert isinstance(back["archetype"].dtype, pd.CategoricalDtype)
+    pd.testing.assert_frame_equal(LaborForecaster().predict(back), LaborForecaster().predict(en), check_dtype=False)
+
+def test_rewriting_a_dataset_replaces_it(tmp_path):
+    en = _enriched()
+    write_enriched(en, tmp_path / "ds", partition_by_month=True)
+    write_enriched(en, tmp_path / "ds", partition_by_month=True)
+    assert len(read_enriched(tmp_path / "ds")) == len(en)
+    for _ in range(2):
+        segment_csv_chunked("examples/data/sample_reservations.csv", tmp_path / "chunked", chunk_rows=100, partition_by_month=True)
+    assert len(read_enriched(tmp_path / "chunked")) == len(en)
+    (tmp_path / "other").mkdir()
+    (tmp_path / "other" / "notes.txt").write_text("keep")
+    with pytest.raises(ValueError, match="not replacing"):
+        write_enriched(en, tmp_path / "other", partition_by_month=True)
+
+@pytest.mark.parametrize("name,partition", [("en.parquet", False), ("en.feather", False), ("ds", True)])
+def test_chunked_segment_writes_the_enriched_schema(tmp_path, name, partition):
+    write_enriched(_enriched(), tmp_path / "mem" / name, partition_by_month=partition)
+    segment_csv_chunked("examples/data/sample_reservations.csv", tmp_path / "chunked" / name, chunk_rows=100,
+                        partition_by_month=partition)
+    mem, chunked = read_enriched(tmp_path / "mem" / name), read_enriched(tmp_path / "chunked" / name)
+    assert isinstance(chunked["channel"].dtype, pd.CategoricalDtype)
+    pd.testing.assert_series_equal(chunked.dtypes, mem.dtypes)
+    key = ["reservation_id"]
+    pd.testing.assert_frame_equal(chunked.sort_values(key).reset_index(drop=True), mem.sort_values(key).reset_index(drop=True))
+
+def test_window_read_matches_clipped_full_forecast(tmp_path):
+    en = _enriched()
+    write_enriched(en, tmp_path / "ds", partition_by_month=True)
+    start, end = en["arrival_date"].min() + pd.Timedelta(days=3), en["arrival_date"].min() + pd.Timedelta(days=6)
+    part = read_enriched(tmp_path / "ds", columns=FORECAST_COLUMNS, start=start, end=end)
+    assert list(part.columns) == FORECAST_COLUMNS and len(part) < len(en)
+    got = clip_dates(LaborForecaster().predict(part), start, end)
+    want = clip_dates(LaborForecaster().predict(en), start, end)
+    pd.testing.assert_frame_equal(got, want, check_dtype=False)
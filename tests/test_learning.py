@@ -10,3 +10,17 @@ def test_hk_learner_runs():
     ac = hk[["date","hk_man_hours"]]
     tuned = HKLearner().fit(en, ac)
     assert "housekeeping" in tuned and "archetype_multipliers" in tuned["housekeeping"]
+
+def test_fit_leaves_the_cached_config_alone():
+    import copy
+    from hospops_forecast.config.compiled import load_compiled
+    from hospops_forecast.config.loader import load_config
+    df = pd.read_csv("examples/data/sample_reservations.csv", parse_dates=["arrival_date","departure_date"])
+    en = Segmenter().enrich(df)
+    ac = LaborForecaster().predict(en)[["date","hk_man_hours"]]
+    compiled = load_compiled(None)
+    before = copy.deepcopy(compiled.raw)
+    tuned = HKLearner(compiled).fit(en, ac)
+    assert tuned["housekeeping"]["archetype_multipliers"] != before["housekeeping"]["archetype_multipliers"]
+    assert load_compiled(None).raw == before
+    assert load_config(None) == before
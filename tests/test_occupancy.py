@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+from hospops_forecast.segmentation.segmenter import Segmenter
+from hospops_forecast.features import inhouse_by_day_and_archetype, arrivals_by_day_and_archetype, checkouts_by_day_and_archetype
+from hospops_forecast.models.labor import LaborForecaster
+from hospops_forecast.occupancy import OccupancyState
+
+def _enriched():
+    df = pd.read_csv("examples/data/sample_reservations.csv", parse_dates=["arrival_date","departure_date"])
+    return Segmenter().enrich(df)
+
+def test_events_keep_state_equal_to_full_rebuild():
+    en = _enriched()
+    state = OccupancyState.from_enriched(en)
+    pd.testing.assert_frame_equal(state.inhouse(), inhouse_by_day_and_archetype(en), check_dtype=False)
+
+    rng = np.random.default_rng(11)
+    book = en.set_index("reservation_id")
+    for rid in rng.choice(book.index, 40, replace=False):
+        state.cancel(rid)
+        book = book.drop(rid)
+    for rid in rng.choice(book.index, 40, replace=False):
+        row = book.loc[rid].copy()
+        row["departure_date"] = row["departure_date"] + pd.Timedelta(days=int(rng.integers(1, 4)))
+        row["adults"] = int(rng.integers(1, 4))
+        state.modify({"reservation_id": rid, **row.to_dict()})
+        book.loc[rid] = row
+    state.add({"reservation_id": "NEW1", "arrival_date": "2025-11-30", "departure_date": "2025-12-03",
+               "adults": 2, "children": 1, "archetype": "FamilyWithKids"})
+    book.loc["NEW1"] = book.iloc[0]
+    book.loc["NEW1", ["arrival_date","departure_date","adults","children","archetype"]] = [
+        pd.Timestamp("2025-11-30"), pd.Timestamp("2025-12-03"), 2, 1, "FamilyWithKids"]
+    now = book.reset_index()
+
+    pd.testing.assert_frame_equal(state.inhouse(), inhouse_by_day_and_archetype(now), check_dtype=False)
+    pd.testing.assert_frame_equal(state.arrivals(), arrivals_by_day_and_archetype(now), check_dtype=False)
+    pd.testing.assert_frame_equal(state.checkouts(), checkouts_by_day_and_archetype(now), check_dtype=False)
+
+def test_forecast_for_dirty_days_only():
+    en = _enriched()
+    state = OccupancyState.from_enriched(en)
+    state.cancel(en["reservation_id"].iloc[0])
+    dirty = state.dirty_dates()
+    part = LaborForecaster().predict(None, features=state.features(dirty))
+    full = LaborForecaster().predict(None, features=state.features())
+    assert set(part["date"]) <= set(dirty)
+    pd.testing.assert_frame_equal(part.reset_index(drop=True), full[full["date"].isin(dirty)].reset_index(drop=True))
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+from hospops_forecast import synth
+from hospops_forecast.calibration.labor_calibrator import LaborCalibrator
+from hospops_forecast.calibration.online import OnlineLaborCalibrator
+from hospops_forecast.segmentation.segmenter import Segmenter
+
+@pytest.fixture(scope="module")
+def book():
+    en = Segmenter().enrich(synth.generate_reservations(4000, seed=5, days=120, cancel_rate=0.0))
+    hk = synth.generate_hk_actuals(en, seed=5, multipliers={"FamilyWithKids": 2.0})
+    return en, hk
+
+def test_nightly_updates_match_a_full_refit(book, tmp_path):
+    en, hk = book
+    full = LaborCalibrator().fit_multipliers(en, hk, min_mult=0.5, max_mult=3.0)
+    cal = OnlineLaborCalibrator().update(en, hk.iloc[:30])
+    for i in range(30, len(hk)):
+        if i % 20 == 0:  # state survives a save/load round trip unchanged
+            cal = OnlineLaborCalibrator.load(cal.save(tmp_path / "state.json"))
+        cal.update(en, hk.iloc[i:i + 1])
+    online = cal.tuned_config(min_mult=0.5, max_mult=3.0)
+    a, b = full["housekeeping"]["archetype_multipliers"], online["housekeeping"]["archetype_multipliers"]
+    assert a.keys() == b.keys()
+    np.testing.assert_allclose([b[k] for k in a], [a[k] for k in a], rtol=1e-9)
+
+def test_repeated_days_raise_or_are_skipped(book):
+    en, hk = book
+    cal = OnlineLaborCalibrator().update(en, hk.iloc[:10])
+    with pytest.raises(ValueError, match="already folded"):
+        cal.update(en, hk.iloc[5:12])
+    cal.update(en, hk.iloc[5:12], skip_seen=True)
+    assert cal.n_days == 12
+
+def test_forgetting_weights_older_days_geometrically(book):
+    en, hk = book
+    rho = 0.97
+    cal = OnlineLaborCalibrator(forgetting=rho).update(en, hk.iloc[:40])
+    for i in range(40, 80):
+        cal.update(en, hk.iloc[i:i + 1])
+    with pytest.raises(ValueError, match="in order"):
+        cal.update(en, hk.iloc[10:11].assign(date=pd.Timestamp("1999-01-01")))
+    X = LaborCalibrator()._design(en)
+    X, y = X.align(LaborCalibrator._daily_actuals(hk.iloc[:80]), join="inner", axis=0)
+    w = rho ** np.arange(len(X) - 1, -1, -1)
+    A = X.to_numpy()
+    m = np.linalg.solve((A * w[:, None]).T @ A + 1e-3 * np.eye(A.shape[1]), (A * w[:, None]).T @ y.to_numpy())
+    got = cal.multipliers(min_mult=-np.inf, max_mult=np.inf)
+    np.testing.assert_allclose([got[c] for c in X.columns], m, rtol=1e-8)
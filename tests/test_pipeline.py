@@ -0,0 +1,21 @@
+import pandas as pd
+from hospops_forecast.features import FeatureCache
+from hospops_forecast.segmentation.segmenter import Segmenter
+from hospops_forecast.models.labor import LaborForecaster
+from hospops_forecast.pipeline import ForecastPipeline
+
+def test_pipeline_builds_each_intermediate_once(monkeypatch):
+    df = pd.read_csv("examples/data/sample_reservations.csv", parse_dates=["arrival_date","departure_date"])
+    en = Segmenter().enrich(df)
+    calls = {}
+    nodes = {}
+    for name, (deps, fn) in FeatureCache.NODES.items():
+        def counted(*args, _fn=fn, _name=name):
+            calls[_name] = calls.get(_name, 0) + 1
+            return _fn(*args)
+        nodes[name] = (deps, counted)
+    monkeypatch.setattr(FeatureCache, "NODES", nodes)
+    out = ForecastPipeline().run(en)
+    assert {"labor","fnb_breakfast","service_reception","dept_spa"}.issubset(out)
+    assert calls == {"reservations": 1, "inhouse": 1, "arrivals": 1, "checkouts": 1}
+    pd.testing.assert_frame_equal(out["labor"], LaborForecaster().predict(en))
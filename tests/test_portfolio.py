@@ -0,0 +1,69 @@
+import multiprocessing, os
+import pandas as pd
+import pytest
+from hospops_forecast import portfolio
+from hospops_forecast.portfolio import PortfolioRunner, discover
+
+_run_property = portfolio._run_property
+
+def _crash_on_h1(job):
+    if job.property_id == "h1":
+        os._exit(1)  # as an OOM kill or segfault would
+    return _run_property(job)
+
+def _portfolio(tmp_path):
+    src = pd.read_csv("examples/data/sample_reservations.csv")
+    inp = tmp_path / "in"
+    inp.mkdir()
+    src.to_csv(inp / "h1.csv", index=False)
+    src.to_csv(inp / "h2.csv", index=False)
+    (inp / "h2.yaml").write_text("housekeeping:\n  minutes_per_checkout: 90\n")
+    (inp / "broken.csv").write_text("foo,bar\n1,2\n")
+    return inp
+
+def test_portfolio_isolates_failures_and_consolidates(tmp_path):
+    jobs = discover(_portfolio(tmp_path))
+    assert [j.property_id for j in jobs] == ["broken", "h1", "h2"]
+    out = tmp_path / "out"
+    summary = PortfolioRunner(workers=2).run(jobs, out)
+    assert summary.set_index("property_id")["status"].to_dict() == {"broken": "error", "h1": "ok", "h2": "ok"}
+    labor = pd.read_csv(out / "portfolio_labor.csv")
+    assert set(labor["property_id"]) == {"h1", "h2"}
+    # h2 overrides checkout minutes, h1 keeps the base config
+    per = labor.groupby("property_id")["hk_man_hours"].sum()
+    assert per["h2"] > per["h1"]
+    pd.testing.assert_frame_equal(pd.read_csv(out / "h1" / "labor.csv"),
+                                  labor[labor["property_id"] == "h1"].drop(columns="property_id").reset_index(drop=True))
+
+def test_a_crashing_worker_fails_only_its_property(tmp_path, monkeypatch):
+    if multiprocessing.get_start_method() != "fork":
+        pytest.skip("the patched worker function reaches the pool only through fork")
+    inp = _portfolio(tmp_path)
+    for extra in ("h3", "h4", "h5"):
+        (inp / f"{extra}.csv").write_bytes((inp / "h1.csv").read_bytes())
+    monkeypatch.setattr(portfolio, "_run_property", _crash_on_h1)
+    summary = PortfolioRunner(workers=2).run(discover(inp), tmp_path / "out")
+    status = summary.set_index("property_id")["status"].to_dict()
+    assert status == {"broken": "error", "h1": "error", "h2": "ok", "h3": "ok", "h4": "ok", "h5": "ok"}
+    assert "BrokenProcessPool" in summary.set_index("property_id").loc["h1", "error"]
+    assert list(summary["property_id"]) == ["broken", "h1", "h2", "h3", "h4", "h5"]
+
+def test_manifest(tmp_path):
+    inp = _portfolio(tmp_path)
+    (tmp_path / "m.csv").write_text("property_id,reservations,config\nA,in/h1.csv,\nB,in/h2.csv,in/h2.yaml\n")
+    jobs = discover(tmp_path / "m.csv")
+    assert [(j.property_id, j.config) for j in jobs] == [("A", None), ("B", inp / "h2.yaml")]
+    (tmp_path / "blank.csv").write_text("property_id,reservations\nA,in/h1.csv\nB,\n")
+    with pytest.raises(ValueError, match="reservations"):
+        discover(tmp_path / "blank.csv")
+
+def test_workers_return_paths_and_parquet_consolidates(tmp_path):
+    pytest.importorskip("pyarrow")
+    out = tmp_path / "out"
+    runner = PortfolioRunner(workers=1, fmt="parquet")
+    runner.run(discover(_portfolio(tmp_path)), out)
+    assert all(isinstance(p, str) for r in runner.results for p in r["outputs"].values())
+    service = pd.read_parquet(out / "portfolio_service_reception.parquet")
+    expected = pd.concat([pd.read_parquet(out / h / "service_reception.parquet").assign(property_id=h) for h in ("h1", "h2")],
+                         ignore_index=True)
+    pd.testing.assert_frame_equal(service, expected[service.columns])
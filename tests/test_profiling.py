@@ -0,0 +1,44 @@
+import json
+import pandas as pd
+from fastapi.testclient import TestClient
+from typer.testing import CliRunner
+from hospops_forecast import profiling
+from hospops_forecast.cli import app as cli
+from hospops_forecast.models.labor import LaborForecaster
+from hospops_forecast.segmentation.segmenter import Segmenter
+
+SAMPLE = "examples/data/sample_reservations.csv"
+
+def test_profile_records_nested_stages_with_rows_and_memory():
+    df = pd.read_csv(SAMPLE)
+    with profiling.Profile() as prof:
+        en = Segmenter().enrich(df)
+        LaborForecaster().predict(en)
+    by_name = {r.name: r for r in prof.stages()}
+    assert by_name["segment"].depth == 0 and by_name["segment"].rows_in == len(df) == by_name["segment"].rows_out
+    assert by_name["labor.predict"].depth == 0 and by_name["features.inhouse"].depth == 1
+    assert all(r.peak_mb is not None and r.seconds >= 0 for r in prof.stages())
+    assert "features.inhouse" in prof.format_table()
+    n = len(prof.records)
+    Segmenter().enrich(df)  # nothing is recorded once the profile is closed
+    assert len(prof.records) == n
+
+def test_cli_profile_json(tmp_path):
+    out = tmp_path / "prof.json"
+    r = CliRunner().invoke(cli, ["--profile-json", str(out), "--no-profile-memory", "segment",
+                                 "--input", SAMPLE, "--output", str(tmp_path / "en.csv")])
+    assert r.exit_code == 0, r.output
+    names = [s["name"] for s in json.loads(out.read_text())["stages"]]
+    assert names[:2] == ["io.read", "segment"] and "io.write" in names
+
+def test_api_metrics_exposes_latency_histograms_and_stages():
+    from hospops_forecast.api.app import app
+    client = TestClient(app)
+    with open(SAMPLE, "rb") as f:
+        assert client.post("/forecast/labor", files={"file": ("res.csv", f.read())}).status_code == 200
+    r = client.get("/metrics")
+    assert r.headers["content-type"].startswith("text/plain")
+    text = r.text
+    assert 'hospops_http_request_duration_seconds_bucket{method="POST",path="/forecast/labor",le="+Inf"}' in text
+    assert 'hospops_http_requests_total{method="POST",path="/forecast/labor",status="200"}' in text
+    assert 'hospops_stage_calls_total{stage="labor.predict"}' in text
@@ -0,0 +1,74 @@
+import json
+import pandas as pd
+import pytest
+from hospops_forecast.config.loader import merge_config
+from hospops_forecast.features import FeatureCache
+from hospops_forecast.models.base import default_config
+from hospops_forecast.models.fnb import FNBConsumptionForecaster
+from hospops_forecast.models.labor import LaborForecaster
+from hospops_forecast.models.service import ServiceLoadForecaster
+from hospops_forecast.scenarios import Scenario, ScenarioEngine, grid, scenarios_from_spec
+from hospops_forecast.segmentation.segmenter import Segmenter
+
+@pytest.fixture(scope="module")
+def enriched():
+    return Segmenter().enrich(pd.read_csv("examples/data/sample_reservations.csv"))
+
+def test_every_scenario_matches_its_own_forecast(enriched):
+    scenarios = grid({"utilization": [0.75, 0.95], "target_wait_min": [2, 10],
+                      "housekeeping.archetype_multipliers.FamilyWithKids": [1.0, 1.8]})
+    scenarios.append(Scenario("eggs", {"fnb_meals.breakfast.multipliers.TourGroup.eggs_kg": 3.0,
+                                       "service_load.reception.transactions_per_agent_per_hour": 9,
+                                       "shift_hours": 7.5}))
+    out = ScenarioEngine().evaluate(enriched, scenarios)
+    assert out["scenarios"]["scenario"].tolist() == [s.name for s in scenarios]
+    for s in scenarios:
+        cfg = merge_config(default_config(), s.config_overrides())
+        u, wait = s.overrides.get("utilization", 0.85), s.overrides.get("target_wait_min")
+        f = FeatureCache(enriched)
+        expected = {
+            "labor": LaborForecaster(cfg).predict(None, shift_hours=s.overrides.get("shift_hours", 8.0), utilization=u, features=f),
+            "fnb": FNBConsumptionForecaster(cfg).predict_all(None, features=f),
+            "service_reception": ServiceLoadForecaster(cfg).predict(None, area="reception", utilization=u, target_wait_min=wait, features=f),
+            "service_breakfast": ServiceLoadForecaster(cfg).predict(None, area="breakfast", utilization=u, target_wait_min=wait, features=f),
+        }
+        for name, exp in expected.items():
+            got = out[name][out[name]["scenario"] == s.name].drop(columns="scenario").reset_index(drop=True)
+            pd.testing.assert_frame_equal(got, exp.reset_index(drop=True)[list(got.columns)],
+                                          check_dtype=False, check_exact=False, rtol=1e-9)
+
+def test_spec_parsing_and_errors(enriched):
+    spec = {"scenarios": [{"name": "base"}], "grid": {"utilization": [0.8, 0.9]}}
+    items = scenarios_from_spec(json.loads(json.dumps(spec)))
+    assert [s.name for s in items] == ["base", "utilization=0.8", "utilization=0.9"]
+    assert Scenario("x", {"a.b.c": 1, "utilization": 0.8}).config_overrides() == {"a": {"b": {"c": 1}}}
+    with pytest.raises(ValueError, match="Duplicate"):
+        scenarios_from_spec({"scenarios": [{"name": "a"}, {"name": "a"}]})
+    with pytest.raises(ValueError, match="Unknown outputs"):
+        ScenarioEngine().evaluate(enriched, items, outputs=["spa"])
+    labor = ScenarioEngine().evaluate(enriched, items, outputs=["labor"])["labor"]
+    a, b = (labor[labor["scenario"] == n]["recommended_headcount"].to_numpy() for n in ("utilization=0.8", "utilization=0.9"))
+    assert (a >= b).all() and (a > b).any()
+
+def test_api_endpoint():
+    pytest.importorskip("httpx")
+    from fastapi.testclient import TestClient
+    from hospops_forecast.api import app as api
+    client = TestClient(api.app)
+    sample = open("examples/data/sample_reservations.csv", "rb").read()
+    spec = json.dumps({"grid": {"target_wait_min": [2, 10]}})
+    r = client.post("/scenarios", params={"output": "service_reception"}, data={"spec": spec}, files={"file": ("res.csv", sample)})
+    assert r.status_code == 200
+    rows = pd.DataFrame(r.json())
+    assert set(rows["scenario"]) == {"target_wait_min=2", "target_wait_min=10"}
+    bad = client.post("/scenarios", params={"output": "nope"}, data={"spec": spec}, files={"file": ("res.csv", sample)})
+    assert bad.status_code == 422
+
+def test_unknown_override_keys_are_rejected(enriched):
+    for key in ("housekeeping.archetype_multiplers.FamilyWithKids", "utilisation",
+                "housekeeping.archetype_multipliers.Family", "housekeeping"):
+        with pytest.raises(ValueError, match="Unknown override"):
+            ScenarioEngine().evaluate(enriched, [Scenario("typo", {key: 5})], outputs=["labor"])
+    cfg = default_config()
+    del cfg["housekeeping"]["archetype_multipliers"]["Other"]  # a known archetype the config doesn't list
+    ScenarioEngine(cfg).evaluate(enriched, [Scenario("ok", {"housekeeping.archetype_multipliers.Other": 2.0})], outputs=["labor"])
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+from hospops_forecast import synth
+from hospops_forecast.segmentation import Archetype, SegmentModel, Segmenter
+from hospops_forecast.segmentation.model import FEATURES
+from hospops_forecast.segmentation.streaming import fit_segment_model_chunked, segment_csv_chunked
+
+@pytest.fixture(scope="module")
+def raw():
+    return synth.generate_reservations(4000, seed=3, days=60)
+
+def test_fit_save_transform_matches_enrich(raw, tmp_path):
+    seg = Segmenter().fit(raw)
+    assert seg.model.counts.sum() == (Segmenter().enrich(raw)["archetype"] == Archetype.Other.value).sum()
+    path = seg.model.save(tmp_path / "seg.json")
+    loaded = Segmenter(model=SegmentModel.load(path))
+    out = loaded.transform(raw)
+    assert (out["archetype"] != Archetype.Other.value).all()
+    pd.testing.assert_frame_equal(out, Segmenter(use_unsupervised=True).enrich(raw))
+    # a delta scored alone gets the labels it has in the full book (tour groups aside)
+    full = out.set_index("reservation_id")["archetype"]
+    delta = loaded.transform(raw.iloc[:200]).set_index("reservation_id")["archetype"]
+    keep = full.loc[delta.index] != Archetype.TourGroup.value
+    assert (delta[keep] == full.loc[delta.index][keep]).all()
+
+def test_nearest_centroid(raw):
+    m = Segmenter().fit(raw).model
+    X = np.random.default_rng(0).normal(3, 2, (500, len(FEATURES)))
+    d = ((m.standardize(X)[:, None, :] - m.centroids[None]) ** 2).sum(axis=2)
+    np.testing.assert_array_equal(m.assign(X), d.argmin(axis=1))
+
+def test_partial_fit_and_chunked_model(raw, tmp_path):
+    seg = Segmenter(algorithm="minibatch", batch_size=256)
+    for i in range(0, len(raw), 1000):
+        seg.partial_fit(raw.iloc[i:i + 1000])
+    assert seg.model.algorithm == "minibatch" and seg.model.n_clusters == 4
+    inp = tmp_path / "res.csv"
+    raw.to_csv(inp, index=False)
+    model = fit_segment_model_chunked(inp, chunk_rows=700)
+    expected = Segmenter(model=model).transform(pd.read_csv(inp))
+    out = tmp_path / "enriched.csv"
+    segment_csv_chunked(inp, out, chunk_rows=700, segmenter=Segmenter(model=model))
+    assert pd.read_csv(out)["archetype"].tolist() == expected["archetype"].tolist()
+
+def test_errors(raw):
+    with pytest.raises(ValueError, match="no model"):
+        Segmenter().transform(raw)
+    with pytest.raises(ValueError, match="algorithm"):
+        Segmenter(algorithm="dbscan")
+    with pytest.raises(ValueError, match="version"):
+        SegmentModel.from_state({"version": 0})
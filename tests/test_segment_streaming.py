@@ -0,0 +1,27 @@
+import pandas as pd
+from hospops_forecast.segmentation import Segmenter, Archetype
+from hospops_forecast.segmentation.streaming import segment_csv_chunked, parse_memory
+
+def test_chunked_segment_matches_in_memory(tmp_path):
+    src = "examples/data/sample_reservations.csv"
+    raw = pd.read_csv(src)
+    # a tour group split across chunk boundaries
+    tour = pd.DataFrame([{"reservation_id": f"T{i}", "arrival_date": "2025-03-03", "departure_date": "2025-03-05",
+                          "adults": 2, "children": 0, "room_type": "Standard", "channel": "Tour", "company": "Globe"} for i in range(12)])
+    raw = pd.concat([raw, tour], ignore_index=True).sample(frac=1.0, random_state=0)
+    inp = tmp_path / "res.csv"
+    raw.to_csv(inp, index=False)
+
+    expected = Segmenter().enrich(pd.read_csv(inp))
+    out = tmp_path / "enriched.csv"
+    n = segment_csv_chunked(inp, out, chunk_rows=37)
+    got = pd.read_csv(out)
+    assert n == len(expected) == len(got)
+    assert got["archetype"].tolist() == expected["archetype"].tolist()
+    assert got["reservation_id"].astype(str).tolist() == expected["reservation_id"].astype(str).tolist()
+    assert (got.loc[got["reservation_id"].astype(str).str.startswith("T"), "archetype"] == Archetype.TourGroup.value).all()
+
+def test_parse_memory():
+    assert parse_memory("512MB") == 512 * 1024 ** 2
+    assert parse_memory("2g") == 2 * 1024 ** 3
+    assert parse_memory(1000) == 1000
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+from hospops_forecast.segmentation import Segmenter, Archetype
+
+def _rule_based_rowwise(r):
+    # reference: the original per-row rules
+    adults, children = int(r.get("adults",1)), int(r.get("children",0))
+    group = adults + children
+    los = int(r.get("length_of_stay",1))
+    weekday = int(r.get("arrival_weekday",0))
+    is_weekend = weekday in [4,5,6]
+    channel = str(r.get("channel","")).lower()
+    company = str(r.get("company","")).lower()
+    room_type = str(r.get("room_type","")).lower()
+    if adults==1 and children==0 and los<=3 and weekday in range(0,5) and ("corp" in channel or company not in ["","nan"]):
+        return Archetype.SoloBusiness.value
+    if adults==2 and children==0 and (is_weekend or los>=2) and any(k in channel for k in ["ota","direct",""]):
+        return Archetype.LeisureCouple.value
+    if children>=1 or group>=3 or any(k in room_type for k in ["suite","family"]):
+        return Archetype.FamilyWithKids.value
+    return Archetype.Other.value
+
+def _detect_tour_groups_concat(df):
+    df = df.copy()
+    key = df["company"].replace({"nan":"", "None":""}) + "|" + df["channel"].fillna("")
+    df["__k"] = key
+    grp = df.groupby(["arrival_date","__k"]).reservation_id.transform("count")
+    df.loc[grp >= 10, "archetype"] = Archetype.TourGroup.value
+    return df.drop(columns=["__k"])
+
+def _random_reservations(seed, n=3000):
+    rng = np.random.default_rng(seed)
+    arr = pd.Timestamp("2025-05-01") + pd.to_timedelta(rng.integers(0, 6, n), unit="D")
+    return pd.DataFrame({
+        "reservation_id": [f"R{i}" for i in range(n)],
+        "arrival_date": arr,
+        "departure_date": arr + pd.to_timedelta(rng.integers(0, 7, n), unit="D"),
+        "adults": rng.choice([0, 1, 2, 3, np.nan], n),
+        "children": rng.choice([0, 0, 1, 2, np.nan], n),
+        "room_type": rng.choice(["Standard", "Deluxe", "Junior SUITE", "Family Room", "nan", None], n),
+        "channel": rng.choice(["Corp", "OTA", "Direct", "corp|x", "x", "Walk-in", "", None], n),
+        "company": rng.choice(["ACME", "", "nan", "None", "NaN", "MegaTours", "ACME|corp", None], n),
+    })
+
+def test_vectorized_rules_match_rowwise_rules():
+    for seed in range(5):
+        out = Segmenter().enrich(_random_reservations(seed))
+        expected = out.assign(archetype=out.apply(_rule_based_rowwise, axis=1))
+        expected = _detect_tour_groups_concat(expected)
+        assert (out["archetype"].to_numpy() == expected["archetype"].to_numpy()).all()
+        assert out["archetype"].nunique() == 5
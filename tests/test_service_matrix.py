@@ -0,0 +1,21 @@
+import numpy as np
+import pandas as pd
+from hospops_forecast.segmentation.segmenter import Segmenter
+from hospops_forecast.features import arrivals_by_day_and_archetype
+from hospops_forecast.models.service import ServiceLoadForecaster, compile_distributions
+
+def test_compile_distributions_normalizes_and_falls_back_to_other():
+    dist = {"Other": {"14:00": 1.0, "15:00": 3.0}, "TourGroup": {"15:00": 0.0, "18:30": 2.0}}
+    slots, w, support = compile_distributions(dist, ["SoloBusiness", "TourGroup"])
+    assert slots.tolist() == [840, 900, 1110]
+    assert np.allclose(w, [[0.25, 0.75, 0.0], [0.0, 0.0, 1.0]])
+    assert support[1].tolist() == [False, True, True]
+
+def test_reception_hourly_load_sums_to_daily_arrivals():
+    df = pd.read_csv("examples/data/sample_reservations.csv", parse_dates=["arrival_date","departure_date"])
+    en = Segmenter().enrich(df)
+    out = ServiceLoadForecaster().predict(en, area="reception")
+    daily = out.groupby(out["datetime"].dt.date)["expected_transactions"].sum()
+    arrivals = arrivals_by_day_and_archetype(en).groupby("date")["arrivals"].sum()
+    assert np.allclose(daily.sort_index().to_numpy(), arrivals.sort_index().to_numpy())
+    assert out["datetime"].is_monotonic_increasing
@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+from hospops_forecast.config.loader import merge_config
+from hospops_forecast.models.base import default_config
+from hospops_forecast.models.labor import LaborForecaster
+from hospops_forecast.models.service import ServiceLoadForecaster
+from hospops_forecast.segmentation.segmenter import Segmenter
+from hospops_forecast.simulation import MonteCarloForecaster
+
+@pytest.fixture(scope="module")
+def enriched():
+    return Segmenter().enrich(pd.read_csv("examples/data/sample_reservations.csv"))
+
+def _config(scale):
+    base = default_config()["simulation"]
+    return merge_config(default_config(), {"simulation": {k: ({a: r * scale for a, r in v.items()} if isinstance(v, dict) else v)
+                                                          for k, v in base.items()}})
+
+def test_zero_rates_reproduce_the_point_forecasts(enriched):
+    out = MonteCarloForecaster(_config(0.0), draws=50, chunk_size=16).simulate(enriched)
+    labor = LaborForecaster().predict(enriched).groupby("date")[["hk_man_hours", "recommended_headcount"]].sum()
+    got = out["labor"].set_index("date")
+    for q in ("p50", "p90", "p95"):
+        np.testing.assert_allclose(got[f"hk_man_hours_{q}"], labor["hk_man_hours"].reindex(got.index), rtol=1e-9)
+        np.testing.assert_array_equal(got[f"recommended_headcount_{q}"], labor["recommended_headcount"].reindex(got.index))
+    for area in ("reception", "breakfast"):
+        exp = ServiceLoadForecaster().predict(enriched, area=area).reset_index(drop=True)
+        sim = out[f"service_{area}"]
+        assert sim["datetime"].tolist() == exp["datetime"].tolist()
+        np.testing.assert_array_equal(sim["recommended_staff_p95"], exp["recommended_staff"])
+
+def test_quantiles_are_ordered_and_reproducible(enriched):
+    a = MonteCarloForecaster(draws=400, chunk_size=64, seed=7).simulate(enriched)
+    b = MonteCarloForecaster(draws=400, chunk_size=64, seed=7).simulate(enriched)
+    for name in a:
+        pd.testing.assert_frame_equal(a[name], b[name])
+    labor = a["labor"]
+    assert (labor["hk_man_hours_p50"] <= labor["hk_man_hours_p90"]).all()
+    assert (labor["hk_man_hours_p90"] <= labor["hk_man_hours_p95"]).all()
+    staff = a["service_reception"]
+    assert (staff["recommended_staff_p50"] <= staff["recommended_staff_p95"]).all()
+    # cancellations and no-shows outweigh the default walk-ins on this book
+    point = LaborForecaster().predict(enriched).groupby("date")["hk_man_hours"].sum()
+    assert labor["hk_man_hours_mean"].sum() < point.sum()
+
+def test_invalid_settings(enriched):
+    with pytest.raises(ValueError, match="quantiles"):
+        MonteCarloForecaster(quantiles=[0.0])
+    with pytest.raises(ValueError, match="Unknown areas"):
+        MonteCarloForecaster(areas=["spa"])
+    # (1 - 2.0) * (1 - 2.0) is a valid keep probability; each rate must still be in [0, 1]
+    rates = {"cancellation_rate": {"Other": 2.0}, "no_show_rate": {"Other": 2.0}}
+    with pytest.raises(ValueError, match="cancellation_rate"):
+        merge_config(default_config(), {"simulation": rates})
+    with pytest.raises(ValueError, match="no_show_rate"):
+        MonteCarloForecaster({**default_config(), "simulation": rates}, draws=10).simulate(enriched)
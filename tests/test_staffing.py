@@ -0,0 +1,54 @@
+import math
+import numpy as np
+from hospops_forecast.models.queueing import erlang_c_wait_minutes
+from hospops_forecast.models.staffing import required_staff
+
+def _factorial_wait(lam, mu, c):
+    a = lam / mu; rho = lam / (c * mu)
+    last = a**c / math.factorial(c) / (1 - rho)
+    p0 = 1.0 / (sum(a**n / math.factorial(n) for n in range(c)) + last)
+    return last * p0 / (c * mu - lam) * 60.0
+
+def _stepwise(lam, mu, target, cap):
+    if lam <= 0: return 0
+    c = 1
+    while not (erlang_c_wait_minutes(lam, mu, c) <= target and lam / (c * mu) < cap):
+        c += 1
+    return c
+
+def test_log_space_wait_matches_factorial_form():
+    for lam, mu, c in [(10, 12, 1), (30, 12, 4), (80, 25, 5), (150, 40, 6)]:
+        assert math.isclose(erlang_c_wait_minutes(lam, mu, c), _factorial_wait(lam, mu, c), rel_tol=1e-9)
+
+def test_required_staff_matches_stepwise_search():
+    rng = np.random.default_rng(3)
+    lam = np.concatenate([[0.0, 0.5, 12.0, 20.4], rng.uniform(0, 400, 200)])
+    for mu, target, cap in [(12, 5.0, 0.85), (25, 2.0, 0.8), (100, 7.0, 0.9)]:
+        got = required_staff(lam, mu, target, cap)
+        assert got.tolist() == [_stepwise(x, mu, target, cap) for x in lam]
+
+def test_required_staff_handles_airport_scale_loads():
+    lam = np.array([5_000.0, 20_000.0, 60_000.0])
+    staff = required_staff(lam, 100.0, 5.0, 0.9)
+    assert (staff > 500).any()
+    assert (lam / (staff * 100.0) < 0.9).all()
+    assert np.isfinite([erlang_c_wait_minutes(x, 100.0, int(c)) for x, c in zip(lam, staff)]).all()
+
+def test_staffing_table_matches_solver_and_round_trips(tmp_path):
+    from hospops_forecast.models.staffing import StaffingTable, staffing_table
+    lam = np.concatenate([[0.0, 20.4, 60.0], np.random.default_rng(5).uniform(0, 600, 500)])
+    table = staffing_table(12.0, 5.0, 0.85)
+    assert table is staffing_table(12.0, 5.0, 0.85)
+    assert table.staff(lam).tolist() == required_staff(lam, 12.0, 5.0, 0.85).tolist()
+    table.save(tmp_path / "t.npz")
+    loaded = StaffingTable.load(tmp_path / "t.npz")
+    assert loaded.staff(lam).tolist() == table.staff(lam).tolist()
+
+def test_non_finite_rates_are_rejected():
+    import pytest
+    from hospops_forecast.models.staffing import staffing_table
+    for bad in (np.inf, np.nan):
+        with pytest.raises(ValueError, match="finite"):
+            staffing_table(12.0, 5.0, 0.85).staff(np.array([3.0, bad]))
+        with pytest.raises(ValueError, match="finite"):
+            required_staff(np.array([3.0, bad]), 12.0, 5.0, 0.85)
@@ -0,0 +1,50 @@
+import json, subprocess, sys
+from pathlib import Path
+import pandas as pd
+from hospops_forecast import synth
+from hospops_forecast.segmentation.segmenter import Segmenter
+from hospops_forecast.models.airline import AirlineForecaster
+from hospops_forecast.calibration.labor_calibrator import LaborCalibrator
+
+def test_reservations_are_seeded_and_blockwise(monkeypatch):
+    monkeypatch.setattr(synth, "BLOCK_ROWS", 700)
+    a = synth.generate_reservations(2000, seed=7)
+    pd.testing.assert_frame_equal(a, synth.generate_reservations(2000, seed=7))
+    pd.testing.assert_frame_equal(a, pd.concat(list(synth.iter_reservations(2000, seed=7)), ignore_index=True))
+    assert not a.equals(synth.generate_reservations(2000, seed=8))
+    assert a["reservation_id"].is_unique and len(a) == 2000
+    assert (a["departure_date"] > a["arrival_date"]).all()
+    assert 0.05 < (a["status"] == "Cancelled").mean() < 0.11
+
+def test_segmented_mix_matches_the_requested_mix():
+    res = synth.generate_reservations(20000, seed=1, days=90)
+    share = Segmenter().enrich(res)["archetype"].value_counts(normalize=True)
+    for archetype, p in synth.ARCHETYPE_MIX.items():
+        assert abs(share[archetype] - p) < 0.03, (archetype, share[archetype])
+
+def test_flights_and_hk_actuals_feed_the_models():
+    flights = synth.generate_flights(300, seed=2, days=7)
+    assert not AirlineForecaster().predict_all(flights).empty
+    en = Segmenter().enrich(synth.generate_reservations(5000, seed=3, cancel_rate=0.0))
+    hk = synth.generate_hk_actuals(en, seed=3, multipliers={"FamilyWithKids": 2.2}, noise=0.01)
+    tuned = LaborCalibrator().fit_multipliers(en, hk)["housekeeping"]["archetype_multipliers"]
+    assert abs(tuned["FamilyWithKids"] - 2.2) < 0.2
+
+def test_benchmark_suite_writes_json(tmp_path):
+    out = tmp_path / "bench.json"
+    root = Path(__file__).resolve().parents[1]
+    subprocess.run([sys.executable, "-m", "benchmarks.suite", "--sizes", "500", "--cases", "segment,labor", "--repeat", "1",
+                    "--output", str(out)], cwd=root, check=True, capture_output=True)
+    report = json.loads(out.read_text())
+    assert [r["case"] for r in report["results"]] == ["segment", "labor"]
+    assert all(r["median_s"] > 0 and r["peak_mb"] > 0 for r in report["results"])
+
+def test_row_count_and_business_weekdays(monkeypatch):
+    assert [len(synth.generate_reservations(n, seed=s)) for n, s in ((5, 0), (12, 1), (31, 2))] == [5, 12, 31]
+    monkeypatch.setattr(synth, "BLOCK_ROWS", 1000)
+    assert len(synth.generate_reservations(2005, seed=4)) == 2005  # final block of 5 rows
+    res = synth.generate_reservations(20000, seed=1, cancel_rate=0.0)
+    solo = res[res["channel"].isin(["Corp", "GDS"])]
+    per_weekday = solo["arrival_date"].dt.weekday.value_counts()
+    assert set(per_weekday.index) <= set(range(5))
+    assert per_weekday.max() / per_weekday.min() < 1.2